@@ -9,15 +9,22 @@ ai_player.py — AI 托管策略模块
   - 出牌：优先出孤张（手牌中只有1张且非进张的牌），其次出非进张的安全牌
   - 碰/杠/胡：总是胡、总是碰/杠（简单策略）
   - 过：无操作时自动过
+
+策略组合：
+  - AIStrategy 把上述决策函数打包，MahjongGame 按座位选用（默认 DEFAULT_STRATEGY）
+  - STRATEGIES 为按名称登记的变体，供 simulate.py 对比
 """
 
 from __future__ import annotations
 
-from collections import Counter
-from typing import Optional
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from tiles import HONOR_START, ID_TILES, NUM_TILE_KINDS, TILE_IDS, counts_of
+from logic import DiscardOption, analyze_discards_counts, calculate_shanten_counts
 
-from tiles import NUMBER_SUITS, tile_sort_key, sort_tiles
-from logic import is_winning_hand, calculate_shanten, get_winning_tiles
+# 三元牌（役牌）起始 ID：z5 中
+_DRAGON_START = TILE_IDS['z5']
 
 
 def ai_choose_discard(
@@ -34,11 +41,12 @@ def ai_choose_discard(
     3. 非进张的数牌（向听数不减少的出牌）
     4. 向听数增加最少的出牌
     5. 手牌最后一张（兜底）
+    3、4 两档内部优先保留进张剩余枚数多的打法，再按安全度选牌。
 
     参数：
       hand: 当前手牌列表
       melds: 副露列表（暂未使用，预留）
-      discards: 全场弃牌列表（暂未使用，预留）
+      discards: 全场弃牌列表（用于计算进张剩余枚数与安全度）
 
     返回：
       选出的牌编码（str）
@@ -49,92 +57,74 @@ def ai_choose_discard(
     if len(hand) == 1:
         return hand[0]
 
-    counts = Counter(hand)
-    current_shanten = calculate_shanten(hand)
+    counts = counts_of(hand)
+    discard_counts = counts_of(discards) if discards else None
+    current_shanten = calculate_shanten_counts(counts)
+    present = [i for i in range(NUM_TILE_KINDS) if counts[i]]
 
     # ── 1. 找孤张字牌 ──
-    isolated_honors: list[str] = []
-    for tile, cnt in counts.items():
-        if tile[0] == 'z' and cnt == 1:
-            isolated_honors.append(tile)
+    isolated_honors = [i for i in present if i >= HONOR_START and counts[i] == 1]
 
     if isolated_honors:
         # 优先出役牌以外的字牌，如果有多个就随便选
-        non_yakuhai = [t for t in isolated_honors if t not in ('z5', 'z6', 'z7')]
+        non_yakuhai = [i for i in isolated_honors if i < _DRAGON_START]
         if non_yakuhai:
-            return _pick_safe_tile(non_yakuhai, discards)
-        return _pick_safe_tile(isolated_honors, discards)
+            return _pick_safe_tile(non_yakuhai, discard_counts)
+        return _pick_safe_tile(isolated_honors, discard_counts)
 
     # ── 2. 找孤张数牌（只有1张，且周围无搭子）──
-    isolated_numbers: list[str] = []
-    for tile, cnt in counts.items():
-        if tile[0] in NUMBER_SUITS and cnt == 1:
-            suit = tile[0]
-            num = int(tile[1:])
-            # 检查是否有邻牌搭子
-            has_neighbor = False
-            for d in (-2, -1, 1, 2):
-                neighbor = f'{suit}{num + d}'
-                if neighbor in counts and counts[neighbor] > 0:
-                    has_neighbor = True
-                    break
+    isolated_numbers: list[int] = []
+    for i in present:
+        if i < HONOR_START and counts[i] == 1:
+            num = i % 9
+            # 检查是否有邻牌搭子（同花色内）
+            has_neighbor = any(
+                0 <= num + d <= 8 and counts[i + d] > 0
+                for d in (-2, -1, 1, 2)
+            )
             if not has_neighbor:
-                isolated_numbers.append(tile)
+                isolated_numbers.append(i)
 
     if isolated_numbers:
         # 优先出边张（1或9）
-        edge_tiles = [t for t in isolated_numbers if int(t[1:]) in (1, 9)]
+        edge_tiles = [i for i in isolated_numbers if i % 9 in (0, 8)]
         if edge_tiles:
-            return _pick_safe_tile(edge_tiles, discards)
-        return _pick_safe_tile(isolated_numbers, discards)
+            return _pick_safe_tile(edge_tiles, discard_counts)
+        return _pick_safe_tile(isolated_numbers, discard_counts)
 
     # ── 3. 向听数不增加的出牌（打掉后向听数不变）──
-    safe_discards: list[str] = []
-    shanten_increase: list[tuple[int, str]] = []
-
-    for tile in sorted(set(hand), key=tile_sort_key):
-        # 跳过对子/刻子核心牌（避免打关键牌）
-        if counts[tile] >= 2:
-            # 对子以上的牌，打掉一张后检查向听
-            test_hand = hand[:]
-            test_hand.remove(tile)
-            new_shanten = calculate_shanten(test_hand)
-            diff = new_shanten - current_shanten
-            if diff <= 0:
-                safe_discards.append((tile, diff))
-            else:
-                shanten_increase.append((diff, tile))
+    # 一次分析得到每种出牌的向听数与进张
+    options = {o.tile_id: o for o in analyze_discards_counts(counts, discard_counts)}
+    safe_discards: list[tuple[int, int]] = []
+    shanten_increase: list[tuple[int, int]] = []
+
+    for i in present:
+        diff = options[i].shanten - current_shanten
+        if diff <= 0:
+            safe_discards.append((i, diff))
         else:
-            # 单张牌
-            test_hand = hand[:]
-            test_hand.remove(tile)
-            new_shanten = calculate_shanten(test_hand)
-            diff = new_shanten - current_shanten
-            if diff <= 0:
-                safe_discards.append((tile, diff))
-            else:
-                shanten_increase.append((diff, tile))
+            shanten_increase.append((diff, i))
 
     # 优先出向听数不变的单张
-    no_increase = [t for t, d in safe_discards if d == 0 and counts[t] == 1]
+    no_increase = [i for i, d in safe_discards if d == 0 and counts[i] == 1]
     if no_increase:
-        return _pick_safe_tile(no_increase, discards)
+        return _pick_efficient_tile(no_increase, options, discard_counts)
 
     # 其次出向听数不变的其他牌
-    no_increase_all = [t for t, d in safe_discards if d == 0]
+    no_increase_all = [i for i, d in safe_discards if d == 0]
     if no_increase_all:
-        return _pick_safe_tile(no_increase_all, discards)
+        return _pick_efficient_tile(no_increase_all, options, discard_counts)
 
     # 出向听数增加最少的牌
     if shanten_increase:
         shanten_increase.sort(key=lambda x: x[0])
         min_diff = shanten_increase[0][0]
-        best = [t for d, t in shanten_increase if d == min_diff]
+        best = [i for d, i in shanten_increase if d == min_diff]
         # 优先出单张
-        singles = [t for t in best if counts[t] == 1]
+        singles = [i for i in best if counts[i] == 1]
         if singles:
-            return _pick_safe_tile(singles, discards)
-        return _pick_safe_tile(best, discards)
+            return _pick_efficient_tile(singles, options, discard_counts)
+        return _pick_efficient_tile(best, options, discard_counts)
 
     # ── 兜底：出最后一张 ──
     return hand[-1]
@@ -188,10 +178,10 @@ def ai_choose_angang(hand: list[str]) -> Optional[str]:
     返回：
       可暗杠的牌编码，或 None
     """
-    counts = Counter(hand)
-    angang_candidates = [tile for tile, cnt in counts.items() if cnt >= 4]
-    if angang_candidates:
-        return angang_candidates[0]
+    counts = counts_of(hand)
+    for i in range(NUM_TILE_KINDS):
+        if counts[i] >= 4:
+            return ID_TILES[i]
     return None
 
 
@@ -213,9 +203,26 @@ def ai_choose_bugang(hand: list[str], melds: list[dict]) -> Optional[str]:
     return None
 
 
+def _pick_efficient_tile(
+    candidates: list[int],
+    options: dict[int, DiscardOption],
+    discard_counts: bytearray | None = None,
+) -> str:
+    """
+    从候选牌中保留打出后进张剩余枚数最多的几张，再按安全度选出一张。
+
+    参数：
+      candidates: 候选牌 ID 列表（升序）
+      options: analyze_discards_counts 的结果（按打出的牌 ID 索引）
+      discard_counts: 全场弃牌的计数向量
+    """
+    most_live = max(options[i].live for i in candidates)
+    return _pick_safe_tile([i for i in candidates if options[i].live == most_live], discard_counts)
+
+
 def _pick_safe_tile(
-    candidates: list[str],
-    discards: list[str] | None = None,
+    candidates: list[int],
+    discard_counts: bytearray | None = None,
 ) -> str:
     """
     从候选牌中选择最安全的一张出牌。
@@ -223,8 +230,8 @@ def _pick_safe_tile(
     安全性判断：已经在弃牌池中出现越多的牌，越安全（别人不要的概率高）。
 
     参数：
-      candidates: 候选牌列表
-      discards: 全场弃牌列表
+      candidates: 候选牌 ID 列表（升序）
+      discard_counts: 全场弃牌的计数向量
 
     返回：
       选出的牌编码
@@ -232,15 +239,43 @@ def _pick_safe_tile(
     if not candidates:
         return ''
 
-    if not discards:
+    if discard_counts is None:
         # 没有弃牌信息时，选排序最大的（通常是边角牌）
-        return sorted(candidates, key=tile_sort_key)[-1]
+        return ID_TILES[max(candidates)]
+
+    # 弃牌池中出现次数最多的（出现越多越安全），并列时取靠前的
+    return ID_TILES[max(candidates, key=discard_counts.__getitem__)]
+
+
+def ai_should_action_menzen(options: dict) -> str:
+    """
+    门前清变体：只胡不碰不杠，保持门前清（本作门前清即计立直）。
+
+    参数：
+      options: 可用操作字典
+
+    返回：
+      'hu' 或 'pass'
+    """
+    return 'hu' if options.get('hu') else 'pass'
+
+
+# ── 策略组合 ─────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class AIStrategy:
+    """一套托管决策函数（签名与同名的 ai_* 函数相同）"""
+    name: str
+    choose_discard: Callable[..., str] = ai_choose_discard
+    should_action: Callable[[dict], str] = ai_should_action
+    choose_angang: Callable[[list[str]], Optional[str]] = ai_choose_angang
+    choose_bugang: Callable[[list[str], list[dict]], Optional[str]] = ai_choose_bugang
 
-    discard_counts = Counter(discards)
 
-    # 按弃牌池中出现的次数排序（出现越多越安全）
-    def safety_key(tile: str) -> int:
-        return discard_counts.get(tile, 0)
+# 按名称登记的策略变体
+STRATEGIES: dict[str, AIStrategy] = {
+    'default': AIStrategy('default'),
+    'menzen': AIStrategy('menzen', should_action=ai_should_action_menzen),
+}
 
-    candidates.sort(key=safety_key, reverse=True)
-    return candidates[0]
+DEFAULT_STRATEGY: AIStrategy = STRATEGIES['default']
@@ -0,0 +1,169 @@
+"""
+ai_pool.py — AI 托管决策的计算池
+
+职责：
+  - 把耗时的托管决策（ai_choose_discard 的出牌分析）交给有界的 concurrent.futures 池，
+    不在 eventlet 主循环里计算，避免一次思考卡住所有房间的收发
+  - 主循环按固定间隔（经游戏的调度器）检查结果，结果在主循环中交回游戏处理
+  - 每次决策有时间预算：超时、出错或排队已满时改用调用方给出的兜底结果
+  - 记录队列深度与决策延迟，供 /metrics 输出
+
+说明：
+  - 默认使用进程池（CPU 密集的决策在线程池中仍会与主循环争夺 GIL）；
+    提交的函数与参数须可 pickle（ai_player 的模块级函数与普通列表 / 字典均可）
+  - 池在第一次提交（或 warm_up）时才创建；无界面模拟不设置计算池，决策仍同步进行
+"""
+
+from __future__ import annotations
+
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from transport import Scheduler
+
+
+@dataclass
+class AIPoolStats:
+    """计算池计数（延迟为提交到交回结果的实际耗时）"""
+    submitted: int = 0        # 提交到池中的决策数
+    completed: int = 0        # 在预算内算完的决策数
+    timeouts: int = 0         # 超出预算改用兜底的决策数
+    errors: int = 0           # 出错改用兜底的决策数
+    rejected: int = 0         # 排队已满、未提交直接兜底的决策数
+    latency_total: float = 0.0
+    latency_max: float = 0.0
+
+    def as_dict(self, pending: int) -> dict:
+        done = self.completed + self.timeouts + self.errors
+        return {
+            'pending': pending,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'timeouts': self.timeouts,
+            'errors': self.errors,
+            'rejected': self.rejected,
+            'latency_avg_ms': self.latency_total / done * 1000 if done else 0.0,
+            'latency_max_ms': self.latency_max * 1000,
+        }
+
+
+class AIPool:
+    """
+    有界的决策计算池（所有房间共用一个）。
+
+    workers:      池中的进程 / 线程数
+    budget:       每次决策的时间预算（秒）
+    max_pending:  已提交未交回的决策上限（超出时直接兜底）
+    poll:         主循环检查结果的间隔（秒）
+    mode:         'process' 或 'thread'
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        budget: float = 1.5,
+        max_pending: int = 32,
+        poll: float = 0.02,
+        mode: str = 'process',
+    ) -> None:
+        if mode not in ('process', 'thread'):
+            raise ValueError(f'未知的计算池类型 {mode!r}')
+        self.workers = workers or max(1, (os.cpu_count() or 2) - 1)
+        self.budget = budget
+        self.max_pending = max_pending
+        self.poll = poll
+        self.mode = mode
+        self.stats = AIPoolStats()
+        self.pending: int = 0
+        self._executor: concurrent.futures.Executor | None = None
+        # 串行化提交：eventlet 下多个协程同时写执行器的唤醒管道会被拒绝
+        self._submit_lock = threading.Lock()
+
+    def _get_executor(self) -> concurrent.futures.Executor:
+        if self._executor is None:
+            if self.mode == 'process':
+                # spawn：fork 会把 eventlet 主循环及其中的协程一并复制到子进程
+                self._executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            else:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='ai'
+                )
+        return self._executor
+
+    def decide(
+        self,
+        scheduler: Scheduler,
+        fn: Callable[..., Any],
+        args: tuple,
+        fallback: Any,
+        apply: Callable[[Any], None],
+    ) -> None:
+        """
+        在池中计算 fn(*args)，之后在调度器的线程中调用 apply(结果)。
+        超出预算、出错或排队已满时 apply(fallback)。apply 总会被调用恰好一次。
+        """
+        stats = self.stats
+        if self.pending >= self.max_pending:
+            stats.rejected += 1
+            scheduler.spawn_after(0, apply, fallback)
+            return
+        try:
+            with self._submit_lock:
+                future = self._get_executor().submit(fn, *args)
+        except Exception as e:     # 池已损坏（如工作进程被杀）或已关闭
+            print(f'[AIPool] 提交失败，使用兜底: {e}')
+            stats.errors += 1
+            scheduler.spawn_after(0, apply, fallback)
+            return
+        stats.submitted += 1
+        self.pending += 1
+        start = time.monotonic()
+
+        def finish(result: Any) -> None:
+            elapsed = time.monotonic() - start
+            self.pending -= 1
+            stats.latency_total += elapsed
+            stats.latency_max = max(stats.latency_max, elapsed)
+            apply(result)
+
+        def check() -> None:
+            if future.done():
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f'[AIPool] 决策出错，使用兜底: {e!r}')
+                    stats.errors += 1
+                    result = fallback
+                else:
+                    stats.completed += 1
+                finish(result)
+            elif time.monotonic() - start >= self.budget:
+                future.cancel()      # 尚未开始的直接取消；已在计算的结果丢弃
+                stats.timeouts += 1
+                finish(fallback)
+            else:
+                scheduler.spawn_after(self.poll, check)
+
+        scheduler.spawn_after(self.poll, check)
+
+    def warm_up(self) -> None:
+        """预先启动工作进程（spawn 启动较慢，避免第一批决策因此超出预算）"""
+        with self._submit_lock:
+            executor = self._get_executor()
+            for _ in range(self.workers):
+                executor.submit(os.getpid)
+
+    def as_dict(self) -> dict:
+        return dict(self.stats.as_dict(self.pending), workers=self.workers, mode=self.mode, budget=self.budget)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,235 @@
+"""
+batch_analysis.py — 批量手牌分析（NumPy 向量化，离线使用）
+
+职责：
+  - 一次处理 (N, 34) 的 uint8 计数矩阵（每行一手牌，下标为 tiles.py 的牌 ID）
+  - 结果与 logic.py 的单手函数逐行完全一致，用于模拟、回放统计、AI 调参
+
+提供：
+  - encode_hands(hands)     字符串手牌列表 -> (N, 34) 计数矩阵
+  - batch_shanten(M)        向听数（int8），同 calculate_shanten_counts
+  - batch_is_winning(M)     和牌标志（bool），同 is_winning_counts
+  - batch_waits(M)          听牌位掩码（uint64，第 i 位 = 牌 ID i），同 get_winning_ids
+  - analyze_batch(M)        以上三项一次算完（共享花色编码）
+  - waits_to_ids(mask)      位掩码 -> 牌 ID 列表
+
+实现：
+  每行按花色编码为 5 进制键（与 logic 的查表引擎相同），每门用 np.unique 去重后，
+  只对不同的键调用一次 logic 的单花色表，再用广播完成四门组合。
+  超过 14 张的手牌（logic 中走回溯的情形）逐行回退到单手函数。
+
+依赖 numpy（仅离线工具使用，服务器本身不需要）。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+
+import numpy as np
+
+import logic
+from tiles import NUM_TILE_KINDS, TERMINAL_HONOR_IDS, counts_of
+
+# 每门在 34 格中的范围，及该门是否为字牌
+_SUIT_SLICES: tuple[tuple[int, int, bool], ...] = ((0, 9, False), (9, 18, False), (18, 27, False), (27, 34, True))
+_POW5 = [np.array([5 ** k for k in range(hi - lo)], dtype=np.int64) for lo, hi, _ in _SUIT_SLICES]
+_TERMINAL_HONOR = np.array(TERMINAL_HONOR_IDS, dtype=np.intp)
+_NO_OPTION = 1 << 20   # 填充用的雀头选项（kb 足够大，组合时总被跳过）
+
+
+@dataclass
+class BatchResult:
+    """analyze_batch 的结果（每个数组长度为 N）"""
+    shanten: np.ndarray     # int8
+    agari: np.ndarray       # bool
+    waits: np.ndarray       # uint64 位掩码
+
+
+def encode_hands(hands: list[list[str]]) -> np.ndarray:
+    """字符串手牌列表 -> (N, 34) uint8 计数矩阵"""
+    matrix = np.zeros((len(hands), NUM_TILE_KINDS), dtype=np.uint8)
+    for row, hand in zip(matrix, hands):
+        row[:] = np.frombuffer(counts_of(hand), dtype=np.uint8)
+    return matrix
+
+
+def waits_to_ids(mask: int) -> list[int]:
+    """听牌位掩码 -> 升序牌 ID 列表"""
+    mask = int(mask)
+    return [i for i in range(NUM_TILE_KINDS) if mask >> i & 1]
+
+
+# ─── 编码 ─────────────────────────────────────────────────────────
+
+class _Encoded:
+    """一批手牌的花色编码：四门键 / 张数、每门去重后的键与反查下标"""
+
+    def __init__(self, matrix: np.ndarray) -> None:
+        if matrix.ndim != 2 or matrix.shape[1] != NUM_TILE_KINDS:
+            raise ValueError(f'需要 (N, {NUM_TILE_KINDS}) 的计数矩阵，收到 {matrix.shape}')
+        self.matrix = matrix
+        self.keys = np.stack(
+            [matrix[:, lo:hi].astype(np.int64) @ pow5 for (lo, hi, _), pow5 in zip(_SUIT_SLICES, _POW5)],
+            axis=1,
+        )
+        self.sizes = np.stack([matrix[:, lo:hi].sum(axis=1, dtype=np.int64) for lo, hi, _ in _SUIT_SLICES], axis=1)
+        self.total = self.sizes.sum(axis=1)
+        self.pairs = (matrix >= 2).sum(axis=1)
+        self.uniques: list[tuple[np.ndarray, np.ndarray]] = [
+            np.unique(self.keys[:, si], return_inverse=True) for si in range(4)
+        ]
+
+    @cached_property
+    def complete(self) -> np.ndarray:
+        """(N, 4)：每门是否能完全拆解（面子 + 至多一个雀头）"""
+        return np.stack([self.per_suit(si, _in_agari_table, bool) for si in range(4)], axis=1)
+
+    def per_suit(self, si: int, fn, dtype) -> np.ndarray:
+        """对第 si 门的每个不同键调用一次 fn(key, honor)，展开回 N 行"""
+        uniq, inverse = self.uniques[si]
+        honor = _SUIT_SLICES[si][2]
+        values = np.array([fn(int(k), honor) for k in uniq], dtype=dtype)
+        return values[inverse.reshape(-1)]
+
+
+# ─── 向听数 ───────────────────────────────────────────────────────
+
+def _shanten(enc: _Encoded) -> np.ndarray:
+    """与 logic.calculate_shanten_counts 相同（标准形逐门组合规则同 _shanten_from_keys）"""
+    n = len(enc.total)
+    need = (enc.total - 2) // 3
+
+    # 每门：不取雀头时最多的 面子+搭子 数，以及补齐到等宽的雀头选项 (kb, k)
+    max_sets = np.empty((n, 4), dtype=np.int64)
+    options: list[tuple[np.ndarray, np.ndarray]] = []
+    for si in range(4):
+        uniq, inverse = enc.uniques[si]
+        honor = _SUIT_SLICES[si][2]
+        entries = [logic._suit_entry(int(k), honor) for k in uniq]
+        width = max(1, max(len(e[1]) for e in entries))
+        kb = np.full((len(uniq), width), _NO_OPTION, dtype=np.int64)
+        k = np.zeros((len(uniq), width), dtype=np.int64)
+        for row, (_, opts) in enumerate(entries):
+            for col, (a, b) in enumerate(opts):
+                kb[row, col] = a
+                k[row, col] = b
+        inverse = inverse.reshape(-1)
+        max_sets[:, si] = np.array([e[0] for e in entries], dtype=np.int64)[inverse]
+        options.append((kb[inverse], k[inverse]))
+
+    total_sets = max_sets.sum(axis=1)
+    best = need - np.minimum(total_sets, need)
+    complete = np.zeros(n, dtype=bool)
+    before = np.zeros(n, dtype=np.int64)
+    need_col = need[:, None]
+    for si in range(4):
+        kb, k = options[si]
+        after = (total_sets - before - max_sets[:, si])[:, None]
+        before_col = before[:, None]
+        valid = kb < need_col
+        prefix = np.minimum(before_col, need_col - 1 - kb)
+        complete |= (valid & (prefix + k + after >= need_col)).any(axis=1)
+        reach = np.minimum(need_col - 1, before_col + k + after)
+        cand = np.where(valid, need_col - reach - 1, best[:, None])
+        best = np.minimum(best, cand.min(axis=1))
+        before = before + max_sets[:, si]
+
+    std = np.where(complete, -1, best)
+    std = np.where(need <= 0, np.minimum(need * 2, need), std)
+
+    chii = 6 - enc.pairs
+    th = enc.matrix[:, _TERMINAL_HONOR]
+    koku = 13 - (th >= 1).sum(axis=1) - (th >= 2).any(axis=1)
+
+    result = np.minimum(np.minimum(std, chii), koku)
+    result = np.where(enc.total == 0, 8, result)
+    return result.astype(np.int8)
+
+
+# ─── 和牌判断 ─────────────────────────────────────────────────────
+
+def _in_agari_table(key: int, honor: bool) -> bool:
+    return key in (logic._AGARI_HONOR_TABLE if honor else logic._AGARI_NUMBER_TABLE)
+
+
+def _agari(enc: _Encoded) -> np.ndarray:
+    """与 logic.is_winning_counts 相同"""
+    heads = (enc.sizes % 3 == 2).sum(axis=1)
+    result = (enc.complete.all(axis=1) & (heads == 1)) | ((enc.total == 14) & (enc.pairs == 7))
+    result &= enc.total % 3 == 2
+
+    for row in np.nonzero((enc.total > 14) & (enc.total % 3 == 2))[0]:
+        result[row] = logic.is_winning_counts(bytearray(enc.matrix[row].tobytes()))
+    return result
+
+
+# ─── 听牌 ─────────────────────────────────────────────────────────
+
+@lru_cache(maxsize=None)
+def _suit_wait_mask(key: int, honor: bool) -> int:
+    """该门摸进哪些位置后能完全拆解（位 p = 该门第 p 张；已有 4 张的不算）"""
+    cnts = logic._decode_suit_key(key, honor)
+    table = logic._AGARI_HONOR_TABLE if honor else logic._AGARI_NUMBER_TABLE
+    mask = 0
+    for p, c in enumerate(cnts):
+        if c < 4 and key + 5 ** p in table:
+            mask |= 1 << p
+    return mask
+
+
+def _waits(enc: _Encoded) -> np.ndarray:
+    """与 logic.get_winning_ids 相同（以位掩码表示）"""
+    n = len(enc.total)
+    complete = enc.complete
+    heads = (enc.sizes % 3 == 2).sum(axis=1)
+    waits = np.zeros(n, dtype=np.uint64)
+
+    for si, (lo, _, _) in enumerate(_SUIT_SLICES):
+        # 其余三门已完全拆解，且摸进后全手恰好一个雀头
+        others_complete = complete.sum(axis=1) - complete[:, si] == 3
+        other_heads = heads - (enc.sizes[:, si] % 3 == 2)
+        head_after = (enc.sizes[:, si] + 1) % 3 == 2
+        ok = others_complete & (other_heads + head_after == 1)
+        local = enc.per_suit(si, _suit_wait_mask, np.uint64)
+        waits |= np.where(ok, local << np.uint64(lo), np.uint64(0))
+
+    # 七对子单骑
+    rows = np.nonzero((enc.total == 13) & (enc.pairs == 6))[0]
+    if len(rows):
+        bits = np.left_shift(np.uint64(1), np.arange(NUM_TILE_KINDS, dtype=np.uint64))
+        singles = enc.matrix[rows] == 1
+        waits[rows] |= np.bitwise_or.reduce(np.where(singles, bits, np.uint64(0)), axis=1)
+
+    waits = np.where(enc.total % 3 == 1, waits, np.uint64(0))
+    for row in np.nonzero((enc.total > 13) & (enc.total % 3 == 1))[0]:
+        ids = logic.get_winning_ids(bytearray(enc.matrix[row].tobytes()))
+        waits[row] = sum(1 << i for i in ids)
+    return waits
+
+
+# ─── 对外接口 ─────────────────────────────────────────────────────
+
+def _as_matrix(matrix: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(matrix, dtype=np.uint8)
+
+
+def batch_shanten(matrix: np.ndarray) -> np.ndarray:
+    """(N, 34) 计数矩阵 -> 每行向听数（int8）"""
+    return _shanten(_Encoded(_as_matrix(matrix)))
+
+
+def batch_is_winning(matrix: np.ndarray) -> np.ndarray:
+    """(N, 34) 计数矩阵 -> 每行是否和牌（bool）"""
+    return _agari(_Encoded(_as_matrix(matrix)))
+
+
+def batch_waits(matrix: np.ndarray) -> np.ndarray:
+    """(N, 34) 计数矩阵 -> 每行听牌位掩码（uint64；非 3n+1 张为 0）"""
+    return _waits(_Encoded(_as_matrix(matrix)))
+
+
+def analyze_batch(matrix: np.ndarray) -> BatchResult:
+    """一次算出向听数、和牌标志、听牌位掩码（共享花色编码与去重）"""
+    enc = _Encoded(_as_matrix(matrix))
+    return BatchResult(_shanten(enc), _agari(enc), _waits(enc))
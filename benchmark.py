@@ -0,0 +1,997 @@
+"""
+benchmark.py — 算法基准与一致性校验（离线工具，不参与服务运行）
+
+职责：
+  - 用固定种子随机生成手牌，对比新旧实现的结果是否完全一致
+  - 结果一致后再计时，输出每秒处理的手牌数
+
+用法：
+  python benchmark.py shanten [-n 20000] [--seed 1]
+  python benchmark.py agari   [-n 20000] [--seed 1]
+  python benchmark.py waits   [-n 20000] [--seed 1]
+  python benchmark.py discards [-n 2000] [--seed 1]
+  python benchmark.py cache   [-n 20000] [--seed 1]
+  python benchmark.py batch   [-n 200000] [--seed 1]   （需要 numpy）
+  python benchmark.py scorer  [-n 20000] [--seed 1]
+  python benchmark.py best    [-n 20000] [--seed 1]
+  python benchmark.py wall    [-n 20000] [--seed 1]
+  python benchmark.py display [-n 20000] [--seed 1]
+  python benchmark.py respond [-n 20000] [--seed 1]
+  python benchmark.py timers  [-n 20000] [--seed 1]
+  python benchmark.py pool    [-n 20000] [--seed 1]
+  python benchmark.py pacing  [-n 20000] [--seed 1]
+  python benchmark.py resume  [-n 20000] [--seed 1]
+
+计时默认关闭 logic 的结果缓存（cache 目标除外），只比较算法本身。
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+import warnings
+from collections import Counter
+
+import logic
+from hand_analysis import HandAnalysis
+from headless import HeadlessTable
+from transport import MemoryTransport, TimerGroup, TimerWheel, VirtualClock
+from tiles import ALL_TILES, TILE_IDS, UNICODE_MAP, TileList, Wall, counts_of, tile_sort_key, to_display
+
+# 参与测试的手牌张数（含副露后剩余的各种张数）
+HAND_SIZES: tuple[int, ...] = (1, 2, 4, 5, 7, 8, 10, 11, 13, 14)
+
+
+def random_hands(n: int, seed: int, sizes: tuple[int, ...] = HAND_SIZES) -> list[list[str]]:
+    """
+    生成 n 手随机手牌。
+    三分之一来自完整牌山，三分之一只用单一花色，三分之一只用 6 种牌，
+    后两类用来制造密集的复合形。
+    """
+    rng = random.Random(seed)
+    hands: list[list[str]] = []
+    for i in range(n):
+        if i % 3 == 0:
+            pool = [t for t in ALL_TILES for _ in range(4)]
+        elif i % 3 == 1:
+            suit = rng.randrange(3)
+            pool = [t for t in ALL_TILES[suit * 9:suit * 9 + 9] for _ in range(4)]
+        else:
+            pool = [t for t in rng.sample(ALL_TILES, 6) for _ in range(4)]
+        rng.shuffle(pool)
+        hands.append(pool[:rng.choice(sizes)])
+    return hands
+
+
+def random_winning_hands(n: int, seed: int) -> list[list[str]]:
+    """生成 n 手随机和牌形（4 副面子 + 雀头，每 5 手插入一手七对子）"""
+    rng = random.Random(seed)
+    numbers = [t for t in ALL_TILES if t[0] != 'z']
+    hands: list[list[str]] = []
+    while len(hands) < n:
+        if len(hands) % 5 == 4:
+            hands.append([t for t in rng.sample(ALL_TILES, 7) for _ in range(2)])
+            continue
+        hand = [rng.choice(ALL_TILES)] * 2
+        for _ in range(4):
+            if rng.random() < 0.6:
+                start = rng.choice([t for t in numbers if int(t[1]) <= 7])
+                hand += [f'{start[0]}{int(start[1]) + d}' for d in range(3)]
+            else:
+                hand += [rng.choice(ALL_TILES)] * 3
+        if max(Counter(hand).values()) <= 4:
+            rng.shuffle(hand)
+            hands.append(hand)
+    return hands
+
+
+def _rate(count: int, seconds: float, unit: str = '手') -> str:
+    return f'{count / seconds:,.0f} {unit}/秒' if seconds > 0 else '-'
+
+
+def bench_shanten(args: argparse.Namespace) -> int:
+    """向听数：查表引擎 vs 回溯引擎"""
+    hands = random_hands(args.n, args.seed)
+    cases = [(dict(Counter(h)), counts_of(h), len(h)) for h in hands]
+
+    # 一致性校验
+    mismatches = 0
+    for (counts, vector, total), hand in zip(cases, hands):
+        expected = logic._shanten_normal(counts, total)
+        got = logic._shanten_normal_table(vector, total)
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(hand)} recursive={expected} table={got}')
+    if mismatches:
+        print(f'[shanten] {mismatches}/{len(hands)} 手结果不一致')
+        return 1
+
+    t0 = time.perf_counter()
+    for counts, _, total in cases:
+        logic._shanten_normal(counts, total)
+    t_rec = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for _, vector, total in cases:
+        logic._shanten_normal_table(vector, total)
+    t_tab = time.perf_counter() - t0
+
+    print(f'[shanten] {len(hands)} 手全部一致')
+    print(f'  recursive: {t_rec:.3f}s  {_rate(len(hands), t_rec)}')
+    print(f'  table:     {t_tab:.3f}s  {_rate(len(hands), t_tab)}  (x{t_rec / t_tab:.1f})')
+    return 0
+
+
+def bench_agari(args: argparse.Namespace) -> int:
+    """和牌判断：查表 vs 回溯"""
+    hands = random_hands(args.n, args.seed, sizes=(2, 5, 8, 11, 14))
+    hands += random_winning_hands(args.n, args.seed)
+
+    mismatches = 0
+    wins = 0
+    for hand in hands:
+        expected = logic._is_winning_hand_backtrack(hand)
+        got = logic.is_winning_hand(hand)
+        wins += expected
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(hand)} backtrack={expected} table={got}')
+    if mismatches:
+        print(f'[agari] {mismatches}/{len(hands)} 手结果不一致')
+        return 1
+
+    t0 = time.perf_counter()
+    for hand in hands:
+        logic._is_winning_hand_backtrack(hand)
+    t_bt = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for hand in hands:
+        logic.is_winning_hand(hand)
+    t_tab = time.perf_counter() - t0
+
+    print(f'[agari] {len(hands)} 手全部一致（其中和牌 {wins} 手）')
+    print(f'  backtrack: {t_bt:.3f}s  {_rate(len(hands), t_bt)}')
+    print(f'  table:     {t_tab:.3f}s  {_rate(len(hands), t_tab)}  (x{t_bt / t_tab:.1f})')
+    return 0
+
+
+def bench_waits(args: argparse.Namespace) -> int:
+    """听牌进张：按门直接求解 vs 逐一试摸 34 种牌"""
+    # 和牌形去掉一张得到大量真实听牌形，再混入随机 3n+1 手牌
+    rng = random.Random(args.seed)
+    hands = []
+    for h in random_winning_hands(args.n, args.seed):
+        i = rng.randrange(len(h))
+        hands.append(h[:i] + h[i + 1:])
+    hands += random_hands(args.n, args.seed, sizes=(1, 4, 7, 10, 13))
+    vectors = [counts_of(h) for h in hands]
+
+    mismatches = 0
+    tenpai = 0
+    for hand, vector in zip(hands, vectors):
+        expected = logic._get_winning_ids_brute(bytearray(vector))
+        got = logic._get_winning_ids(vector)
+        tenpai += bool(expected)
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(hand)} brute={expected} direct={got}')
+    if mismatches:
+        print(f'[waits] {mismatches}/{len(hands)} 手结果不一致')
+        return 1
+
+    t0 = time.perf_counter()
+    for vector in vectors:
+        logic._get_winning_ids_brute(vector)
+    t_brute = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for vector in vectors:
+        logic._get_winning_ids(vector)
+    t_direct = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for vector in vectors:
+        logic.analyze_waits_counts(vector)
+    t_shapes = time.perf_counter() - t0
+
+    print(f'[waits] {len(hands)} 手全部一致（其中听牌 {tenpai} 手）')
+    print(f'  brute:  {t_brute:.3f}s  {_rate(len(hands), t_brute)}')
+    print(f'  direct: {t_direct:.3f}s  {_rate(len(hands), t_direct)}  (x{t_brute / t_direct:.1f})')
+    print(f'  direct + 听牌形状: {t_shapes:.3f}s  {_rate(len(hands), t_shapes)}')
+    return 0
+
+
+def bench_batch(args: argparse.Namespace) -> int:
+    """批量分析：batch_analysis（NumPy）vs 单手函数逐行调用"""
+    import batch_analysis
+
+    hands = random_hands(args.n, args.seed)
+    hands += random_winning_hands(args.n // 4, args.seed)
+    matrix = batch_analysis.encode_hands(hands)
+    vectors = [counts_of(h) for h in hands]
+
+    # 第一次调用会顺带填充 logic 的单花色表（冷启动），第二次为稳定状态
+    t0 = time.perf_counter()
+    batch_analysis.analyze_batch(matrix)
+    t_cold = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    result = batch_analysis.analyze_batch(matrix)
+    t_batch = time.perf_counter() - t0
+
+    # 单手函数（逐行）作为参照，顺带计时；校验只取前 50000 行以控制耗时
+    sample = min(len(hands), 50000)
+    t0 = time.perf_counter()
+    expected = [
+        (logic.calculate_shanten_counts(v), logic.is_winning_counts(v), logic.get_winning_ids(v))
+        for v in vectors[:sample]
+    ]
+    t_scalar = (time.perf_counter() - t0) * len(hands) / sample
+
+    mismatches = 0
+    for i, (sh, win, waits) in enumerate(expected):
+        got = (int(result.shanten[i]), bool(result.agari[i]), batch_analysis.waits_to_ids(result.waits[i]))
+        if got != (sh, win, waits):
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(hands[i])} scalar={(sh, win, waits)} batch={got}')
+    if mismatches:
+        print(f'[batch] {mismatches}/{sample} 手结果不一致')
+        return 1
+
+    print(f'[batch] 前 {sample} 手与单手函数全部一致（共 {len(hands)} 手）')
+    print(f'  scalar: {t_scalar:.3f}s（按抽样折算）  {_rate(len(hands), t_scalar)}')
+    print(f'  batch（冷启动）: {t_cold:.3f}s  {_rate(len(hands), t_cold)}')
+    print(f'  batch:  {t_batch:.3f}s  {_rate(len(hands), t_batch)}  (x{t_scalar / t_batch:.1f})')
+    return 0
+
+
+def random_scoring_cases(n: int, seed: int) -> list[tuple]:
+    """
+    生成 n 个计分用例：(手牌, 副露, 和了牌, 和牌方式, 来源标签, 自风, 场风)。
+    随机把部分刻子改为碰/杠副露，并混入幺九/绿牌/字牌密集的手牌。
+    """
+    rng = random.Random(seed)
+    pools = (
+        ['s2', 's3', 's4', 's6', 's8', 'z6'],
+        ['m1', 'm9', 'p1', 'p9', 's1', 's9', 'z1', 'z2', 'z3', 'z4', 'z5', 'z6', 'z7'],
+        ['z1', 'z2', 'z3', 'z4', 'z5', 'z6', 'z7'],
+    )
+    hands = random_winning_hands(n - n // 4, seed)
+    while len(hands) < n:
+        pool = rng.choice(pools)
+        hand = [rng.choice(pool)] * 2
+        for _ in range(4):
+            hand += [rng.choice(pool)] * 3
+        if max(Counter(hand).values()) <= 4:
+            hands.append(hand)
+
+    cases = []
+    for hand in hands:
+        hand = list(hand)
+        rng.shuffle(hand)
+        melds = []
+        for tile, k in list(Counter(hand).items()):
+            if k >= 3 and rng.random() < 0.4:
+                for _ in range(3):
+                    hand.remove(tile)
+                kind = rng.choice(['peng', 'gang', 'angang', 'bugang'])
+                melds.append({'type': kind, 'tiles': [tile] * (3 if kind == 'peng' else 4)})
+        cases.append((
+            hand, melds, hand[-1],
+            rng.choice(['rong', 'zimo']),
+            rng.choice(['', '', '天胡', '岭上开花', '抢杠']),
+            rng.choice('东南西北'), rng.choice('东南西北'),
+        ))
+    return cases
+
+
+def bench_scorer(args: argparse.Namespace) -> int:
+    """计分：编译版番种判定 vs 逐项 _check_* 检查（对同一批 WinAnalysis 反复计分）"""
+    import scorer
+
+    cases = random_scoring_cases(args.n, args.seed)
+    wins = [logic.analyze_win(counts_of(h), m, t) for h, m, t, *_ in cases]
+    params = [c[3:] for c in cases]
+
+    mismatches = 0
+    for case, win, (hu_type, label, seat, rnd) in zip(cases, wins, params):
+        expected = scorer._evaluate_hand_reference(win, hu_type, label, seat, rnd)
+        got = scorer.evaluate_hand(win, hu_type=hu_type, from_label=label, seat_wind=seat, round_wind=rnd)
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(case[0])} {case[1]} reference={expected} compiled={got}')
+    if mismatches:
+        print(f'[scorer] {mismatches}/{len(cases)} 手结果不一致')
+        return 1
+
+    t0 = time.perf_counter()
+    for win, (hu_type, label, seat, rnd) in zip(wins, params):
+        scorer._evaluate_hand_reference(win, hu_type, label, seat, rnd)
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for win, (hu_type, label, seat, rnd) in zip(wins, params):
+        scorer.evaluate_hand(win, hu_type=hu_type, from_label=label, seat_wind=seat, round_wind=rnd)
+    t_comp = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for hand, melds, tile, hu_type, label, seat, rnd in cases:
+        scorer.evaluate_hand(hand, melds, tile, hu_type, label, seat, rnd)
+    t_full = time.perf_counter() - t0
+
+    print(f'[scorer] {len(cases)} 手全部一致')
+    print(f'  reference: {t_ref:.3f}s  {_rate(len(cases), t_ref)}')
+    print(f'  compiled:  {t_comp:.3f}s  {_rate(len(cases), t_comp)}  (x{t_ref / t_comp:.1f})')
+    print(f'  compiled（含 analyze_win）: {t_full:.3f}s  {_rate(len(cases), t_full)}')
+    return 0
+
+
+def _brute_decompositions(counts: bytearray) -> list[tuple[int, tuple[tuple[int, int, int], ...]]]:
+    """逐个试雀头、从最小的牌起回溯取刻子 / 顺子，列出全部 雀头+面子 拆法（不查表）"""
+    cnt = bytearray(counts)
+    melds: list[tuple[int, int, int]] = []
+    result = []
+
+    def search(pair: int) -> None:
+        i = next((k for k in range(34) if cnt[k]), 34)
+        if i == 34:
+            result.append((pair, tuple(melds)))
+            return
+        if cnt[i] >= 3:
+            cnt[i] -= 3
+            melds.append((i, i, i))
+            search(pair)
+            melds.pop()
+            cnt[i] += 3
+        if i < 27 and i % 9 <= 6 and cnt[i + 1] and cnt[i + 2]:
+            cnt[i] -= 1; cnt[i + 1] -= 1; cnt[i + 2] -= 1
+            melds.append((i, i + 1, i + 2))
+            search(pair)
+            melds.pop()
+            cnt[i] += 1; cnt[i + 1] += 1; cnt[i + 2] += 1
+
+    if sum(counts) % 3 == 2:
+        for pair in range(34):
+            if cnt[pair] >= 2:
+                cnt[pair] -= 2
+                search(pair)
+                cnt[pair] += 2
+    return result
+
+
+def _exhaustive_best(scorer, win, hu_type: str, label: str, seat: str, rnd: str) -> tuple[int, int]:
+    """回溯列出全部拆法、逐个计分取最高 (得分, 番数)，作为 best 模式的参照"""
+    base = scorer._yaku_bits(win, hu_type, label, seat, rnd) & ~scorer._DECOMP_BITS
+    only_triplets = all(m['type'] in scorer._TRIPLET_MELD_TYPES for m in win.melds)
+    keys = [scorer._result_key(base | scorer._decomposition_bits(win, melds, only_triplets))
+            for _, melds in _brute_decompositions(win.counts)]
+    if win.is_chiitoitsu:
+        keys.append(scorer._result_key(base | scorer._B_CHIITOITSU))
+    if not keys:
+        return scorer._result_key(scorer._yaku_bits(win, hu_type, label, seat, rnd))
+    return max(keys)
+
+
+def bench_best(args: argparse.Namespace) -> int:
+    """最高分拆法：best 模式与回溯枚举全部拆法的结果一致，再比较 best 模式相对默认模式的开销"""
+    import scorer
+
+    cases = random_scoring_cases(args.n, args.seed)
+    # 加入大量一色多面子的复合形（拆法多）
+    rng = random.Random(args.seed)
+    for hand in random_hands(args.n, args.seed, sizes=(14,)):
+        if logic.is_winning_hand(hand):
+            cases.append((hand, [], hand[-1], rng.choice(['rong', 'zimo']), '', '东', '南'))
+    wins = [logic.analyze_win(counts_of(h), m, t) for h, m, t, *_ in cases]
+    params = [c[3:] for c in cases]
+
+    mismatches = 0
+    for case, win, (hu_type, label, seat, rnd) in zip(cases, wins, params):
+        expected = _exhaustive_best(scorer, win, hu_type, label, seat, rnd)
+        got = scorer.evaluate_hand(win, hu_type=hu_type, from_label=label, seat_wind=seat,
+                                   round_wind=rnd, best=True)
+        if (got.score, got.fan) != expected:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(case[0])} {case[1]} exhaustive={expected} best={got}')
+    if mismatches:
+        print(f'[best] {mismatches}/{len(cases)} 手结果不一致')
+        return 1
+
+    t0 = time.perf_counter()
+    for win, (hu_type, label, seat, rnd) in zip(wins, params):
+        scorer.evaluate_hand(win, hu_type=hu_type, from_label=label, seat_wind=seat, round_wind=rnd)
+    t_default = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for win, (hu_type, label, seat, rnd) in zip(wins, params):
+        scorer.evaluate_hand(win, hu_type=hu_type, from_label=label, seat_wind=seat, round_wind=rnd, best=True)
+    t_best = time.perf_counter() - t0
+
+    print(f'[best] {len(cases)} 手全部一致')
+    print(f'  default:    {t_default:.3f}s  {_rate(len(cases), t_default)}')
+    print(f'  best=True:  {t_best:.3f}s  {_rate(len(cases), t_best)}  (x{t_best / t_default:.2f})')
+    return 0
+
+
+def _brute_discards(counts: bytearray) -> list[tuple[int, int, tuple[int, ...]]]:
+    """逐张试打、逐张试摸的暴力版出牌分析，作为 analyze_discards 的参照"""
+    result = []
+    for x in range(34):
+        if not counts[x]:
+            continue
+        counts[x] -= 1
+        base = logic.calculate_shanten_counts(counts)
+        accepts = []
+        for t in range(34):
+            if counts[t] >= 4:
+                continue
+            counts[t] += 1
+            best = min(
+                (logic.calculate_shanten_counts(counts[:d] + bytes([counts[d] - 1]) + counts[d + 1:])
+                 for d in range(34) if counts[d] and d != t),
+                default=base,
+            )
+            counts[t] -= 1
+            if best < base:
+                accepts.append(t)
+        counts[x] += 1
+        result.append((x, base, tuple(accepts)))
+    return result
+
+
+def _permute_suits(hand: list[str], perm: tuple[int, ...]) -> list[str]:
+    """把 m/p/s 三门按 perm 互换（字牌不变）"""
+    suits = 'mps'
+    return [f'{suits[perm[suits.index(t[0])]]}{t[1]}' if t[0] in suits else t for t in hand]
+
+
+def bench_cache(args: argparse.Namespace) -> int:
+    """结果缓存：花色互换后的同构手牌必须得到一致（且正确换位）的结果"""
+    from itertools import permutations
+
+    base = random_hands(args.n // 6 or 1, args.seed, sizes=(2, 4, 5, 7, 8, 10, 11, 13, 14))
+    hands = [_permute_suits(h, p) for h in base for p in permutations(range(3))]
+
+    logic.configure_cache(0)
+    expected = [
+        (logic.calculate_shanten(h), logic.is_winning_hand(h), logic.get_winning_ids(counts_of(h)))
+        for h in hands
+    ]
+    t0 = time.perf_counter()
+    for h in hands:
+        vector = counts_of(h)
+        logic.calculate_shanten_counts(vector)
+        logic.is_winning_counts(vector)
+        logic.get_winning_ids(vector)
+    t_off = time.perf_counter() - t0
+
+    logic.configure_cache()
+    logic.clear_caches()
+    t0 = time.perf_counter()
+    got = []
+    for h in hands:
+        vector = counts_of(h)
+        got.append((
+            logic.calculate_shanten_counts(vector),
+            logic.is_winning_counts(vector),
+            logic.get_winning_ids(vector),
+        ))
+    t_on = time.perf_counter() - t0
+
+    mismatches = [(h, e, g) for h, e, g in zip(hands, expected, got) if e != g]
+    for h, e, g in mismatches[:10]:
+        print(f'  不一致: {sorted(h)} expected={e} cached={g}')
+    if mismatches:
+        print(f'[cache] {len(mismatches)}/{len(hands)} 手结果不一致')
+        return 1
+
+    print(f'[cache] {len(hands)} 手（{len(base)} 手 × 6 种花色排列）全部一致')
+    print(f'  no cache: {t_off:.3f}s  {_rate(len(hands), t_off)}')
+    print(f'  cache:    {t_on:.3f}s  {_rate(len(hands), t_on)}  (x{t_off / t_on:.1f})')
+    for name, st in logic.cache_stats().items():
+        print(f'  {name:8s} hits={st["hits"]} misses={st["misses"]} '
+              f'evictions={st["evictions"]} hit_rate={st["hit_rate"]:.2%}')
+    return 0
+
+
+# 进张分析相对「逐张算向听」的耗时上限（O(出牌 × 候选进张)，实测约 5 倍）
+DISCARDS_MAX_RATIO = 15.0
+
+
+def bench_discards(args: argparse.Namespace) -> int:
+    """出牌效率分析：analyze_discards vs 逐张暴力试牌"""
+    hands = random_hands(min(args.n, 2000), args.seed, sizes=(5, 8, 11, 14))
+    vectors = [counts_of(h) for h in hands]
+
+    mismatches = 0
+    for hand, vector in zip(hands, vectors):
+        expected = _brute_discards(bytearray(vector))
+        got = sorted((o.tile_id, o.shanten, o.accept_ids) for o in logic.analyze_discards_counts(vector))
+        if expected != got:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f'  不一致: {sorted(hand)}')
+    if mismatches:
+        print(f'[discards] {mismatches}/{len(hands)} 手结果不一致')
+        return 1
+
+    t0 = time.perf_counter()
+    for vector in vectors:
+        logic.analyze_discards_counts(vector)
+    t_one = time.perf_counter() - t0
+
+    # 参照：每种出牌各算一次向听（没有进张信息时 AI 的做法），与机器快慢无关
+    t0 = time.perf_counter()
+    for vector in vectors:
+        work = bytearray(vector)
+        for x in range(34):
+            if work[x]:
+                work[x] -= 1
+                logic.calculate_shanten_counts(work)
+                work[x] += 1
+    t_ref = time.perf_counter() - t0
+    ratio = t_one / t_ref
+
+    print(f'[discards] {len(hands)} 手全部一致')
+    print(f'  analyze_discards: {t_one:.3f}s  {_rate(len(hands), t_one)}')
+    print(f'  逐张算向听:       {t_ref:.3f}s  {_rate(len(hands), t_ref)}  比值 {ratio:.1f}')
+    if ratio > DISCARDS_MAX_RATIO:
+        print(f'[discards] 进张分析耗时是逐张算向听的 {ratio:.1f} 倍，超过上限 {DISCARDS_MAX_RATIO}')
+        return 1
+    return 0
+
+
+def _list_wall_game(tiles: list[str], plan: list[bool]) -> list[str]:
+    """旧实现：字符串列表牌山，发 53 张后按 plan 从前端 / 尾端 pop"""
+    drawn = [tiles.pop(0) for _ in range(53)]
+    for from_end in plan:
+        if not tiles:
+            break
+        drawn.append(tiles.pop(-1 if from_end else 0))
+    return drawn
+
+
+def _wall_game(wall: Wall, plan: list[bool]) -> list[str]:
+    drawn = wall.draw_many(53)
+    for from_end in plan:
+        if not wall:
+            break
+        drawn.append(wall.draw_rinshan() if from_end else wall.draw())
+    return drawn
+
+
+def bench_wall(args: argparse.Namespace) -> int:
+    """牌山：同一种子得到与 random.Random(seed).shuffle 相同的牌山，摸牌顺序与旧的 list.pop(0) / pop(-1) 完全一致"""
+    rng = random.Random(args.seed)
+    games = args.n // 20 or 1
+    seeds = [rng.getrandbits(63) for _ in range(games)]
+    plans = [[rng.random() < 0.05 for _ in range(90)] for _ in range(games)]
+
+    wall = Wall()
+    mismatches = 0
+    for seed, plan in zip(seeds, plans):
+        wall.shuffle(seed)
+        reference = wall.remaining()
+        ids = [i for i in range(len(ALL_TILES)) for _ in range(4)]   # ALL_TILES 即牌 ID 顺序
+        random.Random(seed).shuffle(ids)
+        if Wall(seed).remaining() != reference or [ALL_TILES[i] for i in ids] != reference:
+            mismatches += 1
+            continue
+        if _wall_game(wall, plan) != _list_wall_game(list(reference), plan):
+            mismatches += 1
+    # 岭上区：摸岭上牌后岭上区张数不变，活牌山减一
+    dead = Wall(seeds[0], dead_size=14)
+    for _ in range(4):
+        before = len(dead)
+        dead.draw_rinshan()
+        if dead.dead_count != 14 or len(dead) != before - 1:
+            mismatches += 1
+    if mismatches:
+        print(f'[wall] {mismatches}/{games} 局结果不一致')
+        return 1
+
+    full = sorted(ALL_TILES * 4)
+    t0 = time.perf_counter()
+    for seed, plan in zip(seeds, plans):
+        tiles = list(full)
+        random.Random(seed).shuffle(tiles)
+        _list_wall_game(tiles, plan)
+    t_list = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for seed, plan in zip(seeds, plans):
+        wall.shuffle(seed)
+        _wall_game(wall, plan)
+    t_wall = time.perf_counter() - t0
+
+    print(f'[wall] {games} 局全部一致（计时含洗牌）')
+    print(f'  list pop: {t_list:.3f}s  {_rate(games, t_list)}')
+    print(f'  Wall:     {t_wall:.3f}s  {_rate(games, t_wall)}')
+    return 0
+
+
+def _display_reference(tiles: list[str]) -> list[str]:
+    """旧实现：按 (花色, 数字) 元组排序后逐张查 UNICODE_MAP"""
+    return [UNICODE_MAP.get(t, t) for t in sorted(tiles, key=tile_sort_key)]
+
+
+def bench_display(args: argparse.Namespace) -> int:
+    """显示转换：查表排序与旧的元组键排序结果一致；TileList 未修改时直接复用"""
+    hands = random_hands(args.n, args.seed, sizes=(1, 5, 8, 13, 14, 20))
+    mismatches = [
+        h for h in hands
+        if to_display(h) != _display_reference(h) or TileList(h).display() != to_display(h)
+    ]
+    for h in mismatches[:10]:
+        print(f'  不一致: {h}')
+    if mismatches:
+        print(f'[display] {len(mismatches)}/{len(hands)} 手结果不一致')
+        return 1
+
+    # 模拟一局中的广播：每手牌被 4 个接收者各读一次
+    t0 = time.perf_counter()
+    for h in hands:
+        for _ in range(4):
+            _display_reference(h)
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for h in hands:
+        for _ in range(4):
+            to_display(h)
+    t_new = time.perf_counter() - t0
+
+    lists = [TileList(h) for h in hands]
+    t0 = time.perf_counter()
+    for h in lists:
+        for _ in range(4):
+            h.display()
+    t_cached = time.perf_counter() - t0
+
+    reads = len(hands) * 4
+    print(f'[display] {len(hands)} 手全部一致（每手读取 4 次）')
+    print(f'  tuple key:  {t_ref:.3f}s  {_rate(reads, t_ref)}')
+    print(f'  id rank:    {t_new:.3f}s  {_rate(reads, t_new)}  (x{t_ref / t_new:.1f})')
+    print(f'  TileList:   {t_cached:.3f}s  {_rate(reads, t_cached)}  (x{t_ref / t_cached:.1f})')
+    return 0
+
+
+def _respond_reference(counts: bytearray, tile_id: int) -> tuple[bool, bool, bool]:
+    """旧实现：每个对手都完整算一次听牌，再查碰 / 杠"""
+    return tile_id in logic.get_winning_ids(counts), counts[tile_id] >= 2, counts[tile_id] == 3
+
+
+def bench_respond(args: argparse.Namespace) -> int:
+    """响应检测：位掩码预筛 + 仅听牌者算进张，结果与逐项检查一致"""
+    rng = random.Random(args.seed)
+    # 配牌分布（random_hands 的密集复合形几乎都听牌，不代表实战）
+    hands = [Wall(rng.getrandbits(63)).draw_many(13) for _ in range(args.n)]
+    # 对手的手牌在其余三家各打一张的期间不变
+    discards = [[rng.choice(ALL_TILES) for _ in range(3)] for _ in hands]
+
+    def indexed(a: HandAnalysis, tile: str) -> tuple[bool, bool, bool]:
+        if not a.response_mask >> TILE_IDS[tile] & 1:
+            return False, False, False
+        return a.can_win_with(tile), a.can_peng(tile), a.can_gang(tile)
+
+    # 一致性另用密集复合形（大多听牌），覆盖荣和分支与所有打出的牌
+    dense = random_hands(args.n, args.seed, sizes=(1, 4, 7, 10, 13))
+    mismatches = 0
+    for h in hands + dense:
+        a = HandAnalysis(h)
+        if any(indexed(a, t) != _respond_reference(a.counts, TILE_IDS[t]) for t in ALL_TILES):
+            mismatches += 1
+    if mismatches:
+        print(f'[respond] {mismatches}/{len(hands) + len(dense)} 手结果不一致')
+        return 1
+
+    # 服务器中向听数已在状态广播时算好，这里预先填充，只计响应检测本身
+    analyses = [HandAnalysis(h) for h in hands]
+    for a in analyses:
+        a.shanten
+    checks = len(hands) * 3
+    t0 = time.perf_counter()
+    for a, tiles in zip(analyses, discards):
+        for t in tiles:
+            _respond_reference(a.counts, TILE_IDS[t])
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for a, tiles in zip(analyses, discards):
+        for t in tiles:
+            indexed(a, t)
+    t_new = time.perf_counter() - t0
+
+    tenpai = sum(1 for a in analyses if a.waits)
+    print(f'[respond] {checks} 次检测全部一致（听牌 {tenpai}/{len(hands)} 手）')
+    print(f'  full check: {t_ref:.3f}s  {_rate(checks, t_ref)}')
+    print(f'  indexed:    {t_new:.3f}s  {_rate(checks, t_new)}  (x{t_ref / t_new:.1f})')
+    return 0
+
+
+def bench_timers(args: argparse.Namespace) -> int:
+    """时间轮：随机调度 / 取消与到期时间逐一对照，整局结果与虚拟时钟直接调度一致，再比较调度 + 取消的吞吐"""
+    rng = random.Random(args.seed)
+    tick = 0.05
+    clock = VirtualClock()
+    wheel = TimerWheel(tick=tick, slots=64, driver=clock, clock=lambda: clock.now)
+    fired: dict[int, float] = {}
+    expected: dict[int, float] = {}
+    handles = []
+
+    def fire(key: int) -> None:
+        fired[key] = clock.now
+
+    for i in range(args.n):
+        # 穿插推进时间，使调度发生在 tick 之间的任意时刻；含超过一圈（64 * 0.05 = 3.2s）的定时器
+        if rng.random() < 0.3:
+            clock.advance(rng.random() * 0.2)
+        delay = rng.choice((0.0, rng.random() * 0.5, rng.random() * 20))
+        handles.append(wheel.spawn_after(delay, fire, i))
+        expected[i] = clock.now + delay
+        if rng.random() < 0.3:
+            j = rng.randrange(i + 1)
+            handles[j].cancel()
+            if j not in fired:
+                expected.pop(j, None)
+    clock.run()
+    late = [k for k, due in expected.items() if not due - 1e-9 <= fired.get(k, -1.0) <= due + tick + 1e-9]
+    extra = [k for k in fired if k not in expected]
+    if late or extra or wheel.live:
+        print(f'[timers] {len(late)} 个未按时执行，{len(extra)} 个取消后仍执行，剩余 {wheel.live}')
+        return 1
+
+    # 整局对照：同一批种子分别用虚拟时钟、时间轮（由同一虚拟时钟驱动）调度
+    hands = max(args.n // 1000, 10)
+    plain, wheeled = HeadlessTable('plain'), HeadlessTable('wheel')
+    hand_wheel = TimerWheel(driver=wheeled.clock, clock=lambda: wheeled.clock.now)
+    wheeled.game.timers = TimerGroup(hand_wheel)
+    for _ in range(hands):
+        seed = rng.getrandbits(63)
+        a, b = plain.play_hand(seed), wheeled.play_hand(seed)
+        if (a.winner, a.hu_type, a.score_delta) != (b.winner, b.hu_type, b.score_delta) or hand_wheel.live:
+            print(f'[timers] 种子 {seed} 的对局结果不一致（剩余定时器 {hand_wheel.live}）')
+            return 1
+
+    def noop() -> None:
+        pass
+
+    n = args.n * 5
+    idle = VirtualClock()     # 驱动时钟不推进：只计调度与取消本身
+    wheel = TimerWheel(driver=idle, clock=lambda: idle.now)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        wheel.spawn_after(15.0, noop).cancel()
+    t_wheel = time.perf_counter() - t0
+
+    print(f'[timers] {args.n} 个定时器按时执行，{hands} 局结果与直接调度一致')
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            import eventlet
+    except ImportError:
+        print(f'  wheel:    {t_wheel:.3f}s  {_rate(n, t_wheel, "次")}  （调度 + 取消）')
+        return 0
+    t0 = time.perf_counter()
+    for _ in range(n):
+        eventlet.spawn_after(15.0, noop).cancel()
+    t_ev = time.perf_counter() - t0
+    print(f'  eventlet: {t_ev:.3f}s  {_rate(n, t_ev, "次")}  （调度 + 取消，每个定时器一个 greenlet）')
+    print(f'  wheel:    {t_wheel:.3f}s  {_rate(n, t_wheel, "次")}  (x{t_ev / t_wheel:.1f})')
+    return 0
+
+
+class _HeldPool:
+    """计算池替身：扣住第一个决策结果（模拟超出局面的慢结果），其余决策立即交回"""
+
+    def __init__(self) -> None:
+        self.held: tuple | None = None
+
+    def decide(self, scheduler, fn, args, fallback, apply) -> None:
+        if self.held is None:
+            self.held = (apply, fn(*args))
+        else:
+            scheduler.spawn_after(0, apply, fn(*args))
+
+    def release(self) -> None:
+        apply, result = self.held
+        apply(result)
+
+
+def bench_pool(args: argparse.Namespace) -> int:
+    """计算池结果作废：托管座位提交决策后重连出牌、牌局继续，旧结果交回后再次断线，牌局须照常打完"""
+    rng = random.Random(args.seed)
+    games = max(args.n // 1000, 5)
+    for _ in range(games):
+        seed = rng.getrandbits(63)
+        table = HeadlessTable()
+        game, clock = table.game, table.clock
+        pool = game.ai_pool = _HeldPool()
+        online: dict[int, str] = {}
+        game.set_player_resolver(online.get, lambda pid: f'AI{pid}')
+        pid = game.player_ids[game.dealer_idx]
+
+        game.start_game(seed)
+        clock.run(until=lambda: pool.held is not None, limit=100)
+        online[pid] = 'sid'                               # 重连：本人出牌
+        if game.current_pid != pid or not game.handle_discard(pid, game.hands[pid][-1])[0]:
+            print(f'[pool] 种子 {seed}: 未能重现（庄家不在出牌阶段）')
+            return 1
+        wall = len(game.wall)
+        clock.run(until=lambda: len(game.wall) != wall or game.phase == 'ended', limit=1000)
+        pool.release()                                    # 旧结果交回：局面已变，作废
+        del online[pid]                                   # 再次断线
+        game.trigger_ai_if_needed()
+        clock.run(until=lambda: game.phase == 'ended', limit=10_000)
+        if game.phase != 'ended':
+            print(f'[pool] 种子 {seed}: 作废结果后牌局卡在 {game.phase}（座位 {game.current_pid}，'
+                  f'计算中 {sorted(game._ai_thinking)}）')
+            return 1
+    print(f'[pool] {games} 局：作废的计算池结果不影响之后的托管')
+    return 0
+
+
+def bench_pacing(args: argparse.Namespace) -> int:
+    """托管节奏：一家在线、其余托管时，待响应者全为托管座位的响应不等待（虚拟时间不前进）"""
+    rng = random.Random(args.seed)
+    games = max(args.n // 1000, 5)
+    waits = 0
+    for _ in range(games):
+        seed = rng.getrandbits(63)
+        table = HeadlessTable()
+        game, clock = table.game, table.clock
+        human = game.player_ids[0]
+        game.set_player_resolver({human: 'sid'}.get, lambda pid: f'P{pid}')
+
+        game.start_game(seed)
+        since = None                  # 进入「只等托管座位」响应的虚拟时间
+        for _ in range(10_000):
+            if game.phase == 'ended':
+                break
+            if game.phase == 'discard_wait' and game.current_pid == human:
+                game.handle_discard(human, game.hands[human][-1])      # 在线玩家立即出牌
+                continue
+            if game.phase == 'action_wait' and human in game.action_pending:
+                game.handle_action(human, 'pass')                      # 在线玩家立即过
+                continue
+            if game.phase == 'action_wait':
+                if since is None:
+                    since = clock.now
+            elif since is not None:
+                if clock.now != since:
+                    print(f'[pacing] 种子 {seed}: 在线玩家不在待响应者中，托管响应仍等待了 {clock.now - since:.2f}s')
+                    return 1
+                waits += 1
+                since = None
+            clock.run(limit=1)
+        if game.phase != 'ended':
+            print(f'[pacing] 种子 {seed}: 牌局卡在 {game.phase}')
+            return 1
+    if not waits:
+        print('[pacing] 未出现只等托管座位响应的情形')
+        return 1
+    print(f'[pacing] {games} 局 {waits} 次只等托管座位的响应均立即结算（另一家在线）')
+    return 0
+
+
+def _seat_connected(data: dict, pid: int) -> bool | None:
+    """完整 game_state 中某座位的 connected 标志（不在 others 中时为 None）"""
+    return next((p['connected'] for p in data.get('others', ()) if p['pid'] == pid), None)
+
+
+def bench_resume(args: argparse.Namespace) -> int:
+    """
+    断线重连：四家在线（一家中途断线后重连），另有一名观战者。
+    重连者依次收到错过的事件（与事件日志一致）、完整状态、仍待处理的提示；
+    其余三家与观战频道收到该座位恢复在线的状态。
+    """
+    rng = random.Random(args.seed)
+    games = max(args.n // 1000, 5)
+    resumed = prompts = 0
+    for _ in range(games):
+        seed = rng.getrandbits(63)
+        transport = MemoryTransport()
+        table = HeadlessTable(transport=transport)
+        game, clock = table.game, table.clock
+        sids = {pid: f's{pid}' for pid in game.player_ids}
+        sids[99] = 'v99'
+        game.set_player_resolver(sids.get, lambda pid: f'P{pid}', None, lambda room_id: {99})
+        others = [sids[p] for p in game.player_ids[1:3] + game.player_ids[:1]]
+        pid = game.player_ids[3]
+        drop_at, back_at = rng.randrange(5, 60), rng.randrange(5, 60)
+
+        game.start_game(seed)
+        last_seq, steps, offline = 0, 0, None
+        while game.phase != 'ended' and steps < 10_000:
+            steps += 1
+            if offline is None and steps == drop_at:
+                last_seq = max((d['seq'] for e, r, d in transport.events
+                                if r in (sids[pid], game.room_id) and 'seq' in d), default=0)
+                sids[pid] = None                                   # 断线：AI 托管
+                game.trigger_ai_if_needed()
+                offline = steps
+                continue
+            if offline is not None and steps == offline + back_at:
+                break
+            # 在线座位立即操作（自摸则和、否则打最后摸的牌；有响应选项一律过）
+            online = [p for p in game.player_ids if sids[p]]
+            current = game.current_pid
+            if game.phase == 'discard_wait' and current in online and current in game.action_pending:
+                game.handle_zimo(current)
+            elif game.phase == 'discard_wait' and current in online:
+                game.handle_discard(current, game.hands[current][-1])
+            elif game.phase == 'action_wait' and any(p in online for p in game.action_pending):
+                game.handle_action(next(p for p in game.action_pending if p in online), 'pass')
+            else:
+                clock.run(limit=1)
+        if offline is None or game.phase == 'ended':
+            continue
+        # 前提：断线期间的状态已让其余三家看到该座位离线
+        before = [[d for e, r, d in transport.events if r == room and e == 'game_state'] for room in others]
+        if not all(seen and _seat_connected(seen[-1], pid) is False for seen in before):
+            continue
+
+        transport.clear()
+        sids[pid] = 's3b'                                          # 重连
+        logged = game._event_logs[pid].since(last_seq)
+        game.resume(pid, last_seq)
+        mine = [(e, d) for e, r, d in transport.events if r == 's3b']
+        states = [i for i, (e, _) in enumerate(mine) if e == 'game_state']
+        expected_prompts = (pid in game.action_pending) + (game.phase == 'discard_wait' and game.current_pid == pid)
+        if len(states) != 1 or mine[:states[0]] != logged or len(mine) - states[0] - 1 != expected_prompts:
+            print(f'[resume] 种子 {seed}: 重连者收到的事件不符 {[e for e, _ in mine]}')
+            return 1
+        for room in others + [game.spectator_channel]:
+            seen = [d for e, r, d in transport.events if r == room and e == 'game_state']
+            if not seen or _seat_connected(seen[-1], pid) is not True:
+                print(f'[resume] 种子 {seed}: {room} 未看到座位 {pid} 恢复在线')
+                return 1
+        resumed += 1
+        prompts += expected_prompts
+    if not resumed:
+        print('[resume] 没有发生重连')
+        return 1
+    print(f'[resume] {resumed}/{games} 局重连：补发与日志一致，其余三家与观战者看到恢复在线（补发提示 {prompts} 次）')
+    return 0
+
+
+BENCHMARKS = {
+    'shanten': bench_shanten,
+    'agari': bench_agari,
+    'waits': bench_waits,
+    'discards': bench_discards,
+    'cache': bench_cache,
+    'batch': bench_batch,
+    'scorer': bench_scorer,
+    'best': bench_best,
+    'wall': bench_wall,
+    'display': bench_display,
+    'respond': bench_respond,
+    'timers': bench_timers,
+    'pool': bench_pool,
+    'pacing': bench_pacing,
+    'resume': bench_resume,
+}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='麻将算法基准与一致性校验')
+    parser.add_argument('target', choices=sorted(BENCHMARKS), help='要测试的模块')
+    parser.add_argument('-n', type=int, default=20000, help='随机手牌数量')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子')
+    args = parser.parse_args(argv)
+    if args.target != 'cache':
+        logic.configure_cache(0)
+    return BENCHMARKS[args.target](args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
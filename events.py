@@ -16,6 +16,7 @@ from __future__ import annotations
 from flask import request
 from flask_socketio import SocketIO, emit, join_room, leave_room
 
+from game import MAX_SPECTATOR_DELAY, Pacing, spectator_channel
 from room_manager import room_manager
 
 
@@ -34,6 +35,16 @@ def register_events(socketio: SocketIO) -> None:
         sid = request.sid
         raw_pid = request.args.get('player_id')
         username = (request.args.get('username', '') or '').strip() or None
+        # 客户端能力（旧客户端不带这些参数）：
+        #   sync=delta    支持 game_state_patch 增量同步
+        #   enc=compact   支持 msgpack 紧凑编码（见 wire.py）
+        #   batch=1       每个动作的事件合并为一帧 batch
+        # 重连时另带 seq（已收到的最大事件序号），只补发错过的事件
+        room_manager.set_client_options(sid, {
+            'sync': request.args.get('sync', ''),
+            'enc': request.args.get('enc', ''),
+            'batch': request.args.get('batch', ''),
+        })
 
         # 尝试重连
         if raw_pid:
@@ -48,6 +59,8 @@ def register_events(socketio: SocketIO) -> None:
                             # 判断是观战者还是玩家
                             is_spec = room_manager.is_spectator(pid, room_id)
                             join_room(room_id)
+                            if is_spec:
+                                join_room(game.spectator_channel)
                             emit('player_info', {
                                 'player_id': pid,
                                 'username': room_manager.get_username(pid),
@@ -58,7 +71,8 @@ def register_events(socketio: SocketIO) -> None:
                             if is_spec:
                                 game.broadcast_state_to_spectators([pid])
                             else:
-                                game.broadcast_state()
+                                # 错过的事件只补发给重连的玩家；状态照常广播，其他人看到其恢复在线
+                                game.resume(pid, request.args.get('seq', type=int))
                             socketio.emit('message', {
                                 'text': f"{room_manager.get_username(pid)} 重新连接",
                                 'type': 'info',
@@ -105,6 +119,9 @@ def register_events(socketio: SocketIO) -> None:
         # 如果是观战者，直接移除
         if room_id and room_manager.is_spectator(pid, room_id):
             room_manager.remove_spectator(room_id, pid)
+            game = room_manager.get_game(room_id)
+            if game:
+                game.remove_spectator(pid)
             room_manager.delete_player(pid)
             socketio.emit('message', {
                 'text': f'旁观者 {uname} 离开了',
@@ -136,8 +153,7 @@ def register_events(socketio: SocketIO) -> None:
                 room_manager.remove_game(room_id)
         elif game.phase in ('discard_wait', 'action_wait'):
             # 游戏进行中，AI 托管
-            spectator_pids = list(room_manager.get_spectators(room_id))
-            game.trigger_ai_if_needed(spectator_pids)
+            game.trigger_ai_if_needed()
 
         _broadcast_room_list(socketio)
 
@@ -161,7 +177,14 @@ def register_events(socketio: SocketIO) -> None:
             return
 
         room_name = (data.get('room_name', '') or '').strip() or '新房间'
-        game = room_manager.make_room(socketio, room_name=room_name, owner_pid=pid)
+        pacing = Pacing.from_dict(data['pacing']) if 'pacing' in data else None
+        try:
+            spectator_delay = min(max(float(data.get('spectator_delay', 0) or 0), 0.0), MAX_SPECTATOR_DELAY)
+        except (TypeError, ValueError):
+            spectator_delay = 0.0
+        game = room_manager.make_room(
+            socketio, room_name=room_name, owner_pid=pid, pacing=pacing, spectator_delay=spectator_delay,
+        )
         game.add_player(pid)
         room_manager.set_room(pid, game.room_id)
         leave_room('lobby')
@@ -245,8 +268,12 @@ def register_events(socketio: SocketIO) -> None:
         # 如果是观战者
         if room_manager.is_spectator(pid, room_id):
             room_manager.remove_spectator(room_id, pid)
+            game = room_manager.get_game(room_id)
+            if game:
+                game.remove_spectator(pid)
             room_manager.set_room(pid, None)
             leave_room(room_id)
+            leave_room(spectator_channel(room_id))
             join_room('lobby')
             uname = room_manager.get_username(pid)
             socketio.emit('message', {
@@ -311,11 +338,7 @@ def register_events(socketio: SocketIO) -> None:
             'text': '四人已到齐！游戏开始！',
             'type': 'system',
         }, room=room_id)
-        game.start_game()
-
-        # 游戏开始后向观战者广播
-        spectator_pids = list(room_manager.get_spectators(room_id))
-        game.broadcast_state_to_spectators(spectator_pids)
+        game.start_game()   # 状态经 broadcast_state 同时发往观战频道
 
         _broadcast_room_list(socketio)
 
@@ -341,6 +364,7 @@ def register_events(socketio: SocketIO) -> None:
         room_manager.add_spectator(room_id, pid)
         leave_room('lobby')
         join_room(room_id)
+        join_room(game.spectator_channel)   # 状态更新经观战频道，每个版本只发送一次
 
         uname = room_manager.get_username(pid)
         socketio.emit('message', {
@@ -391,13 +415,10 @@ def register_events(socketio: SocketIO) -> None:
         pid, game = _resolve(request.sid)
         if game is None:
             return
+        # handle_* 自身即一个发件箱批次：每个接收者只收到一次状态，观战频道每个版本发送一次
         ok, msg = game.handle_discard(pid, data.get('tile_code', ''))
         if not ok:
             emit('error', {'message': msg})
-        else:
-            # 出牌后广播给观战者
-            spectator_pids = list(room_manager.get_spectators(game.room_id))
-            game.broadcast_state_to_spectators(spectator_pids)
 
     # ── 碰/杠/胡/过 ────────────────────────────────────────────────
     @socketio.on('player_action')
@@ -408,9 +429,6 @@ def register_events(socketio: SocketIO) -> None:
         ok, msg = game.handle_action(pid, data.get('action', ''))
         if not ok:
             emit('error', {'message': msg})
-        else:
-            spectator_pids = list(room_manager.get_spectators(game.room_id))
-            game.broadcast_state_to_spectators(spectator_pids)
 
     # ── 暗杠 ───────────────────────────────────────────────────────
     @socketio.on('angang')
@@ -421,9 +439,6 @@ def register_events(socketio: SocketIO) -> None:
         ok, msg = game.handle_angang(pid, data.get('tile_code', ''))
         if not ok:
             emit('error', {'message': msg})
-        else:
-            spectator_pids = list(room_manager.get_spectators(game.room_id))
-            game.broadcast_state_to_spectators(spectator_pids)
 
     # ── 补杠 ───────────────────────────────────────────────────────
     @socketio.on('bugang')
@@ -434,9 +449,6 @@ def register_events(socketio: SocketIO) -> None:
         ok, msg = game.handle_bugang(pid, data.get('tile_code', ''))
         if not ok:
             emit('error', {'message': msg})
-        else:
-            spectator_pids = list(room_manager.get_spectators(game.room_id))
-            game.broadcast_state_to_spectators(spectator_pids)
 
     # ── 自摸 ───────────────────────────────────────────────────────
     @socketio.on('zimo')
@@ -447,9 +459,14 @@ def register_events(socketio: SocketIO) -> None:
         ok, msg = game.handle_zimo(pid)
         if not ok:
             emit('error', {'message': msg})
-        else:
-            spectator_pids = list(room_manager.get_spectators(game.room_id))
-            game.broadcast_state_to_spectators(spectator_pids)
+
+    # ── 请求完整状态（增量同步发现版本缺口时） ─────────────────────
+    @socketio.on('request_full_state')
+    def on_request_full_state() -> None:
+        pid, game = _resolve(request.sid)
+        if game is None:
+            return
+        game.send_full_state(pid, spectator=room_manager.is_spectator(pid, game.room_id))
 
     # ── 再来一局 ───────────────────────────────────────────────────
     @socketio.on('request_new_game')
@@ -461,9 +478,6 @@ def register_events(socketio: SocketIO) -> None:
         game.start_game()
         socketio.emit('message', {'text': '新一局开始！', 'type': 'system'}, room=game.room_id)
 
-        spectator_pids = list(room_manager.get_spectators(game.room_id))
-        game.broadcast_state_to_spectators(spectator_pids)
-
         _broadcast_room_list(socketio)
 
 
@@ -4,42 +4,55 @@ game.py — 麻将游戏状态机（MahjongGame）
 职责：
   - 管理单局游戏的完整状态（手牌、弃牌、副露、牌山、轮次、积分）
   - 处理出牌、碰/杠/胡、暗杠、补杠、自摸等动作
-  - 向房间广播游戏状态（通过注入的 SocketIO 实例）
-  - 不直接依赖 Flask request 对象
+  - 向房间广播游戏状态（通过注入的传输层，服务器中为 SocketIO 实例）；
+    公开部分每次状态变化只构建一次（_PublicSnapshot），各接收者只补私有部分
+  - 声明了增量同步（sync=delta）的客户端只收到变化的字段（game_state_patch），
+    旧客户端仍收到完整 game_state
+  - 声明了紧凑编码（enc=compact）的连接，单独发送的事件以 msgpack 编码（见 wire.py）
+  - 每个动作期间的事件先进发件箱：同一接收者的多次 game_state 合并为一次，
+    声明了 batch=1 的连接每个动作只收到一帧 batch（其余连接逐条收到）
+  - 观战者加入 room_id:spectators 频道：观战视角每个状态版本只构建、发送一次（可设延迟）
+  - 发给玩家的事件带房间内递增的 seq，并记入每个玩家的环形事件日志：
+    重连时只向该玩家补发错过的事件和一份当前状态（resume）
+  - 不直接依赖 Flask request 对象；定时器经注入的调度器创建（默认 eventlet），
+    配合 transport.py 的内存传输层与虚拟时钟可在服务器之外全速运行（见 headless.py）；
+    服务器中所有房间共用一个时间轮，每个房间的定时器按局作废（TimerGroup）
 
 依赖：
   - tiles.py  （牌面操作）
   - logic.py  （胡牌/向听/进张算法）
+  - hand_analysis.py （每个座位的手牌分析缓存）
+  - transport.py （传输层 / 调度器接口）
+  - ai_pool.py （托管出牌的计算池，可选）
 """
 
 from __future__ import annotations
 
+import json
 import os
-from collections import Counter
-from typing import TYPE_CHECKING
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
 
-import eventlet
+import wire
 
 from tiles import (
+    TILE_IDS,
     UNICODE_MAP,
-    make_wall,
-    sort_tiles,
+    TileList,
+    Wall,
     tile_sort_key,
-    to_display,
-    to_unicode,
     tile_to_unicode,
     is_valid_tile,
 )
-from logic import is_winning_hand, calculate_shanten, get_winning_tiles
+from hand_analysis import HandAnalysis
 from scorer import evaluate_hand
 from replay import ReplayRecorder
-from ai_player import (
-    ai_choose_discard,
-    ai_should_action,
-    ai_should_zimo,
-    ai_choose_angang,
-    ai_choose_bugang,
-)
+from transport import EventletScheduler, Scheduler, TimerGroup, Transport
+from ai_player import DEFAULT_STRATEGY, AIStrategy
+from ai_pool import AIPool
 
 if TYPE_CHECKING:
     from flask_socketio import SocketIO
@@ -47,11 +60,195 @@ if TYPE_CHECKING:
 # 座位方位名
 SEAT_NAMES: list[str] = ['东', '南', '西', '北']
 
+# 对他人隐藏的暗杠显示（各接收者共享，不得修改）
+_HIDDEN_ANGANG: list[str] = ['🀫', '🀫', '🀫', '🀫']
+
+_MISSING = object()
+
 # 积分规则（番数）
 SCORE_BASE       = 1000  # 基础底分（庄家/非庄家系数乘以此值）
 SCORE_ZIMO_MULTI = 2     # 自摸时每人付双倍
 
 
+@dataclass
+class _PublicSnapshot:
+    """
+    一个状态版本的公开信息：所有接收者看到的内容相同，只构建一次。
+    common / players 中的对象在接收者之间共享，不得修改。
+    """
+    version: int                  # 构建时的状态版本号
+    connected: tuple[bool, ...]   # 构建时各玩家的在线状态（在线状态由外部决定，变化也需重建）
+    common: dict                  # 顶层公开字段（阶段、牌山剩余、轮次、庄家、最后弃牌）
+    players: list[dict]           # 按座位顺序的公开玩家信息（手牌张数、弃牌、副露、积分）
+
+
+@dataclass
+class OutboxStats:
+    """发件箱计数（按动作累计；frames / bytes 以单个接收者计）"""
+    actions: int = 0          # 刷新过的动作数
+    events: int = 0           # 进入发件箱的事件数（含被合并的 game_state）
+    coalesced: int = 0        # 被合并掉的 game_state 数
+    frames: int = 0           # 实际发出的帧数
+    bytes: int = 0            # 实际发出的负载字节数
+    by_event: dict[str, int] = field(default_factory=dict)   # 事件名 -> 发出次数
+
+    def merge(self, other: 'OutboxStats') -> None:
+        self.actions += other.actions
+        self.events += other.events
+        self.coalesced += other.coalesced
+        self.frames += other.frames
+        self.bytes += other.bytes
+        for name, n in other.by_event.items():
+            self.by_event[name] = self.by_event.get(name, 0) + n
+
+    def as_dict(self) -> dict:
+        per = max(self.actions, 1)
+        return {
+            'actions': self.actions,
+            'events': self.events,
+            'coalesced': self.coalesced,
+            'frames': self.frames,
+            'bytes': self.bytes,
+            'frames_per_action': self.frames / per,
+            'bytes_per_action': self.bytes / per,
+            'by_event': dict(self.by_event),
+        }
+
+
+class EventLog:
+    """
+    一个玩家最近收到的事件（环形缓冲，按房间事件序号索引），用于重连后补发。
+    序号在房间内递增、所有接收者共用，因此一个玩家日志中的序号不一定连续。
+    """
+
+    __slots__ = ('_entries', 'evicted')
+
+    def __init__(self, capacity: int) -> None:
+        self._entries: deque[tuple[int, str, Any]] = deque(maxlen=capacity)
+        self.evicted: int = 0        # 已被挤出缓冲区的最大序号
+
+    def append(self, seq: int, event: str, data: Any) -> None:
+        entries = self._entries
+        if len(entries) == entries.maxlen:
+            self.evicted = entries[0][0]
+        entries.append((seq, event, data))
+
+    def since(self, seq: int) -> list[tuple[str, Any]] | None:
+        """序号大于 seq 的事件；其中一部分已被挤出（缓冲区已绕过）时返回 None"""
+        if seq < self.evicted:
+            return None
+        return [(event, data) for s, event, data in self._entries if s > seq]
+
+
+@dataclass
+class Pacing:
+    """
+    房间的托管节奏（每个房间一份，创建房间时可调整）。
+
+    托管座位（断线 / AI）的动作在有真人在线时延迟 ai_delay 秒，便于真人看清；
+    fast_forward 时，没有在线玩家（全托管牌桌，观战者不计）则出牌不等待，
+    待响应者都不在线则碰/杠/胡/过不等待。
+    等待真人响应的超时随其连续超时次数减半（挂机的玩家不再每次拖满），
+    最短 min_action_timeout；待响应者全部托管时超时只作兜底。
+    """
+    ai_delay: float = 2.0
+    fast_forward: bool = True
+    action_timeout: float = 15.0
+    min_action_timeout: float = 3.0
+
+    @classmethod
+    def from_dict(cls, data: Any) -> 'Pacing':
+        """由客户端提交的设置构造（忽略未知字段，数值限制在合理范围内）"""
+        pacing = cls()
+        if not isinstance(data, dict):
+            return pacing
+        try:
+            if 'ai_delay' in data:
+                pacing.ai_delay = min(max(float(data['ai_delay']), 0.0), 5.0)
+            if 'fast_forward' in data:
+                pacing.fast_forward = bool(data['fast_forward'])
+            if 'action_timeout' in data:
+                pacing.action_timeout = min(max(float(data['action_timeout']), pacing.min_action_timeout), 60.0)
+        except (TypeError, ValueError):
+            return cls()
+        return pacing
+
+
+# 观战频道延迟的上限（秒）
+MAX_SPECTATOR_DELAY = 60.0
+
+
+def spectator_channel(room_id: str) -> str:
+    """房间的观战频道（socket 房间名）"""
+    return f'{room_id}:spectators'
+
+
+# 每个玩家事件日志的容量（约为两三圈的出牌与提示）
+EVENT_LOG_SIZE = 256
+# 不记入事件日志的事件：状态在补发时直接以当前快照代替
+_UNLOGGED_EVENTS = frozenset({'game_state', 'game_state_patch'})
+
+# 发件箱中 game_state 的占位事件名（刷新时才构建，每个接收者只保留最后一次）
+_STATE = object()
+
+
+def _payload_size(data: Any) -> int:
+    """负载字节数（二进制按长度，其余按紧凑 JSON 的 UTF-8 长度）"""
+    if isinstance(data, (bytes, bytearray)):
+        return len(data)
+    return len(json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode())
+
+
+def _batched(method):
+    """把方法的整个执行放进一个发件箱批次（嵌套时由最外层刷新）"""
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.batch():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def _state_patch(old: dict, new: dict) -> dict | None:
+    """
+    两个完整状态之间的补丁；无变化返回 None。
+
+    格式：{'base': 旧版本, 'version': 新版本,
+           'set': {顶层字段: 新值},
+           'others': {pid 字符串: {字段: 新值}}}
+    others 的玩家顺序变化时整个列表放进 set。
+    共享对象（快照、缓存的牌列表）先按 is 比较，未变化的部分不逐项比较。
+    """
+    changed = {}
+    for key, value in new.items():
+        if key in ('others', 'state_version'):
+            continue
+        before = old.get(key, _MISSING)
+        if value is not before and value != before:
+            changed[key] = value
+
+    others = {}
+    old_others, new_others = old['others'], new['others']
+    if old_others is not new_others:
+        if [o['pid'] for o in old_others] != [o['pid'] for o in new_others]:
+            changed['others'] = new_others
+        else:
+            for before, after in zip(old_others, new_others):
+                if before is after:
+                    continue
+                diff = {k: v for k, v in after.items() if v is not before[k] and v != before[k]}
+                if diff:
+                    others[str(after['pid'])] = diff
+
+    if not changed and not others:
+        return None
+    return {
+        'base': old['state_version'],
+        'version': new['state_version'],
+        'set': changed,
+        'others': others,
+    }
+
+
 class MahjongGame:
     """
     代表一局正在进行的麻将游戏。
@@ -65,18 +262,30 @@ class MahjongGame:
         ended         → discard_wait（新一局 start_game）
     """
 
-    def __init__(self, room_id: str, socketio: 'SocketIO') -> None:
+    def __init__(
+        self,
+        room_id: str,
+        socketio: 'SocketIO | Transport',
+        scheduler: Scheduler | None = None,
+        save_replays: bool = True,
+    ) -> None:
         self.room_id = room_id
-        self._sio = socketio            # 注入的 SocketIO 实例
+        self._sio = socketio            # 注入的传输层（SocketIO 实例或 transport.py 中的实现）
+        self._scheduler: Scheduler = scheduler or EventletScheduler()
+        # 本房间的超时与 AI 托管定时器（按局作废；计算池的结果轮询直接用 _scheduler）
+        self.timers = TimerGroup(self._scheduler)
+        self.save_replays = save_replays   # False 时不记录也不保存回放（无界面模拟）
 
         self.player_ids: list[int] = []
-        self.hands: dict[int, list[str]] = {}
-        self.discards: dict[int, list[str]] = {}
+        self.hands: dict[int, TileList] = {}
+        self.analysis: dict[int, HandAnalysis] = {}   # 与 hands 同步的手牌分析缓存
+        self.discards: dict[int, TileList] = {}
         self.melds: dict[int, list[dict]] = {}
         self.scores: dict[int, int] = {}    # 累计积分
         self.score_delta: dict[int, int] = {}  # 本局积分变动，用于结束时展示
 
-        self.wall: list[str] = []
+        # 牌山（每局按种子重新洗牌，复用同一缓冲区）；本规则不设岭上区，杠后补牌从活牌山尾部摸
+        self.wall = Wall()
         self.dealer_idx: int = 0
         self.turn_idx: int = 0
         self.last_discard: tuple[int, str] | None = None
@@ -86,29 +295,79 @@ class MahjongGame:
         self.action_timer = None
         self.winner: int | None = None
 
-        # AI 托管定时器
-        self._ai_timers: list = []  # 存储当前活跃的 AI 托管 eventlet.Timer
+        # 托管节奏与自适应超时：pid -> 连续响应超时次数
+        self.pacing = Pacing()
+        self._afk_strikes: dict[int, int] = {}
+        # 按座位替换的托管策略（未登记的座位用 DEFAULT_STRATEGY）
+        self.ai_strategies: dict[int, AIStrategy] = {}
+        # 托管出牌的计算池（由 room_manager 注入；None 时在当前线程同步计算）
+        self.ai_pool: AIPool | None = None
+        self._ai_thinking: set[int] = set()   # 出牌决策正在计算池中的座位
+        # 本局结果（结束时填写，新一局开始时清空）：
+        # winner / hu_type / from_pid / fan / score / yaku（番种名列表）；荒牌时 winner 为 None
+        self.result: dict | None = None
 
         # 外部注入：pid -> sid / username 的查询函数，由 room_manager 提供
         self._get_sid = lambda pid: None        # type: ignore
         self._get_username = lambda pid: f'玩家{pid}'  # type: ignore
+        self._get_client_option = lambda sid, key, default=None: default  # type: ignore
+        self._get_spectators = lambda room_id: ()  # type: ignore
 
         # 回放记录器
         self._replay: ReplayRecorder | None = None
 
+        # 公开状态快照：state_version 每次广播（状态变化）时递增
+        self.state_version: int = 0
+        self._snapshot: _PublicSnapshot | None = None
+        # 增量同步：pid -> (sid, 最近一次发给该连接的完整状态)
+        self._sent_state: dict[int, tuple[str, dict]] = {}
+        # 紧凑编码：sid -> 该连接本局已收到的玩家表（每局开始时清空）
+        self._wire_tables: dict[str, dict] = {}
+        # 观战频道：观战视角每个状态版本构建一次，向 spectator_channel 发送一次；
+        # spectator_delay > 0 时延迟发送（防止观战者实时报牌，只作用于状态视图）
+        self.spectator_channel = spectator_channel(room_id)
+        self.spectator_delay: float = 0.0
+        self._spectator_view: tuple[int, tuple[bool, ...], dict] | None = None
+        self._spectator_sent: dict | None = None      # 最近一次发往观战频道的视角
+        # 观战者 pid -> 单独发给他的最新状态版本（延迟到期的频道状态比它旧时不再发给他）
+        self._spectator_versions: dict[int, int] = {}
+        # 重连补发：发给玩家的事件带房间内递增的 seq，并记入各自的事件日志
+        self.event_seq: int = 0
+        self._event_logs: dict[int, EventLog] = {}
+        # 各座位最近一次的 action_option 内容（断线时未发出的也记下），重连时按 action_pending 补发
+        self._action_prompts: dict[int, dict] = {}
+
+        # 发件箱：动作期间为列表（事件暂存），否则为 None（直接发送）
+        self._outbox: list[tuple[Any, str, Any]] | None = None
+        self._outbox_depth: int = 0
+        self._flushing: bool = False
+        self.outbox_stats = OutboxStats()
+
     # ── 依赖注入 ──────────────────────────────────────────────────
-    def set_player_resolver(self, get_sid, get_username) -> None:
-        """注入 sid/username 查询函数，解除对全局变量的依赖"""
+    def set_player_resolver(
+        self,
+        get_sid,
+        get_username,
+        get_client_option=None,
+        get_spectators=None,
+    ) -> None:
+        """注入 sid/username/客户端能力/观战者 查询函数，解除对全局变量的依赖"""
         self._get_sid = get_sid
         self._get_username = get_username
+        if get_client_option is not None:
+            self._get_client_option = get_client_option
+        if get_spectators is not None:
+            self._get_spectators = get_spectators
 
     # ── 玩家管理 ──────────────────────────────────────────────────
     def add_player(self, pid: int) -> bool:
         if len(self.player_ids) < 4 and pid not in self.player_ids:
             self.player_ids.append(pid)
-            self.hands[pid] = []
-            self.discards[pid] = []
+            self.hands[pid] = TileList()
+            self.analysis[pid] = HandAnalysis()
+            self.discards[pid] = TileList()
             self.melds[pid] = []
+            self._event_logs[pid] = EventLog(EVENT_LOG_SIZE)
             if pid not in self.scores:
                 self.scores[pid] = 0
             return True
@@ -117,6 +376,14 @@ class MahjongGame:
     def remove_player(self, pid: int) -> None:
         if pid in self.player_ids:
             self.player_ids.remove(pid)
+        self._sent_state.pop(pid, None)
+        self._event_logs.pop(pid, None)
+        self._action_prompts.pop(pid, None)
+
+    def remove_spectator(self, pid: int) -> None:
+        """观战者离开：丢弃为其保存的增量基线与状态版本"""
+        self._sent_state.pop(pid, None)
+        self._spectator_versions.pop(pid, None)
 
     def seat_of(self, pid: int) -> int:
         try:
@@ -134,14 +401,27 @@ class MahjongGame:
             return None
         return self.player_ids[self.turn_idx % len(self.player_ids)]
 
+    # ── 手牌增减（同步分析缓存）──────────────────────────────────
+    def _hand_add(self, pid: int, tile: str) -> None:
+        self.hands[pid].append(tile)
+        self.analysis[pid].add(tile)
+
+    def _hand_remove(self, pid: int, tile: str, n: int = 1) -> None:
+        for _ in range(n):
+            self.hands[pid].remove(tile)
+        self.analysis[pid].remove(tile, n)
+
     # ── 游戏启动 ──────────────────────────────────────────────────
-    def start_game(self) -> None:
-        """初始化本局，发牌，进入出牌阶段"""
-        self.wall = make_wall()
+    @_batched
+    def start_game(self, seed: int | None = None) -> None:
+        """初始化本局，发牌，进入出牌阶段。seed 为牌山种子（None 时随机生成）"""
+        self.wall.shuffle(seed)
+        self._wire_tables = {}
         for i, pid in enumerate(self.player_ids):
             n = 14 if i == self.dealer_idx else 13
-            self.hands[pid] = [self.wall.pop(0) for _ in range(n)]
-            self.discards[pid] = []
+            self.hands[pid] = TileList(self.wall.draw_many(n))
+            self.analysis[pid] = HandAnalysis(self.hands[pid])
+            self.discards[pid] = TileList()
             self.melds[pid] = []
 
         self.turn_idx = self.dealer_idx
@@ -149,39 +429,43 @@ class MahjongGame:
         self.last_discard = None
         self.winner = None
         self.action_pending = {}
+        self._action_prompts = {}
         self.score_delta = {pid: 0 for pid in self.player_ids}
+        self.result = None
+        self._ai_thinking.clear()
+        self.cancel_timers()   # 上一局遗留的超时 / 托管回调作废
 
         # 初始化回放记录器
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        game_id = f'{self.room_id}_{timestamp}'
-        players_info = [
-            {'pid': p, 'username': self._get_username(p), 'seat': self.seat_name(p)}
-            for p in self.player_ids
-        ]
-        self._replay = ReplayRecorder(game_id, players_info)
-        # 记录初始手牌（发牌后的状态）和牌山
-        self._replay.set_initial_state(self.hands, self.wall)
+        if self.save_replays:
+            from datetime import datetime
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            game_id = f'{self.room_id}_{timestamp}'
+            players_info = [
+                {'pid': p, 'username': self._get_username(p), 'seat': self.seat_name(p)}
+                for p in self.player_ids
+            ]
+            self._replay = ReplayRecorder(game_id, players_info)
+            # 记录初始手牌（发牌后的状态）和牌山
+            self._replay.set_initial_state(self.hands, self.wall.remaining(), seed=self.wall.seed)
 
         # 庄家发14张后立即检查自摸（天胡）
         dealer_pid = self.player_ids[self.dealer_idx]
         self.broadcast_state()
-        if is_winning_hand(self.hands[dealer_pid]):
+        if self.analysis[dealer_pid].is_winning:
             # 天胡：直接给选项
-            sid = self._get_sid(dealer_pid)
-            if sid:
-                last = self.hands[dealer_pid][-1]
-                self._emit('action_option', {
-                    'options': {'hu': True},
-                    'tile': tile_to_unicode(last),
-                    'tile_code': last,
-                    'self_draw': True,
-                    'from': '天胡',
-                }, room=sid)
+            last = self.hands[dealer_pid][-1]
+            self._offer_action(dealer_pid, {
+                'options': {'hu': True},
+                'tile': tile_to_unicode(last),
+                'tile_code': last,
+                'self_draw': True,
+                'from': '天胡',
+            })
             self.action_pending[dealer_pid] = {'hu': True}
         self._emit_turn()
 
     # ── 出牌 ──────────────────────────────────────────────────────
+    @_batched
     def handle_discard(self, pid: int, tile: str) -> tuple[bool, str]:
         if self.phase == 'ended':
             return False, '游戏已结束'
@@ -194,7 +478,7 @@ class MahjongGame:
         if tile not in self.hands[pid]:
             return False, '你没有这张牌'
 
-        self.hands[pid].remove(tile)
+        self._hand_remove(pid, tile)
         self.discards[pid].append(tile)
         self.last_discard = (pid, tile)
 
@@ -219,6 +503,7 @@ class MahjongGame:
         return True, 'ok'
 
     # ── 碰/杠/胡响应 ───────────────────────────────────────────────
+    @_batched
     def handle_action(self, pid: int, action: str) -> tuple[bool, str]:
         if self.phase == 'ended':
             return False, '游戏已结束'
@@ -228,6 +513,8 @@ class MahjongGame:
             return False, '你没有可用操作'
 
         opts = self.action_pending.get(pid, {})
+        if not self.is_player_disconnected(pid):
+            self._afk_strikes.pop(pid, None)   # 本人操作，恢复完整超时
 
         if action == 'pass':
             del self.action_pending[pid]
@@ -255,6 +542,7 @@ class MahjongGame:
         return False, '操作无效'
 
     # ── 暗杠 ──────────────────────────────────────────────────────
+    @_batched
     def handle_angang(self, pid: int, tile: str) -> tuple[bool, str]:
         if self.phase == 'ended':
             return False, '游戏已结束'
@@ -265,9 +553,8 @@ class MahjongGame:
         if self.hands[pid].count(tile) < 4:
             return False, '没有4张相同的牌'
 
-        for _ in range(4):
-            self.hands[pid].remove(tile)
-        self.melds[pid].append({'type': 'angang', 'tiles': [tile] * 4})
+        self._hand_remove(pid, tile, 4)
+        self.melds[pid].append({'type': 'angang', 'tiles': TileList([tile] * 4)})
 
         # 回放记录
         if self._replay:
@@ -278,6 +565,7 @@ class MahjongGame:
         return True, 'ok'
 
     # ── 补杠 ──────────────────────────────────────────────────────
+    @_batched
     def handle_bugang(self, pid: int, tile: str) -> tuple[bool, str]:
         if self.phase == 'ended':
             return False, '游戏已结束'
@@ -293,7 +581,7 @@ class MahjongGame:
         if peng_meld is None or tile not in self.hands[pid]:
             return False, '没有可补杠的牌'
 
-        self.hands[pid].remove(tile)
+        self._hand_remove(pid, tile)
         peng_meld['type'] = 'bugang'
         peng_meld['tiles'].append(tile)
 
@@ -312,6 +600,7 @@ class MahjongGame:
         return True, 'ok'
 
     # ── 自摸 ──────────────────────────────────────────────────────
+    @_batched
     def handle_zimo(self, pid: int) -> tuple[bool, str]:
         if self.phase == 'ended':
             return False, '游戏已结束'
@@ -335,20 +624,14 @@ class MahjongGame:
         self.phase = 'discard_wait'
 
         # 检查自摸（包含岭上开花情况在 _draw_after_gang 中已处理）
-        if is_winning_hand(self.hands[pid]):  # type: ignore
-            sid = self._get_sid(pid)
-            if sid:
-                self._emit(
-                    'action_option',
-                    {
-                        'options': {'hu': True},
-                        'tile': tile_to_unicode(new_tile),
-                        'tile_code': new_tile,
-                        'self_draw': True,
-                        'from': '自摸',
-                    },
-                    room=sid,
-                )
+        if self.analysis[pid].is_winning:  # type: ignore
+            self._offer_action(pid, {  # type: ignore
+                'options': {'hu': True},
+                'tile': tile_to_unicode(new_tile),
+                'tile_code': new_tile,
+                'self_draw': True,
+                'from': '自摸',
+            })
             self.action_pending[pid] = {'hu': True}  # type: ignore
             self.broadcast_state()
             self._emit_turn()
@@ -358,19 +641,15 @@ class MahjongGame:
         if sid:
             self._emit('tile_drawn', {'tile': tile_to_unicode(new_tile), 'tile_code': new_tile}, room=sid)
         self.broadcast_state()
-        self._emit_turn()
-
-        # 如果当前出牌玩家断线，触发 AI 托管
-        if self.is_player_disconnected(pid):
-            self._schedule_ai_discard(pid)
+        self._emit_turn()   # 当前出牌玩家断线时由 _emit_turn 触发 AI 托管
 
     def _draw_tile(self, pid: int, from_end: bool = False) -> str | None:
         """摸牌。from_end=True 表示杠后从牌尾补张"""
         if not self.wall:
             self._declare_draw()
             return None
-        tile = self.wall.pop(-1 if from_end else 0)
-        self.hands[pid].append(tile)
+        tile = self.wall.draw_rinshan() if from_end else self.wall.draw()
+        self._hand_add(pid, tile)
 
         # 回放记录（普通摸牌）
         if self._replay and not from_end:
@@ -383,6 +662,7 @@ class MahjongGame:
         self.phase = 'ended'
         self.action_pending = {}
         self._cancel_action_timer()
+        self.result = {'winner': None, 'hu_type': 'draw', 'from_pid': None, 'fan': 0, 'score': 0, 'yaku': []}
 
         # 回放记录：流局结果并保存
         if self._replay:
@@ -411,9 +691,9 @@ class MahjongGame:
     def _draw_after_gang(self, pid: int, is_angang: bool = False) -> None:
         """杠后从牌尾补摸一张，通知玩家，并检查岭上开花"""
         new_tile = self._draw_tile(pid, from_end=True)
-        self.phase = 'discard_wait'
         if new_tile is None:
-            return
+            return   # 牌山已空：_draw_tile 已宣布荒牌，不能再回到出牌阶段
+        self.phase = 'discard_wait'
 
         # 回放记录（岭上摸牌）
         if self._replay:
@@ -424,19 +704,14 @@ class MahjongGame:
             self._emit('tile_drawn', {'tile': tile_to_unicode(new_tile), 'tile_code': new_tile}, room=sid)
 
         # 岭上开花：杠后摸牌可以和牌
-        if is_winning_hand(self.hands[pid]):
-            if sid:
-                self._emit(
-                    'action_option',
-                    {
-                        'options': {'hu': True},
-                        'tile': tile_to_unicode(new_tile),
-                        'tile_code': new_tile,
-                        'self_draw': True,
-                        'from': '岭上开花',
-                    },
-                    room=sid,
-                )
+        if self.analysis[pid].is_winning:
+            self._offer_action(pid, {
+                'options': {'hu': True},
+                'tile': tile_to_unicode(new_tile),
+                'tile_code': new_tile,
+                'self_draw': True,
+                'from': '岭上开花',
+            })
             self.action_pending[pid] = {'hu': True}
 
         self.broadcast_state()
@@ -451,7 +726,7 @@ class MahjongGame:
         for pid in self.player_ids:
             if pid == gang_pid:
                 continue
-            if is_winning_hand(self.hands[pid] + [tile]):
+            if self.analysis[pid].can_win_with(tile):
                 robbers[pid] = {'hu': True}
 
         if not robbers:
@@ -464,40 +739,38 @@ class MahjongGame:
         self.last_discard = (gang_pid, tile)
         self.action_pending = robbers
         for pid, opts in robbers.items():
-            sid = self._get_sid(pid)
-            if sid:
-                self._emit(
-                    'action_option',
-                    {
-                        'options': opts,
-                        'tile': tile_to_unicode(tile),
-                        'tile_code': tile,
-                        'from': f'{self._get_username(gang_pid)}（补杠）',
-                        'qiangganghu': True,
-                    },
-                    room=sid,
-                )
-        self._cancel_action_timer()
-        self.action_timer = eventlet.spawn_after(15, self._action_timeout)
+            self._offer_action(pid, {
+                'options': opts,
+                'tile': tile_to_unicode(tile),
+                'tile_code': tile,
+                'from': f'{self._get_username(gang_pid)}（补杠）',
+                'qiangganghu': True,
+            })
+        self._await_responses()
 
     # ── 内部流程：检查他人响应 ────────────────────────────────────
     def _check_actions(self, discarder_pid: int, tile: str) -> None:
         """出牌后检查其他玩家是否能碰/杠/胡"""
         self.action_pending = {}
+        bit = 1 << TILE_IDS[tile]
 
         for pid in self.player_ids:
             if pid == discarder_pid:
                 continue
+            analysis = self.analysis[pid]
+            # 位掩码快速排除：既不成对子也不在听牌进张里的牌，无需逐项检查
+            if not analysis.response_mask & bit:
+                continue
             opts: dict[str, bool] = {}
 
             # 胡（荣和）
-            if is_winning_hand(self.hands[pid] + [tile]):
+            if analysis.can_win_with(tile):
                 opts['hu'] = True
             # 明杠
-            if self.hands[pid].count(tile) == 3:
+            if analysis.can_gang(tile):
                 opts['gang'] = True
             # 碰
-            if self.hands[pid].count(tile) >= 2:
+            if analysis.can_peng(tile):
                 opts['peng'] = True
 
             if opts:
@@ -508,44 +781,76 @@ class MahjongGame:
             return
 
         for pid, opts in self.action_pending.items():
-            sid = self._get_sid(pid)
-            if sid:
-                self._emit(
-                    'action_option',
-                    {
-                        'options': opts,
-                        'tile': tile_to_unicode(tile),
-                        'tile_code': tile,
-                        'from': self._get_username(discarder_pid),
-                    },
-                    room=sid,
-                )
-
-        # 超时计时器（15 秒）
+            self._offer_action(pid, {
+                'options': opts,
+                'tile': tile_to_unicode(tile),
+                'tile_code': tile,
+                'from': self._get_username(discarder_pid),
+            })
+
+        self._await_responses()
+
+    def _offer_action(self, pid: int, payload: dict) -> None:
+        """向玩家发送 action_option（断线时不发）；内容记下供重连时补发"""
+        self._action_prompts[pid] = payload
+        sid = self._get_sid(pid)
+        if sid:
+            self._emit('action_option', payload, room=sid)
+
+    def _await_responses(self) -> None:
+        """
+        等待 action_pending 中的玩家响应：在线玩家按自适应超时计时，断线玩家交给 AI 托管。
+        待响应者全部托管且 fast_forward 时 AI 立即响应（与其余座位是否在线无关），
+        超时计时器只作兜底（如托管期间玩家重连却不操作）。
+        """
+        humans = [pid for pid in self.action_pending if not self.is_player_disconnected(pid)]
+        timeout = max((self._response_timeout(pid) for pid in humans), default=self.pacing.action_timeout)
         self._cancel_action_timer()
-        self.action_timer = eventlet.spawn_after(15, self._action_timeout)
+        self.action_timer = self.timers.spawn_after(timeout, self._action_timeout)
 
-        # 为断线的待响应玩家触发 AI 托管
         for pid, opts in list(self.action_pending.items()):
-            if self.is_player_disconnected(pid):
+            if pid not in humans:
                 self._schedule_ai_action(pid, opts)
 
+    def _response_timeout(self, pid: int) -> float:
+        """该玩家的响应超时：每次连续超时减半，不低于 min_action_timeout"""
+        pacing = self.pacing
+        strikes = self._afk_strikes.get(pid, 0)
+        return max(pacing.min_action_timeout, pacing.action_timeout / (1 << min(strikes, 8)))
+
+    def _ai_delay(self, waiting: Iterable[int] | None = None) -> float:
+        """
+        托管动作的延迟：waiting（默认全桌）中没有在线玩家时快进为 0。
+        出牌看全桌（在线玩家要看清每一张打出的牌），响应只看待响应者。
+        """
+        pacing = self.pacing
+        seats = self.player_ids if waiting is None else waiting
+        if pacing.fast_forward and all(self._get_sid(p) is None for p in seats):
+            return 0.0
+        return pacing.ai_delay
+
+    @_batched
     def _action_timeout(self) -> None:
         """超时自动过所有待响应"""
         if self.action_pending and self.phase == 'action_wait':
             print(f'[Room {self.room_id}] Action timeout, proceeding.')
+            for pid in self.action_pending:
+                if not self.is_player_disconnected(pid):
+                    self._afk_strikes[pid] = self._afk_strikes.get(pid, 0) + 1
             self.action_pending = {}
             self.action_timer = None
             self._next_turn()
 
     def _cancel_action_timer(self) -> None:
         if self.action_timer:
-            try:
-                self.action_timer.cancel()
-            except Exception:
-                pass
+            self.action_timer.cancel()
             self.action_timer = None
 
+    def cancel_timers(self) -> None:
+        """作废本房间所有定时器（超时与 AI 托管）：新一局开始、房间移除时调用"""
+        self.timers.new_generation()
+        self.action_timer = None
+
     # ── 具体操作 ──────────────────────────────────────────────────
     def _do_hu(self, winner_pid: int, tile: str, from_pid: int, hu_type: str) -> None:
         """处理胡牌：番型评估 + 计分 + 广播"""
@@ -567,9 +872,9 @@ class MahjongGame:
             elif '岭上' in getattr(self, '_last_gang_label', ''):
                 from_label = '岭上开花'
 
+        win = self.analysis[winner_pid].win_analysis(self.melds.get(winner_pid, []), tile)
         hand_result = evaluate_hand(
-            hand=self.hands[winner_pid],
-            melds=self.melds.get(winner_pid, []),
+            win,
             win_tile=tile,
             hu_type=hu_type,
             from_label=from_label,
@@ -585,6 +890,14 @@ class MahjongGame:
 
         # 番种描述
         yaku_desc = '、'.join(y.name for y in hand_result.yaku_list)
+        self.result = {
+            'winner': winner_pid,
+            'hu_type': hu_type,
+            'from_pid': from_pid,
+            'fan': hand_result.fan,
+            'score': hand_result.score,
+            'yaku': [y.name for y in hand_result.yaku_list],
+        }
 
         self._emit(
             'game_over',
@@ -646,9 +959,8 @@ class MahjongGame:
         return delta
 
     def _do_mingang(self, pid: int, tile: str, discarder_pid: int) -> None:
-        for _ in range(3):
-            self.hands[pid].remove(tile)
-        self.melds[pid].append({'type': 'gang', 'tiles': [tile] * 4})
+        self._hand_remove(pid, tile, 3)
+        self.melds[pid].append({'type': 'gang', 'tiles': TileList([tile] * 4)})
 
         if tile in self.discards[discarder_pid]:
             self.discards[discarder_pid].remove(tile)
@@ -664,9 +976,8 @@ class MahjongGame:
         self._draw_after_gang(pid)
 
     def _do_peng(self, pid: int, tile: str, discarder_pid: int) -> None:
-        for _ in range(2):
-            self.hands[pid].remove(tile)
-        self.melds[pid].append({'type': 'peng', 'tiles': [tile] * 3})
+        self._hand_remove(pid, tile, 2)
+        self.melds[pid].append({'type': 'peng', 'tiles': TileList([tile] * 3)})
 
         if tile in self.discards[discarder_pid]:
             self.discards[discarder_pid].remove(tile)
@@ -687,29 +998,25 @@ class MahjongGame:
         """判断玩家是否断线（sid 为 None）"""
         return self._get_sid(pid) is None
 
-    def trigger_ai_if_needed(self, spectator_pids: list[int] | None = None) -> None:
+    @_batched
+    def trigger_ai_if_needed(self) -> None:
         """检查当前需要操作的玩家是否断线，若断线则触发 AI 托管"""
         if self.phase == 'discard_wait':
             pid = self.current_pid
             if pid and self.is_player_disconnected(pid):
-                self._schedule_ai_discard(pid, spectator_pids)
+                self._schedule_ai_discard(pid)
 
         elif self.phase == 'action_wait':
             for pid, opts in list(self.action_pending.items()):
                 if self.is_player_disconnected(pid):
-                    self._schedule_ai_action(pid, opts, spectator_pids)
+                    self._schedule_ai_action(pid, opts)
 
-    def _cancel_ai_timers(self) -> None:
-        """取消所有 AI 托管定时器"""
-        for timer in self._ai_timers:
-            try:
-                timer.cancel()
-            except Exception:
-                pass
-        self._ai_timers = []
+    def ai_strategy(self, pid: int) -> AIStrategy:
+        """该座位的托管策略"""
+        return self.ai_strategies.get(pid, DEFAULT_STRATEGY)
 
-    def _schedule_ai_discard(self, pid: int, spectator_pids: list[int] | None = None) -> None:
-        """延迟2秒后为断线玩家自动出牌"""
+    def _schedule_ai_discard(self, pid: int) -> None:
+        """延迟 _ai_delay() 秒后为断线玩家自动出牌"""
         def _do_ai_discard():
             if self.phase != 'discard_wait' or self.current_pid != pid:
                 return
@@ -719,9 +1026,10 @@ class MahjongGame:
             hand = self.hands.get(pid, [])
             if not hand:
                 return
+            strategy = self.ai_strategy(pid)
 
             # 检查是否有暗杠/补杠可做
-            angang_tile = ai_choose_angang(hand)
+            angang_tile = strategy.choose_angang(hand)
             if angang_tile:
                 self._emit('message', {
                     'text': f'🤖 {self._get_username(pid)}（AI托管）暗杠 {tile_to_unicode(angang_tile)}',
@@ -729,10 +1037,10 @@ class MahjongGame:
                 }, room=self.room_id)
                 ok, _ = self.handle_angang(pid, angang_tile)
                 if ok:
-                    self.broadcast_all(spectator_pids)
+                    self.broadcast_state()
                     return
 
-            bugang_tile = ai_choose_bugang(hand, self.melds.get(pid, []))
+            bugang_tile = strategy.choose_bugang(hand, self.melds.get(pid, []))
             if bugang_tile:
                 self._emit('message', {
                     'text': f'🤖 {self._get_username(pid)}（AI托管）补杠 {tile_to_unicode(bugang_tile)}',
@@ -740,11 +1048,11 @@ class MahjongGame:
                 }, room=self.room_id)
                 ok, _ = self.handle_bugang(pid, bugang_tile)
                 if ok:
-                    self.broadcast_all(spectator_pids)
+                    self.broadcast_state()
                     return
 
             # 检查自摸
-            if is_winning_hand(hand):
+            if self.analysis[pid].is_winning:
                 if pid in self.action_pending and self.action_pending[pid].get('hu'):
                     self._emit('message', {
                         'text': f'🤖 {self._get_username(pid)}（AI托管）自摸！',
@@ -758,27 +1066,60 @@ class MahjongGame:
             for p in self.player_ids:
                 all_discards.extend(self.discards.get(p, []))
 
-            tile = ai_choose_discard(hand, self.melds.get(pid, []), all_discards)
-            if tile:
-                self._emit('message', {
-                    'text': f'🤖 {self._get_username(pid)}（AI托管）出牌 {tile_to_unicode(tile)}',
-                    'type': 'info',
-                }, room=self.room_id)
-                self.handle_discard(pid, tile)
-                self.broadcast_all(spectator_pids)
+            args = (list(hand), self.melds.get(pid, []), all_discards)
+            if self.ai_pool is None:
+                self._apply_ai_discard(pid, strategy.choose_discard(*args))
+                return
+            if pid in self._ai_thinking:
+                return   # 同一次出牌的决策已在计算
+            # 交给计算池；超时 / 出错时摸切（打出最后摸到的牌）
+            self._ai_thinking.add(pid)
+            turn = (self.wall.seed, len(self.wall))
+            self.ai_pool.decide(
+                self._scheduler,
+                strategy.choose_discard,
+                args,
+                hand[-1],
+                self._in_batch(lambda tile: self._apply_ai_discard(pid, tile, turn)),
+            )
 
-        timer = eventlet.spawn_after(2, _do_ai_discard)
-        self._ai_timers.append(timer)
+        self.timers.spawn_after(self._ai_delay(), self._in_batch(_do_ai_discard))
 
-    def _schedule_ai_action(self, pid: int, opts: dict, spectator_pids: list[int] | None = None) -> None:
-        """延迟2秒后为断线玩家自动执行碰/杠/胡/过"""
+    def _apply_ai_discard(
+        self,
+        pid: int,
+        tile: str,
+        turn: tuple[int | None, int] | None = None,
+    ) -> None:
+        """
+        执行托管出牌。计算池的结果交回时局面可能已变化：
+        turn 为提交时的 (牌山种子, 牌山剩余)，不一致说明已换局或已摸过牌，结果作废。
+        结果一到即清除该座位的「计算中」标记（包括作废的结果），否则该座位再次托管时不会再出牌。
+        """
+        if turn is not None:
+            self._ai_thinking.discard(pid)
+            if turn != (self.wall.seed, len(self.wall)):
+                return
+        if self.phase != 'discard_wait' or self.current_pid != pid:
+            return
+        if not self.is_player_disconnected(pid) or not tile or tile not in self.hands[pid]:
+            return
+        self._emit('message', {
+            'text': f'🤖 {self._get_username(pid)}（AI托管）出牌 {tile_to_unicode(tile)}',
+            'type': 'info',
+        }, room=self.room_id)
+        self.handle_discard(pid, tile)
+        self.broadcast_state()
+
+    def _schedule_ai_action(self, pid: int, opts: dict) -> None:
+        """延迟 _ai_delay(待响应者) 秒后为断线玩家自动执行碰/杠/胡/过"""
         def _do_ai_action():
             if self.phase != 'action_wait' or pid not in self.action_pending:
                 return
             if not self.is_player_disconnected(pid):
                 return  # 已重连
 
-            action = ai_should_action(opts)
+            action = self.ai_strategy(pid).should_action(opts)
 
             if action == 'hu':
                 self._emit('message', {
@@ -787,11 +1128,7 @@ class MahjongGame:
                 }, room=self.room_id)
                 # 判断是自摸还是荣和
                 if opts.get('hu') and self.last_discard:
-                    _, tile = self.last_discard
-                    if is_winning_hand(self.hands[pid] + [tile]):
-                        self.handle_action(pid, 'hu')
-                    else:
-                        self.handle_action(pid, 'hu')
+                    self.handle_action(pid, 'hu')
                 else:
                     self.handle_zimo(pid)
             elif action == 'gang':
@@ -813,10 +1150,9 @@ class MahjongGame:
                 }, room=self.room_id)
                 self.handle_action(pid, 'pass')
 
-            self.broadcast_all(spectator_pids)
+            self.broadcast_state()
 
-        timer = eventlet.spawn_after(2, _do_ai_action)
-        self._ai_timers.append(timer)
+        self.timers.spawn_after(self._ai_delay(self.action_pending), self._in_batch(_do_ai_action))
 
     # ── 通知当前玩家轮到自己 ──────────────────────────────────────
     def _emit_turn(self) -> None:
@@ -824,30 +1160,33 @@ class MahjongGame:
         if not pid:
             return
         sid = self._get_sid(pid)
-        hand = self.hands.get(pid, [])
-        # 进张提示（13张时才计算，避免14张时重复）
-        winning_tiles = []
-        if len(hand) % 3 == 1:  # 13张 => 听牌状态
-            winning_tiles = [tile_to_unicode(t) for t in get_winning_tiles(hand)]
-
         if sid:
-            self._emit(
-                'your_turn',
-                {
-                    'can_angang': self._check_angang(pid),
-                    'can_bugang': self._check_bugang(pid),
-                    'winning_tiles': winning_tiles,  # 进张列表（空=未听）
-                },
-                room=sid,
-            )
+            self._emit('your_turn', self._turn_payload(pid), room=sid)
         else:
             # 玩家断线，触发 AI 托管出牌
             self._schedule_ai_discard(pid)
 
+    def _turn_payload(self, pid: int) -> dict:
+        """your_turn 的内容：可暗杠/补杠的牌与听牌提示"""
+        analysis = self.analysis[pid]
+        # 进张提示（3n+1 张时才有意义，读取分析缓存）
+        winning_tiles = []
+        wait_shapes = []
+        if analysis.size % 3 == 1:
+            for w in analysis.wait_info:
+                winning_tiles.append(tile_to_unicode(w.tile))
+                wait_shapes.append(list(w.shapes))
+
+        return {
+            'can_angang': self._check_angang(pid),
+            'can_bugang': self._check_bugang(pid),
+            'winning_tiles': winning_tiles,  # 进张列表（空=未听）
+            'wait_shapes': wait_shapes,      # 与 winning_tiles 对应的听牌形状
+        }
+
     # ── 辅助查询 ──────────────────────────────────────────────────
     def _check_angang(self, pid: int) -> list[str]:
-        c = Counter(self.hands[pid])
-        return [tile_to_unicode(t) for t, n in c.items() if n >= 4]
+        return [tile_to_unicode(t) for t in self.analysis[pid].angang_tiles()]
 
     def _check_bugang(self, pid: int) -> list[str]:
         penged = {m['tiles'][0] for m in self.melds[pid] if m['type'] == 'peng'}
@@ -860,127 +1199,200 @@ class MahjongGame:
         return result
 
     def _is_ting(self, pid: int) -> bool:
-        hand = self.hands[pid]
-        if len(hand) % 3 != 1:
-            return False
-        return calculate_shanten(hand) <= 0
+        return self.analysis[pid].is_ting
 
     # ── 状态广播 ──────────────────────────────────────────────────
+    @_batched
     def broadcast_state(self) -> None:
+        # 所有状态变化都以 broadcast_state 结束：在这里推进版本号，公开快照随之失效
+        self.state_version += 1
         for pid in self.player_ids:
             sid = self._get_sid(pid)
             if sid:
                 self._send_state_to(pid, sid)
+        self._broadcast_spectator_view()
 
+    @_batched
     def broadcast_state_to_spectators(self, spectator_pids: list[int]) -> None:
-        """向观战者广播公开信息（看不到具体手牌）"""
+        """向指定观战者单独发送公开信息（刚加入 / 重连时；之后的变化经观战频道）"""
         for pid in spectator_pids:
             sid = self._get_sid(pid)
             if sid:
                 self._send_spectator_state_to(pid, sid)
 
-    def broadcast_all(self, spectator_pids: list[int] | None = None) -> None:
-        """同时向玩家和观战者广播状态"""
-        self.broadcast_state()
-        if spectator_pids:
-            self.broadcast_state_to_spectators(spectator_pids)
-
-    def _send_state_to(self, pid: int, sid: str) -> None:
-        hand = self.hands.get(pid, [])
-        shanten = calculate_shanten(hand) if hand else 8
-        is_ting = shanten <= 0 and len(hand) % 3 == 1
-
-        others = [
-            {
-                'pid': op,
-                'username': self._get_username(op),
-                'seat': self.seat_name(op),
-                'hand_size': len(self.hands.get(op, [])),
-                'discards': to_unicode(self.discards.get(op, [])),
-                'melds': self._format_melds(op, hide_angang=True),
-                'connected': self._get_sid(op) is not None,
-                'score': self.scores.get(op, 0),
-                'score_delta': self.score_delta.get(op, 0),
-            }
-            for op in self.player_ids
-            if op != pid
-        ]
-
-        state = {
-            'phase': self.phase,
-            'my_pid': pid,
-            'my_seat': self.seat_name(pid),
-            'my_hand': to_display(hand),
-            'my_hand_codes': sort_tiles(hand),
-            'my_melds': self._format_melds(pid, hide_angang=False),
-            'my_discards': to_unicode(self.discards.get(pid, [])),
-            'shanten': shanten,
-            'is_ting': is_ting,
-            'my_score': self.scores.get(pid, 0),
-            'my_score_delta': self.score_delta.get(pid, 0),
-            'wall_count': len(self.wall),
-            'current_turn_pid': self.current_pid,
-            'current_turn_seat': self.seat_name(self.current_pid) if self.current_pid else '',
-            'current_turn_name': self._get_username(self.current_pid) if self.current_pid else '',
-            'dealer_pid': self.player_ids[self.dealer_idx] if self.player_ids else None,
-            'dealer_seat': SEAT_NAMES[self.dealer_idx],
-            'last_discard_tile': (
-                tile_to_unicode(self.last_discard[1]) if self.last_discard else None
-            ),
-            'others': others,
+    def _broadcast_spectator_view(self) -> None:
+        """观战频道：同一状态版本（与在线状态）只发送一次，没有在线观战者时不构建"""
+        if self._outbox is not None and not self._flushing:
+            self._outbox.append((_STATE, self.spectator_channel, None))
+            return
+        if not any(self._get_sid(p) for p in self._get_spectators(self.room_id)):
+            return
+        view = self.spectator_view()
+        if view is not self._spectator_sent:     # 视角只在版本或在线状态变化时重建
+            self._spectator_sent = view
+            self._emit('game_state', view, room=self.spectator_channel)
+
+    def spectator_view(self) -> dict:
+        """当前状态版本的观战视角（所有观战者共享，不得修改）"""
+        snap = self.public_snapshot()
+        cached = self._spectator_view
+        if cached is not None and cached[0] == snap.version and cached[1] == snap.connected:
+            return cached[2]
+        view = {
+            **snap.common,
+            'my_pid': None,
+            'my_seat': '观',
+            'my_hand': [],
+            'my_hand_codes': [],
+            'my_melds': [],
+            'my_discards': [],
+            'shanten': 8,
+            'is_ting': False,
+            'my_score': 0,
+            'my_score_delta': 0,
+            'others': snap.players,
+            'is_spectator': True,
+            'state_version': snap.version,
         }
-        self._emit('game_state', state, room=sid)
+        self._spectator_view = (snap.version, snap.connected, view)
+        return view
 
-    def _send_spectator_state_to(self, pid: int, sid: str) -> None:
-        """向观战者发送公开信息（不包含手牌详情）"""
-        all_players = [
+    def public_snapshot(self) -> _PublicSnapshot:
+        """当前状态版本的公开快照（版本号或在线状态变化时重建）"""
+        connected = tuple(self._get_sid(p) is not None for p in self.player_ids)
+        snap = self._snapshot
+        if snap is not None and snap.version == self.state_version and snap.connected == connected:
+            return snap
+
+        players = [
             {
                 'pid': p,
                 'username': self._get_username(p),
                 'seat': self.seat_name(p),
                 'hand_size': len(self.hands.get(p, [])),
-                'discards': to_unicode(self.discards.get(p, [])),
+                'discards': self.discards[p].unicode(),
                 'melds': self._format_melds(p, hide_angang=True),
-                'connected': self._get_sid(p) is not None,
+                'connected': online,
                 'score': self.scores.get(p, 0),
                 'score_delta': self.score_delta.get(p, 0),
             }
-            for p in self.player_ids
+            for p, online in zip(self.player_ids, connected)
         ]
-
-        state = {
+        current = self.current_pid
+        common = {
             'phase': self.phase,
-            'my_pid': pid,
-            'my_seat': '观',
-            'my_hand': [],
-            'my_hand_codes': [],
-            'my_melds': [],
-            'my_discards': [],
-            'shanten': 8,
-            'is_ting': False,
-            'my_score': 0,
-            'my_score_delta': 0,
             'wall_count': len(self.wall),
-            'current_turn_pid': self.current_pid,
-            'current_turn_seat': self.seat_name(self.current_pid) if self.current_pid else '',
-            'current_turn_name': self._get_username(self.current_pid) if self.current_pid else '',
+            'current_turn_pid': current,
+            'current_turn_seat': self.seat_name(current) if current else '',
+            'current_turn_name': self._get_username(current) if current else '',
             'dealer_pid': self.player_ids[self.dealer_idx] if self.player_ids else None,
             'dealer_seat': SEAT_NAMES[self.dealer_idx],
             'last_discard_tile': (
                 tile_to_unicode(self.last_discard[1]) if self.last_discard else None
             ),
-            'others': all_players,
-            'is_spectator': True,
         }
-        self._emit('game_state', state, room=sid)
+        self._snapshot = snap = _PublicSnapshot(self.state_version, connected, common, players)
+        return snap
+
+    def _send_state_to(self, pid: int, sid: str) -> None:
+        if self._outbox is not None and not self._flushing:
+            self._outbox.append((_STATE, sid, (pid, False)))
+            return
+        snap = self.public_snapshot()
+        hand = self.hands[pid]
+        analysis = self.analysis[pid]
+
+        state = {
+            **snap.common,
+            'my_pid': pid,
+            'my_seat': self.seat_name(pid),
+            'my_hand': hand.display(),
+            'my_hand_codes': hand.sorted_codes(),
+            'my_melds': self._format_melds(pid, hide_angang=False),
+            'my_discards': self.discards[pid].unicode(),
+            'shanten': analysis.shanten,
+            'is_ting': analysis.is_ting,
+            'my_score': self.scores.get(pid, 0),
+            'my_score_delta': self.score_delta.get(pid, 0),
+            'others': [info for info in snap.players if info['pid'] != pid],
+        }
+        self._emit_state(pid, sid, state)
+
+    def _send_spectator_state_to(self, pid: int, sid: str) -> None:
+        """向观战者发送公开信息（不包含手牌详情）"""
+        if self._outbox is not None and not self._flushing:
+            self._outbox.append((_STATE, sid, (pid, True)))
+            return
+        self._emit_state(pid, sid, dict(self.spectator_view(), my_pid=pid))
+        self._spectator_versions[pid] = self.state_version
+
+    def _emit_state(self, pid: int, sid: str, state: dict) -> None:
+        """
+        发送状态：旧客户端收到完整 game_state；
+        增量同步客户端在已有基线时只收到 game_state_patch（无变化则不发）。
+        """
+        state['state_version'] = self.state_version
+        if self._get_client_option(sid, 'sync') != 'delta':
+            self._emit('game_state', state, room=sid)
+            return
+
+        prev = self._sent_state.get(pid)
+        if prev is None or prev[0] != sid:
+            self._sent_state[pid] = (sid, state)
+            self._emit('game_state', state, room=sid)
+            return
+
+        patch = _state_patch(prev[1], state)
+        if patch is not None:
+            # 无变化时保留旧基线，保证下一个补丁的 base 与客户端持有的版本一致
+            self._sent_state[pid] = (sid, state)
+            self._emit('game_state_patch', patch, room=sid)
+
+    @_batched
+    def send_full_state(self, pid: int, spectator: bool = False) -> None:
+        """客户端发现版本缺口时请求完整快照：丢弃基线后重发完整 game_state"""
+        sid = self._get_sid(pid)
+        if not sid or self.phase == 'waiting':
+            return
+        self._sent_state.pop(pid, None)
+        if spectator:
+            self._send_spectator_state_to(pid, sid)
+        elif pid in self.player_ids:
+            self._send_state_to(pid, sid)
+
+    @_batched
+    def resume(self, pid: int, last_seq: int | None) -> bool:
+        """
+        重连的玩家：补发 last_seq（客户端收到的最大事件序号）之后错过的事件，再广播状态——
+        该玩家丢弃基线后收到完整快照，其他玩家与观战频道据此得知其已重新在线（connected）；
+        最后重发仍在等待该玩家的提示（action_option / your_turn）——断线期间的提示没有发出，
+        也就不在事件日志里。
+        没有序号、序号不属于本房间或日志已被覆盖时只发送状态快照和提示，返回 False。
+        """
+        sid = self._get_sid(pid)
+        if not sid or pid not in self.player_ids:
+            return False
+        missed = None
+        if last_seq is not None and 0 <= last_seq <= self.event_seq:
+            missed = self._event_logs[pid].since(last_seq)
+        for event, data in missed or ():
+            self._outbox.append((event, sid, data))   # 已编号、已记录，直接进发件箱
+        self._sent_state.pop(pid, None)
+        self.broadcast_state()
+        if pid in self.action_pending and pid in self._action_prompts:
+            self._emit('action_option', self._action_prompts[pid], room=sid)
+        if self.phase == 'discard_wait' and self.current_pid == pid:
+            self._emit('your_turn', self._turn_payload(pid), room=sid)
+        return missed is not None
 
     def _format_melds(self, pid: int, hide_angang: bool = False) -> list[dict]:
         result = []
         for m in self.melds.get(pid, []):
             mtype = m['type']
-            tiles_display = to_unicode(m['tiles'])
             if mtype == 'angang' and hide_angang:
-                tiles_display = ['🀫', '🀫', '🀫', '🀫']
+                tiles_display = _HIDDEN_ANGANG
+            else:
+                tiles_display = m['tiles'].unicode()
             result.append({'type': mtype, 'tiles': tiles_display})
         return result
 
@@ -1000,7 +1412,150 @@ class MahjongGame:
             ],
         }
 
+    # ── 发件箱 ────────────────────────────────────────────────────
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        一个动作的发件箱批次：期间的事件暂存，最外层退出时合并并按接收者刷新。
+        events.py 可把「动作 + 观战者广播」放进同一批次。
+        """
+        if self._outbox_depth == 0:
+            self._outbox = []
+        self._outbox_depth += 1
+        try:
+            yield
+        finally:
+            self._outbox_depth -= 1
+            if self._outbox_depth == 0:
+                self._flush_outbox()
+
+    def _in_batch(self, fn):
+        """包装定时器回调，使其在一个发件箱批次中执行"""
+        def run(*args):
+            with self.batch():
+                fn(*args)
+        return run
+
+    def _flush_outbox(self) -> None:
+        outbox, stats = self._outbox, self.outbox_stats
+        if not outbox:
+            self._outbox = None
+            return
+        stats.actions += 1
+        stats.events += len(outbox)
+
+        # 1. 合并 game_state：每个接收者只在最后一次请求的位置构建一次
+        last = {room: i for i, (event, room, _) in enumerate(outbox) if event is _STATE}
+        entries: list[tuple[Any, str, Any]] = []
+        self._outbox = entries
+        self._flushing = True
+        try:
+            for i, (event, room, data) in enumerate(outbox):
+                if event is not _STATE:
+                    entries.append((event, room, data))
+                elif last[room] != i:
+                    stats.coalesced += 1
+                elif data is None:
+                    self._broadcast_spectator_view()
+                else:
+                    pid, spectator = data
+                    if spectator:
+                        self._send_spectator_state_to(pid, room)
+                    else:
+                        self._send_state_to(pid, room)
+        finally:
+            self._flushing = False
+            self._outbox = None
+
+        # 2. 按接收者分组：声明 batch=1 的连接收到一帧，其余照旧逐条发送；
+        #    观战频道的状态在各帧之后整体发送一次（可延迟）
+        viewers = [sid for sid in (self._get_sid(p) for p in self._get_spectators(self.room_id)) if sid]
+        recipients = [sid for sid in (self._get_sid(p) for p in self.player_ids) if sid] + viewers
+        frames = {sid: [] for sid in recipients if self._get_client_option(sid, 'batch') == '1'}
+        legacy = len(set(recipients)) - len(frames)
+        channel: list[tuple[str, Any]] = []
+        for event, room, data in entries:
+            if room == self.spectator_channel:
+                channel.append((event, data))
+            elif room == self.room_id:
+                for items in frames.values():
+                    items.append((event, data))
+                if legacy:
+                    self._send(event, data, room, skip=list(frames), copies=legacy)
+            elif room in frames:
+                frames[room].append((event, data))
+            else:
+                self._send(event, data, room)
+        for sid, items in frames.items():
+            if items:
+                self._send_frame(sid, items)
+        for event, data in channel:
+            if self.spectator_delay > 0:
+                self.timers.spawn_after(self.spectator_delay, self._send_delayed_to_spectators, event, data)
+            else:
+                self._send(event, data, self.spectator_channel, copies=len(viewers))
+
+    def _send_delayed_to_spectators(self, event: str, data: dict) -> None:
+        """延迟到期的观战频道状态：跳过已单独收到更新版本（刚加入 / 重连）的观战者"""
+        version = data.get('state_version', 0)
+        viewers, stale = 0, []
+        for pid in self._get_spectators(self.room_id):
+            sid = self._get_sid(pid)
+            if not sid:
+                continue
+            if self._spectator_versions.get(pid, -1) > version:
+                stale.append(sid)
+            else:
+                viewers += 1
+        if viewers:
+            self._send(event, data, self.spectator_channel, skip=stale, copies=viewers)
+
+    def _send(self, event: str, data: Any, room: str, skip: list[str] | None = None, copies: int = 1) -> None:
+        """发出单个事件（发给紧凑编码连接的以 msgpack 编码）"""
+        if wire.AVAILABLE and room != self.room_id and room != self.spectator_channel \
+                and self._get_client_option(room, 'enc') == 'compact':
+            data = wire.pack(event, data, self._wire_tables, room)
+        stats = self.outbox_stats
+        stats.frames += copies
+        stats.bytes += _payload_size(data) * copies
+        stats.by_event[event] = stats.by_event.get(event, 0) + copies
+        if skip:
+            self._sio.emit(event, data, room=room, skip_sid=skip)
+        else:
+            self._sio.emit(event, data, room=room)
+
+    def _send_frame(self, sid: str, items: list[tuple[str, Any]]) -> None:
+        """把一个动作中发给 sid 的全部事件作为一帧 batch 发出：[[事件名, 负载], ...]"""
+        if wire.AVAILABLE and self._get_client_option(sid, 'enc') == 'compact':
+            frame: Any = wire.pack_batch([(e, wire.pack(e, d, self._wire_tables, sid)) for e, d in items])
+        else:
+            frame = [[e, d] for e, d in items]
+        stats = self.outbox_stats
+        stats.frames += 1
+        stats.bytes += _payload_size(frame)
+        stats.by_event['batch'] = stats.by_event.get('batch', 0) + 1
+        self._sio.emit('batch', frame, room=sid)
+
     # ── 内部统一 emit ─────────────────────────────────────────────
     def _emit(self, event: str, data: dict, *, room: str) -> None:
-        """统一封装 socketio.emit，方便日后替换传输层"""
-        self._sio.emit(event, data, room=room)
+        """统一的事件出口（经注入的传输层发送）；动作期间先进发件箱"""
+        if event not in _UNLOGGED_EVENTS:
+            data = self._log_event(event, data, room)
+        if self._outbox is not None:
+            self._outbox.append((event, room, data))
+        else:
+            self._send(event, data, room)
+
+    def _log_event(self, event: str, data: dict, room: str) -> dict:
+        """发给房间或某个玩家的事件：编号（负载带 seq）并记入接收玩家的事件日志"""
+        if room == self.room_id:
+            logs = [self._event_logs[p] for p in self.player_ids]
+        else:
+            logs = [self._event_logs[p] for p in self.player_ids if self._get_sid(p) == room]
+            if not logs:
+                return data     # 只发给观战者等其他连接的事件不记录
+        self.event_seq += 1
+        data = dict(data, seq=self.event_seq)
+        for log in logs:
+            log.append(self.event_seq, event, data)
+        return data
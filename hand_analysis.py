@@ -0,0 +1,166 @@
+"""
+hand_analysis.py — 单个玩家手牌的增量分析缓存
+
+职责：
+  - 持有手牌的 34 格计数向量，随摸牌/出牌/碰/杠增量更新（不重新计数）
+  - 缓存向听数、听牌进张、是否和牌，手牌变化前重复读取不再重新计算
+  - 提供碰/杠资格查询（按牌计数，O(1)）
+  - 维护可响应牌位掩码（对子位随增减 O(1) 更新 + 听牌位），判断谁能响应一张打出的牌只需一次位与；
+    未听牌（向听数 > 0）时不做和牌计算
+
+由 MahjongGame 为每个座位持有一份；game.py 修改手牌时必须同步调用 add/remove。
+"""
+
+from __future__ import annotations
+
+from tiles import ID_TILES, NUM_TILE_KINDS, TILE_IDS, counts_of
+from logic import (
+    WaitInfo,
+    WinAnalysis,
+    analyze_waits_counts,
+    analyze_win,
+    calculate_shanten_counts,
+    get_winning_ids,
+    is_winning_counts,
+)
+
+
+class HandAnalysis:
+    """
+    一名玩家手牌的分析结果。
+
+    缓存字段（None 表示手牌变化后尚未重新计算）：
+      - _shanten  向听数
+      - _waits    听牌进张 ID 集合（仅 3n+1 张时有意义）
+      - _wait_info 进张 + 听牌形状（仅 3n+1 张时有意义）
+      - _winning  当前手牌是否和牌（仅 3n+2 张时有意义）
+      - _win      和牌分析（拆法 + 计分标志，供 scorer 使用）
+      - _wait_mask 听牌进张位掩码（第 i 位 = 牌 ID i）
+
+    增量维护字段：
+      - pair_mask  手里有 2 张及以上的牌（可碰；可明杠是其子集）
+    """
+
+    def __init__(self, hand: list[str] | None = None) -> None:
+        self.counts: bytearray = bytearray(NUM_TILE_KINDS)
+        self.size: int = 0
+        self.pair_mask: int = 0
+        self._shanten: int | None = None
+        self._waits: frozenset[int] | None = None
+        self._wait_mask: int | None = None
+        self._wait_info: list[WaitInfo] | None = None
+        self._winning: bool | None = None
+        self._win: WinAnalysis | None = None
+        if hand:
+            self.reset(hand)
+
+    # ── 手牌变化 ──────────────────────────────────────────────────
+    def reset(self, hand: list[str]) -> None:
+        """整手替换（发牌）"""
+        self.counts = counts_of(hand)
+        self.size = len(hand)
+        self.pair_mask = sum(1 << i for i, c in enumerate(self.counts) if c >= 2)
+        self._invalidate()
+
+    def add(self, tile: str) -> None:
+        """摸进一张"""
+        i = TILE_IDS[tile]
+        self.counts[i] += 1
+        self.size += 1
+        if self.counts[i] == 2:
+            self.pair_mask |= 1 << i
+        self._invalidate()
+
+    def remove(self, tile: str, n: int = 1) -> None:
+        """打出 / 碰杠取走 n 张"""
+        i = TILE_IDS[tile]
+        self.counts[i] -= n
+        self.size -= n
+        if self.counts[i] < 2:
+            self.pair_mask &= ~(1 << i)
+        self._invalidate()
+
+    def _invalidate(self) -> None:
+        self._shanten = None
+        self._waits = None
+        self._wait_mask = None
+        self._wait_info = None
+        self._winning = None
+        self._win = None
+
+    # ── 查询（带缓存）─────────────────────────────────────────────
+    @property
+    def shanten(self) -> int:
+        """向听数（空手牌为 8，与 calculate_shanten 一致）"""
+        if self._shanten is None:
+            self._shanten = calculate_shanten_counts(self.counts)
+        return self._shanten
+
+    @property
+    def waits(self) -> frozenset[int]:
+        """听牌进张 ID 集合；非 3n+1 张或未听牌时为空（未听牌时不做和牌计算）"""
+        if self._waits is None:
+            self._waits = frozenset(get_winning_ids(self.counts)) if self.is_ting else frozenset()
+        return self._waits
+
+    @property
+    def wait_mask(self) -> int:
+        """听牌进张位掩码（第 i 位 = 牌 ID i）"""
+        if self._wait_mask is None:
+            self._wait_mask = sum(1 << i for i in self.waits)
+        return self._wait_mask
+
+    @property
+    def response_mask(self) -> int:
+        """别人打出后本家可响应（荣和 / 碰 / 明杠）的牌位掩码"""
+        return self.pair_mask | self.wait_mask
+
+    @property
+    def wait_info(self) -> list[WaitInfo]:
+        """听牌进张及听牌形状（按牌序）；非 3n+1 张时为空"""
+        if self._wait_info is None:
+            self._wait_info = analyze_waits_counts(self.counts)
+        return self._wait_info
+
+    @property
+    def is_winning(self) -> bool:
+        """当前手牌（3n+2 张）是否和牌"""
+        if self._winning is None:
+            self._winning = is_winning_counts(self.counts)
+        return self._winning
+
+    def win_analysis(self, melds: list[dict], win_tile: str | None = None) -> WinAnalysis:
+        """
+        和牌分析（全部拆法 + 牌种标志），直接交给 scorer.evaluate_hand。
+        副露变化总伴随手牌变化，因此与其它字段一样在 add/remove 时失效。
+        """
+        if self._win is None:
+            self._win = analyze_win(self.counts, melds, win_tile)
+        return self._win
+
+    @property
+    def is_ting(self) -> bool:
+        """是否听牌（3n+1 张且向听数 <= 0）"""
+        return self.size % 3 == 1 and self.shanten <= 0
+
+    def winning_tiles(self) -> list[str]:
+        """听牌进张（内部编码，按牌序）"""
+        return [ID_TILES[i] for i in sorted(self.waits)]
+
+    def can_win_with(self, tile: str) -> bool:
+        """加上这张牌后是否和牌（荣和 / 抢杠胡判断）"""
+        return self.wait_mask >> TILE_IDS[tile] & 1 == 1
+
+    def count(self, tile: str) -> int:
+        return self.counts[TILE_IDS[tile]]
+
+    def can_peng(self, tile: str) -> bool:
+        return self.counts[TILE_IDS[tile]] >= 2
+
+    def can_gang(self, tile: str) -> bool:
+        """明杠：手里已有 3 张"""
+        return self.counts[TILE_IDS[tile]] == 3
+
+    def angang_tiles(self) -> list[str]:
+        """可暗杠的牌（手里有 4 张）"""
+        return [ID_TILES[i] for i in range(NUM_TILE_KINDS) if self.counts[i] >= 4]
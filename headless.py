@@ -0,0 +1,136 @@
+"""
+headless.py — 无界面牌桌（四个 AI 托管座位，虚拟时钟驱动）
+
+职责：
+  - 用 transport.py 的内存传输层与虚拟时钟构造 MahjongGame，
+    四个座位都处于「断线」状态，由游戏自身的 AI 托管流程出牌 / 响应
+  - 走的是服务器中完全相同的状态机（出牌、响应检查、超时、托管），
+    只是定时器不再真实等待，一局在调用方线程中同步打完
+  - 不导入 eventlet / flask，不写回放文件
+
+提供：
+  - HandResult                一局的结果
+  - HeadlessTable.play_hand   打一局（可指定牌山种子），庄家按 events.py 的规则轮换
+
+用法：
+  python headless.py [-n 1000] [--seed 1] [--events]
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass
+
+from game import MahjongGame
+from transport import MemoryTransport, NullTransport, Transport, VirtualClock
+
+# 无界面牌桌的玩家 ID；观察者以观战者身份接收房间事件
+HEADLESS_PIDS: tuple[int, ...] = (1, 2, 3, 4)
+OBSERVER_PID = 0
+OBSERVER_SID = 'observer'
+
+
+@dataclass
+class HandResult:
+    """一局的结果"""
+    seed: int                     # 牌山种子
+    dealer: int                   # 庄家 pid
+    winner: int | None            # 和牌者（None = 荒牌）
+    hu_type: str                  # 'zimo' / 'rong' / 'draw'
+    from_pid: int | None          # 放铳者（荣和时）/ 和牌者本人（自摸时）
+    fan: int                      # 番数
+    yaku: list[str]               # 番种名
+    score_delta: dict[int, int]   # 本局积分变动
+    wall_left: int                # 结束时牌山剩余
+    timers: int                   # 本局执行的定时器回调数
+    clock: float                  # 本局经过的虚拟秒数
+
+
+class HeadlessTable:
+    """
+    四个 AI 托管座位的牌桌。
+
+    transport 默认丢弃事件；传入 MemoryTransport 并设 observe=True 可检查发往房间的事件
+    （没有任何在线接收者时，房间事件不会发出）。
+    """
+
+    def __init__(
+        self,
+        room_id: str = 'headless',
+        transport: Transport | None = None,
+        observe: bool = False,
+    ) -> None:
+        self.clock = VirtualClock()
+        self.transport = transport if transport is not None else NullTransport()
+        self.game = MahjongGame(room_id, self.transport, scheduler=self.clock, save_replays=False)
+        # 所有座位 sid 为 None：游戏视为断线并交给 AI 托管
+        spectators = (OBSERVER_PID,) if observe else ()
+        self.game.set_player_resolver(
+            lambda pid: OBSERVER_SID if pid == OBSERVER_PID and observe else None,
+            lambda pid: f'AI{pid}',
+            get_spectators=lambda room_id: spectators,
+        )
+        for pid in HEADLESS_PIDS:
+            self.game.add_player(pid)
+
+    def play_hand(self, seed: int | None = None, limit: int = 10_000) -> HandResult:
+        """打完一局；limit 为本局最多执行的定时器回调数（防止状态机卡死时无限运行）"""
+        game, clock = self.game, self.clock
+        dealer = game.player_ids[game.dealer_idx]
+        start_fired, start_now = clock.fired, clock.now
+
+        game.start_game(seed)
+        clock.run(until=lambda: game.phase == 'ended', limit=limit)
+        if game.phase != 'ended':
+            raise RuntimeError(f'第 {seed} 局在 {limit} 次回调内未结束（阶段 {game.phase}）')
+        # 本局遗留的定时器（已失效的 AI 回调、超时）作废，不带入下一局
+        game.cancel_timers()
+
+        outcome = game.result
+        result = HandResult(
+            seed=game.wall.seed,
+            dealer=dealer,
+            winner=game.winner,
+            hu_type=outcome['hu_type'],
+            from_pid=outcome['from_pid'],
+            fan=outcome['fan'],
+            yaku=outcome['yaku'],
+            score_delta=dict(game.score_delta),
+            wall_left=len(game.wall),
+            timers=clock.fired - start_fired,
+            clock=clock.now - start_now,
+        )
+        # 与 events.py 的 request_new_game 相同：庄家轮换
+        game.dealer_idx = (game.dealer_idx + 1) % len(game.player_ids)
+        return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='无界面自对局（AI 托管四家）')
+    parser.add_argument('-n', type=int, default=1000, help='局数')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子（决定每局牌山种子）')
+    parser.add_argument('--events', action='store_true', help='以观察者身份记录房间事件并输出条数')
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    transport = MemoryTransport() if args.events else None
+    table = HeadlessTable(transport=transport, observe=args.events)
+    wins = 0
+    t0 = time.perf_counter()
+    for _ in range(args.n):
+        result = table.play_hand(rng.getrandbits(63))
+        wins += result.winner is not None
+    elapsed = time.perf_counter() - t0
+
+    print(f'{args.n} 局  和牌 {wins}  荒牌 {args.n - wins}  {elapsed:.2f}s  {args.n / elapsed:,.0f} 局/秒')
+    print(f'  虚拟时间 {table.clock.now:,.0f}s  积分 {table.game.scores}')
+    if isinstance(transport, MemoryTransport):
+        print(f'  事件 {len(transport.events)} 条')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,24 +1,58 @@
 """
 logic.py — 纯算法模块（无副作用，无 I/O，无网络）
 
-提供：
-  - is_winning_hand(hand)   判断是否和牌（支持标准4副+对、七对子）
+提供（字符串接口，入口处转换为 34 格计数向量）：
+  - is_winning_hand(hand)   判断是否和牌（支持标准4副+对、七对子；查表实现）
   - calculate_shanten(hand) 计算向听数（-1=和牌, 0=听牌, n=差n张）
   - get_winning_tiles(hand) 返回所有能让 13 张手牌和牌的进张列表
 
+提供（计数向量接口，下标为 tiles.py 中的整数牌 ID）：
+  - is_winning_counts(counts)
+  - calculate_shanten_counts(counts)
+  - get_winning_ids(counts)  直接由各门形状求进张（只试相邻牌，不做 34 次整手判断）
+  - analyze_win(counts, melds, win_tile)
+                            WinAnalysis：全部面子拆法 + 计分用牌种标志（判和与计分共用）
+  - analyze_waits(hand) / analyze_waits_counts(counts)
+                            进张 + 听牌形状（两面/嵌张/边张/双碰/单骑）
+  - analyze_discards(hand, visible_counts) / analyze_discards_counts(counts, visible_counts)
+                            每种出牌的向听数 + 进张 + 进张剩余枚数
+  - SHANTEN_ENGINE          向听数引擎开关（'table' 查表 / 'recursive' 回溯）
+
+结果缓存（以上三个判定各一个 LRU；和牌/听牌的花色同构手牌共享条目）：
+  - configure_cache(maxsize) 调整容量（0 = 关闭）
+  - cache_stats()           命中/未命中/淘汰计数，供监控使用
+  - clear_caches()          清空缓存与计数
+
 内部辅助：
   - _is_winning(counts)     递归回溯验证剩余牌是否能全部消耗
-  - _shanten_normal(counts) 标准手型向听数
+  - _is_winning_hand_backtrack(hand) 回溯版和牌判断（查表版的对照实现）
+  - _build_agari_table(...) 启动时枚举单花色和牌形状，生成 5 进制键集合
+  - _shanten_normal(counts) 标准手型向听数（回溯搜索版）
+  - _shanten_normal_table(counts) 标准手型向听数（按花色查表版，结果与回溯版一致）
   - _shanten_chiitoitsu(counts) 七对子向听数
   - _shanten_kokushi(counts) 国士无双向听数（基础支持）
 """
 
 from __future__ import annotations
 
-from collections import Counter
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
 from functools import lru_cache
+from itertools import product
+from typing import Sequence
 
-from tiles import tile_sort_key, NUMBER_SUITS, ALL_TILES
+from tiles import (
+    tile_sort_key,
+    HONOR_START,
+    NUMBER_SUITS,
+    NUM_TILE_KINDS,
+    ID_TILES,
+    TILE_IDS,
+    TERMINAL_HONOR_IDS,
+    GREEN_IDS,
+    counts_of,
+    counts_to_tiles,
+)
 
 
 # ─── 和牌判断 ─────────────────────────────────────────────────────
@@ -67,14 +101,10 @@ def _is_winning(counts: dict[str, int]) -> bool:
     return False
 
 
-def is_winning_hand(hand: list[str]) -> bool:
+def _is_winning_hand_backtrack(hand: list[str]) -> bool:
     """
-    判断手牌是否和牌。
-    hand：实际手牌列表（已扣除副露取走的牌），长度 mod 3 必须为 2。
-
-    支持：
-      - 标准和牌：4 副（顺/刻）+ 1 对（雀头）
-      - 七对子（Chiitoitsu）：7 对不同的对子（14 张）
+    判断手牌是否和牌（回溯版）。
+    保留作为查表版的对照实现，也用于超出表范围的手牌。
     """
     total = len(hand)
     if total % 3 != 2:
@@ -99,6 +129,318 @@ def is_winning_hand(hand: list[str]) -> bool:
     return False
 
 
+# ─── 结果缓存 ─────────────────────────────────────────────────────
+# 键为 34 格计数的打包字节串（每格 1 字节），条目按 LRU 淘汰。
+# 和牌 / 听牌只与各花色的形状有关：m/p/s 三门互换后结果不变（听牌随花色
+# 一起换位），因此三门数牌按字节序排序后拼接成规范键，同构手牌共享条目。
+# 向听数的剪枝与花色处理顺序有关（同构手牌可能相差 1），只用原始键。
+
+HAND_CACHE_SIZE = 65536   # 每个缓存的默认容量
+
+
+class _HandCache:
+    """带容量上限的 LRU 缓存，附命中/未命中/淘汰计数"""
+
+    __slots__ = ('name', 'maxsize', 'data', 'hits', 'misses', 'evictions')
+
+    def __init__(self, name: str, maxsize: int) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.data: OrderedDict[bytes, object] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes):
+        value = self.data.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.data.move_to_end(key)
+        return value
+
+    def put(self, key: bytes, value) -> None:
+        self.data[key] = value
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def resize(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        while len(self.data) > maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.data.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_SHANTEN_CACHE = _HandCache('shanten', HAND_CACHE_SIZE)
+_AGARI_CACHE = _HandCache('agari', HAND_CACHE_SIZE)
+_WAITS_CACHE = _HandCache('waits', HAND_CACHE_SIZE)
+_HAND_CACHES = (_SHANTEN_CACHE, _AGARI_CACHE, _WAITS_CACHE)
+
+
+def _canonical_key(raw: bytes) -> bytes:
+    """打包后的规范键：三门数牌按字节序排序，字牌保持原位"""
+    return b''.join(sorted((raw[0:9], raw[9:18], raw[18:27]))) + raw[27:]
+
+
+def _suit_order(raw: bytes) -> list[int]:
+    """规范形中第 j 门对应原手牌的花色下标（与 _canonical_key 的排序一致）"""
+    return sorted(range(3), key=lambda s: raw[s * 9:s * 9 + 9])
+
+
+def configure_cache(maxsize: int = HAND_CACHE_SIZE) -> None:
+    """调整每个缓存的容量；0 表示关闭缓存（直接计算）"""
+    for cache in _HAND_CACHES:
+        cache.resize(max(0, maxsize))
+
+
+def cache_stats() -> dict[str, dict]:
+    """各缓存的容量与命中/未命中/淘汰计数"""
+    return {cache.name: cache.stats() for cache in _HAND_CACHES}
+
+
+def clear_caches() -> None:
+    """清空缓存内容与计数"""
+    for cache in _HAND_CACHES:
+        cache.clear()
+
+
+# ─── 和牌判断（查表）─────────────────────────────────────────────
+#
+# 一手标准和牌拆到每个花色后，每门要么全是面子（张数 ≡ 0 mod 3），
+# 要么是面子+雀头（张数 ≡ 2 mod 3），且只有一门带雀头。
+# 启动时枚举所有能完全拆解的单花色形状，按 5 进制键存入集合，
+# 判断和牌就只剩 4 次集合查询。
+
+_AGARI_MAX_MELDS = 4   # 单门最多 4 副面子（14 张）
+
+
+def _build_agari_table(size: int, honor: bool) -> frozenset[int]:
+    """枚举单花色所有「若干面子 + 至多一个雀头」的形状，返回其 5 进制键集合"""
+    melds: list[tuple[int, ...]] = []
+    for i in range(size):
+        melds.append(tuple(3 if k == i else 0 for k in range(size)))   # 刻子
+    if not honor:
+        for i in range(size - 2):
+            melds.append(tuple(1 if i <= k <= i + 2 else 0 for k in range(size)))  # 顺子
+
+    layer: set[tuple[int, ...]] = {tuple([0] * size)}
+    layer.update(tuple(2 if k == i else 0 for k in range(size)) for i in range(size))
+    shapes = set(layer)
+    for _ in range(_AGARI_MAX_MELDS):
+        nxt: set[tuple[int, ...]] = set()
+        for shape in layer:
+            for meld in melds:
+                cand = tuple(a + b for a, b in zip(shape, meld))
+                if max(cand) <= 4:
+                    nxt.add(cand)
+        shapes |= nxt
+        layer = nxt
+    return frozenset(_suit_key(shape) for shape in shapes)
+
+
+def _suit_key(cnts: tuple[int, ...]) -> int:
+    """单花色计数 -> 5 进制键（第 1 张为最低位）"""
+    key = 0
+    for c in reversed(cnts):
+        key = key * 5 + c
+    return key
+
+
+# 牌 ID -> 花色序号（字牌为 3）、该牌在 5 进制键中的位权
+_ID_SUIT: tuple[int, ...] = tuple(min(i // 9, 3) for i in range(NUM_TILE_KINDS))
+_ID_UNIT: tuple[int, ...] = tuple(5 ** (i - 9 * _ID_SUIT[i]) for i in range(NUM_TILE_KINDS))
+
+
+def _suit_keys(counts: bytearray) -> tuple[list[int], list[int]]:
+    """计数向量 -> ([万, 筒, 条, 字] 四门的 5 进制键, 四门各自的张数)"""
+    keys = [0, 0, 0, 0]
+    sizes = [0, 0, 0, 0]
+    for i, c in enumerate(counts):
+        if c:
+            si = _ID_SUIT[i]
+            keys[si] += c * _ID_UNIT[i]
+            sizes[si] += c
+    return keys, sizes
+
+
+def _decode_suit_key(key: int, honor: bool) -> tuple[int, ...]:
+    """5 进制键 -> 单花色计数元组"""
+    cnts = []
+    for _ in range(7 if honor else 9):
+        key, c = divmod(key, 5)
+        cnts.append(c)
+    return tuple(cnts)
+
+
+_AGARI_NUMBER_TABLE: frozenset[int] = _build_agari_table(9, honor=False)
+_AGARI_HONOR_TABLE: frozenset[int] = _build_agari_table(7, honor=True)
+
+
+def _is_agari_keys(keys: list[int], sizes: list[int]) -> bool:
+    """四门键全部可完全拆解，且恰好一门带雀头"""
+    return (
+        keys[0] in _AGARI_NUMBER_TABLE
+        and keys[1] in _AGARI_NUMBER_TABLE
+        and keys[2] in _AGARI_NUMBER_TABLE
+        and keys[3] in _AGARI_HONOR_TABLE
+        and (sizes[0] % 3 == 2) + (sizes[1] % 3 == 2) + (sizes[2] % 3 == 2) + (sizes[3] % 3 == 2) == 1
+    )
+
+
+def is_winning_counts(counts: bytearray) -> bool:
+    """
+    判断计数向量所代表的手牌是否和牌。
+    总张数 mod 3 必须为 2；支持标准和牌与七对子。
+    """
+    if not _AGARI_CACHE.maxsize:
+        return _is_winning_counts(counts)
+    key = _canonical_key(bytes(counts))
+    result = _AGARI_CACHE.get(key)
+    if result is None:
+        result = _is_winning_counts(counts)
+        _AGARI_CACHE.put(key, result)
+    return result
+
+
+def _is_winning_counts(counts: bytearray) -> bool:
+    """is_winning_counts 的实际计算（不经过缓存）"""
+    total = sum(counts)
+    if total % 3 != 2:
+        return False
+    if total > 14:
+        return _is_winning_hand_backtrack(counts_to_tiles(counts))
+
+    keys, sizes = _suit_keys(counts)
+    if _is_agari_keys(keys, sizes):
+        return True
+
+    # 七对子（仅 14 张时检测，7张不重复的对子）
+    return total == 14 and sum(1 for c in counts if c >= 2) == 7
+
+
+def is_winning_hand(hand: list[str]) -> bool:
+    """
+    判断手牌是否和牌。
+    hand：实际手牌列表（已扣除副露取走的牌），长度 mod 3 必须为 2。
+
+    支持：
+      - 标准和牌：4 副（顺/刻）+ 1 对（雀头）
+      - 七对子（Chiitoitsu）：7 对不同的对子（14 张）
+    """
+    if len(hand) % 3 != 2:
+        return False
+    return is_winning_counts(counts_of(hand))
+
+
+def get_winning_ids(counts: bytearray) -> list[int]:
+    """
+    对一手 3n+1 张牌（计数向量，含副露后的 10/7/4/1 张），
+    返回能让其和牌的所有进张 ID（升序）。
+    手中已有 4 张的牌不可能再摸到，不计入。
+    """
+    if sum(counts) % 3 != 1:
+        return []
+    if not _WAITS_CACHE.maxsize:
+        return _get_winning_ids(counts)
+
+    # 缓存中存放的是规范形下的 ID，取出时按花色排列映射回原手牌
+    raw = bytes(counts)
+    order = _suit_order(raw)
+    key = _canonical_key(raw)
+    canonical = _WAITS_CACHE.get(key)
+    if canonical is None:
+        result = _get_winning_ids(counts)
+        rank = {s: j for j, s in enumerate(order)}
+        canonical = tuple(sorted(
+            t if t >= HONOR_START else rank[t // 9] * 9 + t % 9 for t in result
+        ))
+        _WAITS_CACHE.put(key, canonical)
+        return result
+    return sorted(t if t >= HONOR_START else order[t // 9] * 9 + t % 9 for t in canonical)
+
+
+def _get_winning_ids_brute(counts: bytearray) -> list[int]:
+    """逐一试摸 34 种牌做和牌判断（_get_winning_ids 的对照实现）"""
+    result: list[int] = []
+    for tid in range(NUM_TILE_KINDS):
+        if counts[tid] >= 4:
+            continue
+        counts[tid] += 1
+        if _is_winning_counts(counts):
+            result.append(tid)
+        counts[tid] -= 1
+    return result
+
+
+_AGARI_TABLES = (_AGARI_NUMBER_TABLE, _AGARI_NUMBER_TABLE, _AGARI_NUMBER_TABLE, _AGARI_HONOR_TABLE)
+
+
+def _get_winning_ids(counts: bytearray) -> list[int]:
+    """
+    get_winning_ids 的实际计算（不经过缓存）。
+
+    摸进一张只改变一门的形状，其余三门必须已经能完全拆解：
+      - 不能拆解的花色超过一门 → 标准形不可能听牌，只剩七对子单骑
+      - 恰好一门 → 只在这一门里找
+      - 没有 → 在所有有牌的花色里找（如双碰）
+    每门只试与手牌相邻（±2）的数牌、或手中已有的字牌，
+    摸进后只需查这一门的新键和雀头数，不再做整手判断。
+    """
+    total = sum(counts)
+    if total > 13:
+        return _get_winning_ids_brute(counts)
+
+    keys, sizes = _suit_keys(counts)
+    broken = [si for si in range(4) if keys[si] not in _AGARI_TABLES[si]]
+    result: set[int] = set()
+
+    if len(broken) <= 1:
+        heads = (sizes[0] % 3 == 2) + (sizes[1] % 3 == 2) + (sizes[2] % 3 == 2) + (sizes[3] % 3 == 2)
+        for si in (broken or [si for si in range(4) if sizes[si]]):
+            # 这一门摸进一张后，其余三门的雀头数不变
+            other_heads = heads - (sizes[si] % 3 == 2)
+            head_after = (sizes[si] + 1) % 3 == 2
+            if other_heads + head_after != 1:
+                continue
+            table = _AGARI_TABLES[si]
+            for t in _suit_draw_candidates(counts, si):
+                if counts[t] < 4 and keys[si] + _ID_UNIT[t] in table:
+                    result.add(t)
+
+    # 七对子：6 个对子 + 1 张单张，单骑那一张
+    if total == 13 and sum(1 for c in counts if c >= 2) == 6:
+        result.update(t for t in range(NUM_TILE_KINDS) if counts[t] == 1)
+    return sorted(result)
+
+
+def _suit_draw_candidates(counts: bytearray, si: int) -> list[int]:
+    """某一门中可能让该门成形的进张：数牌为手牌 ±2 以内，字牌为手中已有的牌"""
+    if si == 3:
+        return [t for t in range(HONOR_START, NUM_TILE_KINDS) if counts[t]]
+    base = si * 9
+    return [
+        t for t in range(base, base + 9)
+        if any(counts[j] for j in range(max(base, t - 2), min(base + 8, t + 2) + 1))
+    ]
+
+
 def get_winning_tiles(hand: list[str]) -> list[str]:
     """
     对一手 13 张牌，返回能让其和牌的所有「进张」列表。
@@ -106,18 +448,300 @@ def get_winning_tiles(hand: list[str]) -> list[str]:
     """
     if len(hand) != 13:
         return []
-    result = []
-    seen: set[str] = set()
-    for tile in ALL_TILES:
-        if tile in seen:
-            continue
-        seen.add(tile)
-        test_hand = hand + [tile]
-        if is_winning_hand(test_hand):
-            result.append(tile)
+    return [ID_TILES[i] for i in get_winning_ids(counts_of(hand))]
+
+
+# ─── 听牌形状分类 ─────────────────────────────────────────────────
+
+# 听牌形状（同一张进张可能同时属于多种，按此顺序列出）
+WAIT_SHAPES: tuple[str, ...] = ('ryanmen', 'kanchan', 'penchan', 'shanpon', 'tanki')
+
+
+@dataclass
+class WaitInfo:
+    """一张进张及其听牌形状"""
+    tile_id: int                    # 进张
+    shapes: tuple[str, ...]         # 两面/嵌张/边张/双碰/单骑（WAIT_SHAPES 的子集）
+
+    @property
+    def tile(self) -> str:
+        return ID_TILES[self.tile_id]
+
+
+@lru_cache(maxsize=None)
+def _suit_decompositions(
+    cnts: tuple[int, ...],
+    honor: bool,
+) -> tuple[tuple[int, tuple[tuple[str, int], ...]], ...]:
+    """
+    单花色完整形状的所有拆法：(雀头位置 或 -1, (('k'|'s', 起始位置), ...))。
+    k = 刻子，s = 顺子。
+    """
+    found: set[tuple[int, tuple[tuple[str, int], ...]]] = set()
+    c = list(cnts)
+    melds: list[tuple[str, int]] = []
+
+    def walk(start: int, pair: int) -> None:
+        i = start
+        while i < len(c) and not c[i]:
+            i += 1
+        if i == len(c):
+            found.add((pair, tuple(melds)))
+            return
+        if c[i] >= 3:
+            c[i] -= 3
+            melds.append(('k', i))
+            walk(i, pair)
+            melds.pop()
+            c[i] += 3
+        if not honor and i + 2 < len(c) and c[i + 1] and c[i + 2]:
+            c[i] -= 1; c[i + 1] -= 1; c[i + 2] -= 1
+            melds.append(('s', i))
+            walk(i, pair)
+            melds.pop()
+            c[i] += 1; c[i + 1] += 1; c[i + 2] += 1
+        if pair < 0 and c[i] >= 2:
+            c[i] -= 2
+            walk(i, i)
+            c[i] += 2
+
+    walk(0, -1)
+    return tuple(sorted(found))
+
+
+def _classify_wait(cnts: tuple[int, ...], pos: int, honor: bool) -> set[str]:
+    """和牌后的单花色形状中，位置 pos 的进张在各种拆法里扮演的听牌形状"""
+    shapes: set[str] = set()
+    for pair, melds in _suit_decompositions(cnts, honor):
+        if pair == pos:
+            shapes.add('tanki')
+        for kind, a in melds:
+            if kind == 'k':
+                if a == pos:
+                    shapes.add('shanpon')
+            elif a == pos - 1:
+                shapes.add('kanchan')
+            elif a == pos:
+                # 摸进的是顺子最小的一张：等待 (pos+1, pos+2)，89 等 7 为边张
+                shapes.add('penchan' if a == 6 else 'ryanmen')
+            elif a == pos - 2:
+                # 摸进的是顺子最大的一张：等待 (a, a+1)，12 等 3 为边张
+                shapes.add('penchan' if a == 0 else 'ryanmen')
+    return shapes
+
+
+def analyze_waits_counts(counts: bytearray) -> list[WaitInfo]:
+    """
+    对一手 3n+1 张牌（计数向量），返回每张进张及其听牌形状（按牌序）。
+    进张由 get_winning_ids 直接求出；形状只需拆解进张所在的那一门。
+    七对子和牌记为单骑。
+    """
+    waits = get_winning_ids(counts)
+    if not waits:
+        return []
+    keys, sizes = _suit_keys(counts)
+    chiitoitsu = sum(counts) == 13 and sum(1 for c in counts if c >= 2) == 6
+
+    result: list[WaitInfo] = []
+    for t in waits:
+        si = _ID_SUIT[t]
+        honor = si == 3
+        shapes: set[str] = set()
+        after = keys[si] + _ID_UNIT[t]
+        if after in _AGARI_TABLES[si] or sum(counts) > 13:
+            shapes = _classify_wait(_decode_suit_key(after, honor), t - si * 9, honor)
+        if chiitoitsu and counts[t] == 1:
+            shapes.add('tanki')
+        result.append(WaitInfo(t, tuple(s for s in WAIT_SHAPES if s in shapes)))
     return result
 
 
+def analyze_waits(hand: list[str]) -> list[WaitInfo]:
+    """字符串接口：3n+1 张手牌的进张与听牌形状"""
+    if len(hand) % 3 != 1:
+        return []
+    return analyze_waits_counts(counts_of(hand))
+
+
+# ─── 和牌分析（判和与计分共用）──────────────────────────────────────
+
+_TERMINAL_HONOR_SET: frozenset[int] = frozenset(TERMINAL_HONOR_IDS)
+_GREEN_SET: frozenset[int] = frozenset(GREEN_IDS)
+
+# 一手牌的面子拆法：(雀头 ID, ((牌ID, 牌ID, 牌ID), ...))
+Decomposition = tuple[int, tuple[tuple[int, int, int], ...]]
+
+
+@dataclass
+class WinAnalysis:
+    """
+    一手牌（不含副露的手牌 + 副露）的拆解结果与牌种标志，由 analyze_win 一次算出。
+    判和与 scorer.evaluate_hand 共用，计分时不再重新拆牌、重新扫描。
+    """
+    counts: bytearray                               # 手牌（不含副露）计数向量
+    all_counts: bytearray                           # 手牌 + 副露 计数向量
+    melds: list[dict] = field(default_factory=list)
+    win_tile: int | None = None                     # 和了牌 ID
+
+    # 拆解
+    decompositions: tuple[Decomposition, ...] = ()  # 手牌的全部 雀头+面子 拆法
+    is_chiitoitsu: bool = False                     # 手牌为 7 个不同对子
+
+    # 牌种标志（手牌 / 含副露）
+    suits_in_hand: frozenset[int] = frozenset()     # 出现的数牌花色（0=万 1=筒 2=条）
+    suits_in_all: frozenset[int] = frozenset()
+    has_honor_in_hand: bool = False
+    has_honor_in_all: bool = False
+    has_terminal_in_hand: bool = False              # 含幺九牌（1/9/字牌）
+    has_terminal_in_all: bool = False
+    has_terminal_in_open: bool = False              # 明副露（暗杠除外）含幺九
+    all_terminal_honor: bool = True                 # 全部为幺九牌
+    all_green: bool = True                          # 全部为绿牌
+    all_number: bool = True                         # 没有字牌
+    all_honor: bool = True                          # 没有数牌
+
+    # 位掩码（第 i 位 = 牌 ID i），供 scorer 的编译版番种判定使用
+    tile_mask: int = 0                              # 手牌 + 副露中出现的牌
+    hand_mask: int = 0                              # 手牌中出现的牌
+    triplet_mask: int = 0                           # 手牌 + 副露中 >=3 张的牌
+
+    # 副露 / 暗刻
+    is_menzen: bool = True                          # 没有明副露
+    ankan_count: int = 0                            # 暗杠数
+    hand_ankan: int = 0                             # 手牌中 >=3 张的牌种数
+    open_melds: list[dict] = field(default_factory=list)
+
+    @property
+    def has_open_meld(self) -> bool:
+        return bool(self.open_melds)
+
+    @property
+    def is_winning(self) -> bool:
+        """手牌能拆成 雀头+面子，或为七对子"""
+        return bool(self.decompositions) or self.is_chiitoitsu
+
+
+@lru_cache(maxsize=None)
+def _suit_decompositions_by_key(key: int, si: int) -> tuple[Decomposition, ...]:
+    """第 si 门（5 进制键）的全部拆法，位置已换成牌 ID；雀头为 -1 表示该门不含雀头"""
+    honor = si == 3
+    base = si * 9
+    return tuple(
+        (
+            base + pair if pair >= 0 else -1,
+            tuple((base + a,) * 3 if kind == 'k' else (base + a, base + a + 1, base + a + 2)
+                  for kind, a in melds),
+        )
+        for pair, melds in _suit_decompositions(_decode_suit_key(key, honor), honor)
+    )
+
+
+def _hand_decompositions(counts: bytearray) -> tuple[Decomposition, ...]:
+    """手牌（3n+2 张）的全部 雀头+面子 拆法：逐门取单花色拆法，再按「恰好一个雀头」组合"""
+    if sum(counts) % 3 != 2:
+        return ()
+    keys, sizes = _suit_keys(counts)
+    per_suit: list[tuple[Decomposition, ...]] = []
+    for si in range(4):
+        if not sizes[si]:
+            continue
+        options = _suit_decompositions_by_key(keys[si], si)
+        if not options:
+            return ()
+        per_suit.append(options)
+
+    result: list[Decomposition] = []
+    for combo in product(*per_suit):
+        pairs = [pair for pair, _ in combo if pair >= 0]
+        if len(pairs) == 1:
+            result.append((pairs[0], tuple(m for _, melds in combo for m in melds)))
+    return tuple(result)
+
+
+def analyze_win(counts: bytearray, melds: list[dict], win_tile: str | None = None) -> WinAnalysis:
+    """
+    一次算出 WinAnalysis：手牌的全部拆法、七对子、以及计分用的牌种标志。
+    counts：不含副露的手牌计数向量；melds：副露列表 [{'type': ..., 'tiles': [...]}]。
+    """
+    all_counts = bytearray(counts)
+    has_terminal_in_open = False
+    ankan_count = 0
+    open_melds: list[dict] = []
+    for m in melds:
+        is_open = m['type'] != 'angang'
+        if is_open:
+            open_melds.append(m)
+        else:
+            ankan_count += 1
+        for t in m['tiles']:
+            tid = TILE_IDS[t]
+            all_counts[tid] += 1
+            if is_open and tid in _TERMINAL_HONOR_SET:
+                has_terminal_in_open = True
+
+    # 一次扫描得到全部牌种标志与位掩码
+    suits_in_hand: set[int] = set()
+    suits_in_all: set[int] = set()
+    has_honor_in_hand = has_honor_in_all = False
+    has_terminal_in_hand = has_terminal_in_all = False
+    all_terminal_honor = all_green = True
+    hand_ankan = tile_mask = hand_mask = triplet_mask = 0
+    for i in range(NUM_TILE_KINDS):
+        a = all_counts[i]
+        if not a:
+            continue
+        c = counts[i]
+        bit = 1 << i
+        tile_mask |= bit
+        if c:
+            hand_mask |= bit
+            if c >= 3:
+                hand_ankan += 1
+        if a >= 3:
+            triplet_mask |= bit
+        if i >= HONOR_START:
+            has_honor_in_all = True
+            has_honor_in_hand = has_honor_in_hand or c > 0
+        else:
+            suits_in_all.add(i // 9)
+            if c:
+                suits_in_hand.add(i // 9)
+        if i in _TERMINAL_HONOR_SET:
+            has_terminal_in_all = True
+            has_terminal_in_hand = has_terminal_in_hand or c > 0
+        else:
+            all_terminal_honor = False
+        if i not in _GREEN_SET:
+            all_green = False
+
+    return WinAnalysis(
+        counts=bytearray(counts),
+        all_counts=all_counts,
+        melds=melds,
+        win_tile=TILE_IDS[win_tile] if win_tile else None,
+        decompositions=_hand_decompositions(counts),
+        is_chiitoitsu=sum(counts) == 14 and sum(1 for c in counts if c >= 2) == 7,
+        suits_in_hand=frozenset(suits_in_hand),
+        suits_in_all=frozenset(suits_in_all),
+        has_honor_in_hand=has_honor_in_hand,
+        has_honor_in_all=has_honor_in_all,
+        has_terminal_in_hand=has_terminal_in_hand,
+        has_terminal_in_all=has_terminal_in_all,
+        has_terminal_in_open=has_terminal_in_open,
+        all_terminal_honor=all_terminal_honor,
+        all_green=all_green,
+        all_number=not has_honor_in_all,
+        all_honor=not suits_in_all,
+        tile_mask=tile_mask,
+        hand_mask=hand_mask,
+        triplet_mask=triplet_mask,
+        is_menzen=not open_melds,
+        ankan_count=ankan_count,
+        hand_ankan=hand_ankan,
+        open_melds=open_melds,
+    )
+
+
 # ─── 向听数计算（标准三合一算法）────────────────────────────────
 
 def _shanten_normal(counts: dict[str, int], total_tiles: int) -> int:
@@ -188,40 +812,498 @@ def _shanten_normal(counts: dict[str, int], total_tiles: int) -> int:
     return best[0]
 
 
-def _shanten_chiitoitsu(counts: dict[str, int]) -> int:
+# ─── 向听数计算（按花色查表）────────────────────────────────────
+#
+# 回溯版总是先处理最小的牌，因此搜索路径天然按 万→筒→条→字 分段，
+# 每段只与该花色自身的 9（字牌 7）个计数有关。
+# 把每个花色的计数编码为 5 进制整数作为键，预先求出该花色的搜索摘要：
+#   (不取雀头时最多能组成的 面子+搭子 数,
+#    ((取雀头前已组成的 面子+搭子 数, 该花色总 面子+搭子 数), ...))
+# 四个花色的摘要按回溯版的剪枝规则组合即可得到相同的向听数。
+
+# 向听数引擎开关：'table'（查表，默认）| 'recursive'（回溯搜索）
+SHANTEN_ENGINE: str = 'table'
+
+_SUIT_STEP_LIMIT = 9   # 数牌每门 9 种
+
+# 花色键 -> 搜索摘要，首次遇到时计算并缓存
+_NUMBER_SUIT_TABLE: dict[int, tuple[int, tuple[tuple[int, int], ...]]] = {}
+_HONOR_SUIT_TABLE: dict[int, tuple[int, tuple[tuple[int, int], ...]]] = {}
+
+
+def _suit_steps(cnts: tuple[int, ...], honor: bool) -> list[tuple[str, tuple[int, ...]]]:
+    """
+    与 _shanten_normal 的 search 完全相同的单步展开（只看本花色）。
+    返回 [(步骤类型, 剩余计数)]，类型：'set'=面子/搭子，'pair'=雀头，'skip'=跳过。
+    """
+    i = next(k for k, c in enumerate(cnts) if c > 0)
+    steps: list[tuple[str, tuple[int, ...]]] = []
+
+    # 顺子
+    if not honor and i <= 6 and cnts[i + 1] >= 1 and cnts[i + 2] >= 1:
+        nc = list(cnts); nc[i] -= 1; nc[i + 1] -= 1; nc[i + 2] -= 1
+        steps.append(('set', tuple(nc)))
+
+    # 刻子
+    if cnts[i] >= 3:
+        nc = list(cnts); nc[i] -= 3
+        steps.append(('set', tuple(nc)))
+
+    # 雀头
+    if cnts[i] >= 2:
+        nc = list(cnts); nc[i] -= 2
+        steps.append(('pair', tuple(nc)))
+
+    # 顺搭（只取最近的一张）
+    if not honor:
+        for d in (1, 2):
+            if i + d < _SUIT_STEP_LIMIT and cnts[i + d] >= 1:
+                nc = list(cnts); nc[i] -= 1; nc[i + d] -= 1
+                steps.append(('set', tuple(nc)))
+                break
+
+    # 跳过最小牌
+    nc = list(cnts); nc[i] -= 1
+    steps.append(('skip', tuple(nc)))
+    return steps
+
+
+@lru_cache(maxsize=None)
+def _suit_max_sets(cnts: tuple[int, ...], honor: bool) -> int:
+    """本花色在不取雀头时最多能组成的 面子+搭子 数"""
+    if not any(cnts):
+        return 0
+    best = 0
+    for kind, nc in _suit_steps(cnts, honor):
+        if kind == 'pair':
+            continue
+        val = _suit_max_sets(nc, honor) + (1 if kind == 'set' else 0)
+        if val > best:
+            best = val
+    return best
+
+
+@lru_cache(maxsize=None)
+def _suit_pair_options(cnts: tuple[int, ...], honor: bool) -> tuple[tuple[int, int], ...]:
+    """
+    本花色取雀头的所有路径摘要：(取雀头前的 面子+搭子 数, 总 面子+搭子 数)。
+    只保留帕累托最优项（前者越小越好，后者越大越好）。
+    """
+    if not any(cnts):
+        return ()
+    options: set[tuple[int, int]] = set()
+    for kind, nc in _suit_steps(cnts, honor):
+        if kind == 'pair':
+            options.add((0, _suit_max_sets(nc, honor)))
+        elif kind == 'set':
+            options.update((kb + 1, k + 1) for kb, k in _suit_pair_options(nc, honor))
+        else:
+            options.update(_suit_pair_options(nc, honor))
+    return tuple(sorted(
+        (kb, k) for kb, k in options
+        if not any(kb2 <= kb and k2 >= k and (kb2, k2) != (kb, k) for kb2, k2 in options)
+    ))
+
+
+def _suit_entry(key: int, honor: bool) -> tuple[int, tuple[tuple[int, int], ...]]:
+    """按 5 进制键查表，未命中时计算并写入表"""
+    table = _HONOR_SUIT_TABLE if honor else _NUMBER_SUIT_TABLE
+    entry = table.get(key)
+    if entry is None:
+        cnts = _decode_suit_key(key, honor)
+        entry = (_suit_max_sets(cnts, honor), _suit_pair_options(cnts, honor))
+        table[key] = entry
+    return entry
+
+
+def _shanten_normal_table(counts: bytearray, total_tiles: int) -> int:
+    """
+    标准手型向听数（查表版），返回值与 _shanten_normal 完全一致。
+
+    回溯版的估值为 need - (面子+搭子) - 雀头，面子+搭子 达到 need 后停止展开，
+    因此只有在达到 need 之前已取雀头，才能得到 -1。
+    """
+    keys, _ = _suit_keys(counts)
+    return _shanten_from_keys(keys, total_tiles)
+
+
+def _shanten_from_keys(keys: list[int], total_tiles: int) -> int:
+    """由四门 5 进制键组合出标准手型向听数（_shanten_normal_table 的主体）"""
+    need_melds = (total_tiles - 2) // 3
+    if need_melds <= 0:
+        # 根节点即被剪枝
+        return min(need_melds * 2, need_melds)
+
+    entries = (
+        _NUMBER_SUIT_TABLE.get(keys[0]) or _suit_entry(keys[0], False),
+        _NUMBER_SUIT_TABLE.get(keys[1]) or _suit_entry(keys[1], False),
+        _NUMBER_SUIT_TABLE.get(keys[2]) or _suit_entry(keys[2], False),
+        _HONOR_SUIT_TABLE.get(keys[3]) or _suit_entry(keys[3], True),
+    )
+    return _shanten_from_entries(entries, need_melds)
+
+
+def _shanten_from_entries(
+    entries: Sequence[tuple[int, tuple[tuple[int, int], ...]]], need_melds: int,
+) -> int:
+    """由四门花色摘要组合出标准手型向听数（need_melds > 0）"""
+    total_sets = entries[0][0] + entries[1][0] + entries[2][0] + entries[3][0]
+    best = need_melds - min(total_sets, need_melds)   # 不取雀头
+
+    before = 0   # 之前各花色（不取雀头）最多的 面子+搭子 数
+    for max_sets, pair_options in entries:
+        after = total_sets - before - max_sets
+        for kb, k in pair_options:
+            if kb >= need_melds:
+                continue
+            # 取雀头时累计数必须尚未达到 need
+            prefix = min(before, need_melds - 1 - kb)
+            if prefix + k + after >= need_melds:
+                return -1
+            reach = min(need_melds - 1, before + k + after)
+            if need_melds - reach - 1 < best:
+                best = need_melds - reach - 1
+        before += max_sets
+    return best
+
+
+def _shanten_chiitoitsu(counts: bytearray) -> int:
     """七对子向听数：6 - 已有对数"""
-    pairs = sum(1 for c in counts.values() if c >= 2)
+    pairs = sum(1 for c in counts if c >= 2)
     return 6 - pairs
 
 
-def _shanten_kokushi(counts: dict[str, int]) -> int:
+def _shanten_kokushi(counts: bytearray) -> int:
     """
     国士无双向听数：
     需要 1m,9m,1p,9p,1s,9s,z1~z7 各1张 + 其中任意1张重复作雀头
     """
-    yaochuhai = ['m1','m9','p1','p9','s1','s9','z1','z2','z3','z4','z5','z6','z7']
-    unique = sum(1 for t in yaochuhai if counts.get(t, 0) >= 1)
-    has_pair = any(counts.get(t, 0) >= 2 for t in yaochuhai)
+    unique = sum(1 for i in TERMINAL_HONOR_IDS if counts[i] >= 1)
+    has_pair = any(counts[i] >= 2 for i in TERMINAL_HONOR_IDS)
     return 13 - unique - (1 if has_pair else 0)
 
 
-def calculate_shanten(hand: list[str]) -> int:
+def calculate_shanten_counts(counts: bytearray) -> int:
     """
-    计算向听数。
+    计算计数向量的向听数。
       -1 = 已和牌
        0 = 听牌（差1张）
        n = 差 n 张
 
     同时考虑标准手型（4副+对）、七对子、国士无双。
     """
-    if not hand:
-        return 8
+    if not _SHANTEN_CACHE.maxsize:
+        return _calculate_shanten_counts(counts)
+    key = bytes(counts)
+    result = _SHANTEN_CACHE.get(key)
+    if result is None:
+        result = _calculate_shanten_counts(counts)
+        _SHANTEN_CACHE.put(key, result)
+    return result
 
-    counts = dict(Counter(hand))
-    total = len(hand)
 
-    std = _shanten_normal(counts, total)
+def _calculate_shanten_counts(counts: bytearray) -> int:
+    """calculate_shanten_counts 的实际计算（不经过缓存）"""
+    total = sum(counts)
+    if not total:
+        return 8
+
+    if SHANTEN_ENGINE == 'table':
+        std = _shanten_normal_table(counts, total)
+    else:
+        std = _shanten_normal({ID_TILES[i]: c for i, c in enumerate(counts) if c}, total)
     chii = _shanten_chiitoitsu(counts)
     koku = _shanten_kokushi(counts)
 
     return min(std, chii, koku)
+
+
+# ─── 出牌效率分析（向听数 + 进张）────────────────────────────────
+
+@dataclass
+class DiscardOption:
+    """打出某张牌后的结果"""
+    tile_id: int                    # 打出的牌
+    shanten: int                    # 打出后的向听数
+    accept_ids: tuple[int, ...]     # 进张（摸到后再打一张能使向听数下降的牌）
+    live: int                       # 进张在场上剩余的张数（扣除自己手牌和可见牌）
+
+    @property
+    def tile(self) -> str:
+        return ID_TILES[self.tile_id]
+
+    @property
+    def accepts(self) -> list[str]:
+        return [ID_TILES[i] for i in self.accept_ids]
+
+
+class _ShantenState:
+    """
+    可原地增减单张的向听数求值器。
+    四门键、七对子对数、国士的幺九种类/对子数均增量维护，
+    每次求值只需查 4 次花色表，供 analyze_discards 反复试牌。
+    """
+
+    __slots__ = ('counts', 'keys', 'total', 'pairs', 'koku_unique', 'koku_pairs')
+
+    def __init__(self, counts: bytearray) -> None:
+        self.counts = bytearray(counts)
+        self.keys, _ = _suit_keys(counts)
+        self.total = sum(counts)
+        self.pairs = sum(1 for c in counts if c >= 2)
+        self.koku_unique = sum(1 for i in TERMINAL_HONOR_IDS if counts[i] >= 1)
+        self.koku_pairs = sum(1 for i in TERMINAL_HONOR_IDS if counts[i] >= 2)
+
+    def add(self, i: int) -> None:
+        c = self.counts[i] + 1
+        self.counts[i] = c
+        self.keys[_ID_SUIT[i]] += _ID_UNIT[i]
+        self.total += 1
+        if c == 2:
+            self.pairs += 1
+        if i in _TERMINAL_HONOR_SET:
+            if c == 1:
+                self.koku_unique += 1
+            elif c == 2:
+                self.koku_pairs += 1
+
+    def remove(self, i: int) -> None:
+        c = self.counts[i] - 1
+        self.counts[i] = c
+        self.keys[_ID_SUIT[i]] -= _ID_UNIT[i]
+        self.total -= 1
+        if c == 1:
+            self.pairs -= 1
+        if i in _TERMINAL_HONOR_SET:
+            if c == 0:
+                self.koku_unique -= 1
+            elif c == 1:
+                self.koku_pairs -= 1
+
+    def value(self) -> int:
+        """与 calculate_shanten_counts 相同的结果"""
+        if not self.total:
+            return 8
+        std = _shanten_from_keys(self.keys, self.total)
+        chii = 6 - self.pairs
+        koku = 13 - self.koku_unique - (1 if self.koku_pairs else 0)
+        return min(std, chii, koku)
+
+
+def _draw_candidates(counts: bytearray) -> list[int]:
+    """
+    可能成为进张的牌：手中数牌同门 ±2 以内的牌、手中已有的字牌、以及所有幺九牌（国士）。
+    与手牌毫无关联的孤张摸进来只能被跳过，不可能降低向听数。
+    """
+    cand: set[int] = set(TERMINAL_HONOR_IDS)
+    for i in range(NUM_TILE_KINDS):
+        if not counts[i]:
+            continue
+        if _ID_SUIT[i] == 3:
+            cand.add(i)
+            continue
+        base = i - i % 9
+        for j in range(max(base, i - 2), min(base + 8, i + 2) + 1):
+            cand.add(j)
+    return sorted(cand)
+
+
+# ── 换一张后的最优向听（进张判定）──
+# 进张判定要对「摸进 t 后再打任意一张 d」取最小向听。把每门花色摘要按 need 截断
+# （面子+搭子 超过 need 的部分对组合结果没有影响）后编号，再为每门记下「去掉本门
+# 任意一张」能得到的截断摘要（只留帕累托最优项），两者合称该门的视图。
+# 对 d 取最小的结果只取决于四门视图，按视图编号缓存；截断后视图种类很少，命中率很高。
+
+_SuitEntry = tuple[int, tuple[tuple[int, int], ...]]
+
+_CAPPED_IDS: dict[_SuitEntry, int] = {}
+_CAPPED_ENTRIES: list[_SuitEntry] = []
+_SUIT_CAPPED: dict[tuple[int, bool, int], int] = {}                 # (键, 字牌, need) -> 截断摘要编号
+_VIEW_IDS: dict[tuple[int, tuple[int, ...]], int] = {}
+_VIEWS: list[tuple[int, tuple[int, ...]]] = []                      # (截断摘要, 去一张后的截断摘要)
+_SUIT_VIEWS: dict[tuple[int, bool, int], int] = {}                  # (键, 字牌, need) -> 视图编号
+_AFTER_DISCARD: dict[tuple[int, int, int, int, int], int] = {}      # (四门视图, need) -> 最小向听
+
+
+def _capped_dominates(a: _SuitEntry, b: _SuitEntry) -> bool:
+    """截断摘要 a 在任何组合中都不劣于 b"""
+    return a[0] >= b[0] and all(
+        any(kb2 <= kb and k2 >= k for kb2, k2 in a[1]) for kb, k in b[1]
+    )
+
+
+def _suit_capped(key: int, honor: bool, need: int) -> int:
+    """花色键按 need 截断后的摘要编号"""
+    ck = (key, honor, need)
+    cid = _SUIT_CAPPED.get(ck)
+    if cid is None:
+        max_sets, pair_options = _suit_entry(key, honor)
+        options = {(kb, min(k, need)) for kb, k in pair_options if kb < need}
+        capped = (min(max_sets, need), tuple(sorted(
+            (kb, k) for kb, k in options
+            if not any(kb2 <= kb and k2 >= k and (kb2, k2) != (kb, k) for kb2, k2 in options)
+        )))
+        cid = _CAPPED_IDS.get(capped)
+        if cid is None:
+            cid = _CAPPED_IDS[capped] = len(_CAPPED_ENTRIES)
+            _CAPPED_ENTRIES.append(capped)
+        _SUIT_CAPPED[ck] = cid
+    return cid
+
+
+def _suit_view(key: int, honor: bool, need: int) -> int:
+    """花色键的视图编号：本门截断摘要 + 去掉任意一张后的截断摘要（已去掉被支配的项）"""
+    ck = (key, honor, need)
+    vid = _SUIT_VIEWS.get(ck)
+    if vid is None:
+        found: set[int] = set()
+        unit, rest = 1, key
+        while rest:
+            if rest % 5:
+                found.add(_suit_capped(key - unit, honor, need))
+            rest //= 5
+            unit *= 5
+        # 截断摘要已规范化，不同编号不会互相支配
+        removals = tuple(sorted(
+            i for i in found
+            if not any(j != i and _capped_dominates(_CAPPED_ENTRIES[j], _CAPPED_ENTRIES[i])
+                       for j in found)
+        ))
+        view = (_suit_capped(key, honor, need), removals)
+        vid = _VIEW_IDS.get(view)
+        if vid is None:
+            vid = _VIEW_IDS[view] = len(_VIEWS)
+            _VIEWS.append(view)
+        _SUIT_VIEWS[ck] = vid
+    return vid
+
+
+def _std_after_discard(ck: tuple[int, int, int, int, int]) -> int:
+    """
+    标准手型：四门视图为 ck[:4] 的手牌再打出一张后的最小向听数（ck[4] 为 need，> 0）。
+    """
+    val = _AFTER_DISCARD.get(ck)
+    if val is None:
+        need = ck[4]
+        held = [_VIEWS[v][0] for v in ck[:4]]
+        val = need
+        for si in range(4):
+            for rid in _VIEWS[ck[si]][1]:
+                entries = [_CAPPED_ENTRIES[i] for i in held]
+                entries[si] = _CAPPED_ENTRIES[rid]
+                val = min(val, _shanten_from_entries(entries, need))
+        _AFTER_DISCARD[ck] = val
+    return val
+
+
+def _special_after_discard(counts: bytearray, pairs: int, koku_unique: int,
+                           koku_pairs: int, below: int) -> bool:
+    """七对子 / 国士：再打出一张后的最小向听数能否低于 below"""
+    # 七对子：打出对子以外的任意一张不损失对数
+    chii = 6 - pairs
+    if chii < below and (
+        chii + 1 < below or any(c and c != 2 for c in counts)
+    ):
+        return True
+    # 国士：打出非幺九、幺九的第三张、或（另有幺九对子时）幺九对子之一不损失
+    koku = 13 - koku_unique - (1 if koku_pairs else 0)
+    if koku < below:
+        if koku + 1 < below:
+            return True
+        for i, c in enumerate(counts):
+            if not c:
+                continue
+            if i not in _TERMINAL_HONOR_SET or c >= 3 or (c == 2 and koku_pairs >= 2):
+                return True
+    return False
+
+
+def analyze_discards_counts(
+    counts: bytearray,
+    visible_counts: bytearray | None = None,
+) -> list[DiscardOption]:
+    """
+    对一手 3n+2 张牌（计数向量），一次性分析每种可打出的牌：
+    打出后的向听数、进张列表、进张剩余枚数。
+
+    进张定义：摸到 t 后，再打出某张 d 能使向听数低于打出前。
+    每个 (x, t) 只做一次增量换牌；对 d 取最小由 _std_after_discard（按四门视图
+    查表）和 _special_after_discard（七对子/国士的闭式判定）完成，
+    总代价为 O(|出牌| × |候选进张|)。
+
+    返回按 (向听数升序, 剩余进张降序, 牌序) 排好的列表。
+    """
+    visible = visible_counts if visible_counts is not None else bytearray(NUM_TILE_KINDS)
+    state = _ShantenState(counts)
+    present = [i for i in range(NUM_TILE_KINDS) if counts[i]]
+    candidates = _draw_candidates(counts)
+    hand_counts = state.counts
+    keys = state.keys
+
+    # 摸进再打出后仍是 total - 1 张
+    need = (state.total - 3) // 3
+
+    options: list[DiscardOption] = []
+    for x in present:
+        state.remove(x)
+        base = state.value()
+        accepts: list[int] = []
+        live = 0
+        if need > 0:
+            held = [_suit_view(key, si == 3, need) for si, key in enumerate(keys)]
+        for t in candidates:
+            c = hand_counts[t]
+            if c >= 4:
+                continue
+            # 七对子 / 国士的下界都够不着 base 时不必改动手牌
+            pairs = state.pairs + (c == 1)
+            unique = state.koku_unique + (c == 0 and t in _TERMINAL_HONOR_SET)
+            if 6 - pairs < base or 12 - unique < base:
+                state.add(t)
+                special = _special_after_discard(hand_counts, state.pairs, state.koku_unique,
+                                                 state.koku_pairs, base)
+                state.remove(t)
+            else:
+                special = False
+            if special:
+                accepted = True
+            elif need > 0:
+                si = _ID_SUIT[t]
+                views = held.copy()
+                views[si] = _suit_view(keys[si] + _ID_UNIT[t], si == 3, need)
+                accepted = _std_after_discard((views[0], views[1], views[2], views[3], need)) < base
+            else:
+                # 张数过少时标准手型向听数与打哪张无关
+                accepted = min(need * 2, need) < base
+            if accepted:
+                accepts.append(t)
+                live += max(0, 4 - counts[t] - visible[t])
+        state.add(x)
+        options.append(DiscardOption(x, base, tuple(accepts), live))
+
+    options.sort(key=lambda o: (o.shanten, -o.live, o.tile_id))
+    return options
+
+
+def analyze_discards(hand: list[str], visible_counts: bytearray | None = None) -> list[DiscardOption]:
+    """
+    字符串接口：对手牌中每种可打出的牌给出 向听数 / 进张 / 进张剩余枚数。
+    visible_counts：场上可见牌（全场弃牌 + 副露）的 34 格计数向量，可省略。
+    """
+    if len(hand) % 3 != 2:
+        return []
+    return analyze_discards_counts(counts_of(hand), visible_counts)
+
+
+def calculate_shanten(hand: list[str]) -> int:
+    """
+    计算向听数。
+      -1 = 已和牌
+       0 = 听牌（差1张）
+       n = 差 n 张
+
+    同时考虑标准手型（4副+对）、七对子、国士无双。
+    """
+    if not hand:
+        return 8
+    return calculate_shanten_counts(counts_of(hand))
@@ -25,12 +25,13 @@ class ReplayRecorder:
       - start_time: 开始时间
       - players: 玩家列表
       - initial_hands: 初始手牌
-      - wall: 初始牌山
+      - seed: 牌山种子（tiles.Wall(seed) 可重建同一牌山）
+      - wall: 初始牌山（发牌后剩余，供前端回放逐张展示）
       - actions: 操作序列
       - result: 对局结果
     """
 
-    VERSION: int = 1
+    VERSION: int = 2
 
     def __init__(self, game_id: str, players_info: list[dict[str, Any]]) -> None:
         """
@@ -53,22 +54,30 @@ class ReplayRecorder:
                 for p in players_info
             ],
             'initial_hands': {},
+            'seed': None,
             'wall': [],
             'actions': [],
             'result': None,
         }
         self._seq: int = 0
 
-    def set_initial_state(self, hands: dict[int, list[str]], wall: list[str]) -> None:
+    def set_initial_state(
+        self,
+        hands: dict[int, list[str]],
+        wall: list[str],
+        seed: int | None = None,
+    ) -> None:
         """
         记录初始手牌和牌山。
 
         Args:
             hands: {pid: [tile_code, ...]}
             wall: 牌山列表（剩余牌）
+            seed: 牌山种子（tiles.Wall 洗牌所用）
         """
         self._data['initial_hands'] = {str(pid): list(tiles) for pid, tiles in hands.items()}
         self._data['wall'] = list(wall)
+        self._data['seed'] = seed
 
     def record(self, action_type: str, pid: int, **kwargs: Any) -> None:
         """
@@ -3,6 +3,7 @@ room_manager.py — 全局房间与玩家注册表
 
 职责：
   - 维护 players / sid_map / games 三张全局字典
+  - 记录每个连接（sid）在握手时声明的客户端能力（如增量同步）
   - 提供统一的查询接口（get_sid / get_username / find_player_room 等）
   - 创建/查找/清理房间（RoomManager）
 
@@ -18,8 +19,10 @@ import random
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from game import MahjongGame
+    from ai_pool import AIPool
+    from game import MahjongGame, OutboxStats, Pacing
     from flask_socketio import SocketIO
+    from transport import TimerWheel
 
 
 class RoomManager:
@@ -37,6 +40,14 @@ class RoomManager:
         self._room_owners: dict[str, int] = {}
         # 观战者：room_id -> set of pid
         self._spectators: dict[str, set[int]] = {}
+        # 客户端能力：sid -> {选项名: 值}（连接时声明，断开时清除）
+        self._client_options: dict[str, dict[str, str]] = {}
+        # 已移除房间的发件箱计数（并入 /metrics 总数）
+        self._retired_outbox: 'OutboxStats | None' = None
+        # 所有房间共用的托管决策计算池（由 server.py 设置；None 时同步计算）
+        self.ai_pool: 'AIPool | None' = None
+        # 所有房间共用的时间轮（由 server.py 设置；None 时每个房间直接用 eventlet 定时器）
+        self.timers: 'TimerWheel | None' = None
 
     # ── 玩家注册 ──────────────────────────────────────────────────
     def new_player(self, sid: str, username: str | None = None) -> int:
@@ -61,8 +72,23 @@ class RoomManager:
 
     def remove_sid(self, sid: str) -> int | None:
         """根据 sid 移除映射，返回对应 pid（若存在）"""
+        self._client_options.pop(sid, None)
         return self._sid_map.pop(sid, None)
 
+    # ── 客户端能力 ────────────────────────────────────────────────
+    def set_client_options(self, sid: str, options: dict[str, str]) -> None:
+        """记录连接声明的客户端能力（只保留非空值）"""
+        opts = {k: v for k, v in options.items() if v}
+        if opts:
+            self._client_options[sid] = opts
+        else:
+            self._client_options.pop(sid, None)
+
+    def get_client_option(self, sid: str, key: str, default: str | None = None) -> str | None:
+        """查询连接的某项客户端能力；未声明时返回 default（旧客户端）"""
+        opts = self._client_options.get(sid)
+        return opts.get(key, default) if opts else default
+
     def disconnect_player(self, pid: int) -> None:
         """标记玩家为离线（保留数据以支持重连）"""
         if pid in self._players:
@@ -112,7 +138,13 @@ class RoomManager:
         return self._games.get(room_id) if room_id else None  # type: ignore
 
     def remove_game(self, room_id: str) -> None:
-        self._games.pop(room_id, None)
+        game = self._games.pop(room_id, None)
+        if game is not None:
+            game.cancel_timers()
+            if self._retired_outbox is None:
+                self._retired_outbox = game.outbox_stats
+            else:
+                self._retired_outbox.merge(game.outbox_stats)
         self._room_names.pop(room_id, None)
         self._room_owners.pop(room_id, None)
         self._spectators.pop(room_id, None)
@@ -124,16 +156,30 @@ class RoomManager:
                 return game
         return None
 
-    def make_room(self, socketio: 'SocketIO', room_name: str | None = None, owner_pid: int | None = None) -> 'MahjongGame':
-        """创建新房间，自动注入依赖"""
+    def make_room(
+        self,
+        socketio: 'SocketIO',
+        room_name: str | None = None,
+        owner_pid: int | None = None,
+        pacing: 'Pacing | None' = None,
+        spectator_delay: float = 0.0,
+    ) -> 'MahjongGame':
+        """
+        创建新房间，自动注入依赖。
+        pacing 为房间的托管节奏（默认 Pacing()），spectator_delay 为观战频道状态的延迟秒数。
+        """
         from game import MahjongGame
 
         rid = f'room_{random.randint(1000, 9999)}'
         while rid in self._games:
             rid = f'room_{random.randint(1000, 9999)}'
 
-        game = MahjongGame(rid, socketio)
-        game.set_player_resolver(self.get_sid, self.get_username)
+        game = MahjongGame(rid, socketio, scheduler=self.timers)
+        game.set_player_resolver(self.get_sid, self.get_username, self.get_client_option, self.get_spectators)
+        game.ai_pool = self.ai_pool
+        if pacing is not None:
+            game.pacing = pacing
+        game.spectator_delay = spectator_delay
         self._games[rid] = game
 
         # 房间名称
@@ -204,6 +250,25 @@ class RoomManager:
         """获取房间的观战者 pid 集合"""
         return self._spectators.get(room_id, set())
 
+    # ── 运行指标 ──────────────────────────────────────────────────
+    def outbox_stats(self) -> dict:
+        """所有房间（含已移除的）发件箱计数之和"""
+        from game import OutboxStats
+
+        total = OutboxStats()
+        if self._retired_outbox is not None:
+            total.merge(self._retired_outbox)
+        for game in self._games.values():
+            total.merge(game.outbox_stats)
+        return total.as_dict()
+
+    def timer_stats(self) -> dict:
+        """时间轮计数与每个房间的存活定时器数"""
+        return {
+            'wheel': self.timers.as_dict() if self.timers else None,
+            'rooms': {rid: game.timers.live for rid, game in self._games.items()},
+        }
+
     def is_spectator(self, pid: int, room_id: str) -> bool:
         """判断玩家是否是某房间的观战者"""
         return pid in self._spectators.get(room_id, set())
@@ -2,8 +2,10 @@
 scorer.py — 番型识别 + 简化计分
 
 提供：
-  - evaluate_hand(hand, melds, win_tile, hu_type, seat_wind, round_wind)
+  - evaluate_hand(win_analysis, win_tile=..., hu_type=..., seat_wind=..., round_wind=...)
     → HandResult(fan, score, yaku_list)
+    win_analysis 为 logic.analyze_win 的结果；也可传 (hand, melds) 现场分析
+    best=True 时在所有面子拆法中取得分最高者
   - Yaku 番种定义
   - 简化计分表
 
@@ -17,18 +19,25 @@ scorer.py — 番型识别 + 简化计分
 
 from __future__ import annotations
 
-from collections import Counter
 from dataclasses import dataclass, field
 from typing import Optional
 
-from tiles import UNICODE_MAP, NUMBER_SUITS, tile_sort_key
+from logic import WinAnalysis, analyze_win
+from tiles import (
+    GREEN_IDS,
+    HONOR_START,
+    NUM_TILE_KINDS,
+    TERMINAL_HONOR_IDS,
+    TILE_IDS,
+    counts_of,
+)
 
 
 # ── 数据结构 ────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(frozen=True)
 class Yaku:
-    """一个番种"""
+    """一个番种（不可变，编译版判定中全局共享同一实例）"""
     name: str           # 中文名
     fan: int            # 番数
     yakuman: bool = False  # 是否役满
@@ -79,164 +88,38 @@ def _score_for_fan(fan: int, is_yakuman: bool = False) -> int:
 
 
 # ── 手牌结构分析辅助 ──────────────────────────────────────────────
+# 拆牌与牌种标志由 logic.analyze_win 一次算出（WinAnalysis），这里只保留番种用的牌 ID
 
-def _decompose_hand(hand: list[str], melds: list[dict]) -> dict:
-    """
-    分析手牌结构，返回分析结果字典。
-    hand: 不含副露的手牌列表
-    melds: 副露列表 [{'type': 'peng'/'gang'/'angang'/'bugang', 'tiles': [...]}]
-    """
-    counts = Counter(hand)
-    all_tiles = hand[:]
-    for m in melds:
-        all_tiles.extend(m['tiles'])
-
-    all_counts = Counter(all_tiles)
-
-    # 花色分布
-    suits_in_hand = set()
-    for t in hand:
-        if t[0] in NUMBER_SUITS:
-            suits_in_hand.add(t[0])
-
-    suits_in_all = set()
-    for t in all_tiles:
-        if t[0] in NUMBER_SUITS:
-            suits_in_all.add(t[0])
-
-    # 是否有字牌
-    has_honor_in_hand = any(t[0] == 'z' for t in hand)
-    has_honor_in_all = any(t[0] == 'z' for t in all_tiles)
-
-    # 是否有幺九牌
-    def is_terminal(t: str) -> bool:
-        if t[0] == 'z':
-            return True
-        if t[0] in NUMBER_SUITS:
-            n = int(t[1:])
-            return n == 1 or n == 9
-        return False
-
-    has_terminal_in_hand = any(is_terminal(t) for t in hand)
-    has_terminal_in_all = any(is_terminal(t) for t in all_tiles)
-
-    # 判断是否全为数牌
-    all_number = all(t[0] in NUMBER_SUITS for t in all_tiles)
-
-    # 判断是否全为字牌
-    all_honor = all(t[0] == 'z' for t in all_tiles)
-
-    # 门清判定（没有明副露）
-    is_menzen = all(m['type'] in ('angang',) for m in melds)
-
-    # 暗刻数
-    ankan_count = sum(1 for m in melds if m['type'] == 'angang')
-    # 手牌中的暗刻
-    hand_ankan = sum(1 for t, c in counts.items() if c >= 3)
-
-    # 副露类型统计
-    open_melds = [m for m in melds if m['type'] not in ('angang',)]
-    has_open_meld = len(open_melds) > 0
-
-    return {
-        'counts': counts,
-        'all_counts': all_counts,
-        'all_tiles': all_tiles,
-        'suits_in_hand': suits_in_hand,
-        'suits_in_all': suits_in_all,
-        'has_honor_in_hand': has_honor_in_hand,
-        'has_honor_in_all': has_honor_in_all,
-        'has_terminal_in_hand': has_terminal_in_hand,
-        'has_terminal_in_all': has_terminal_in_all,
-        'all_number': all_number,
-        'all_honor': all_honor,
-        'is_menzen': is_menzen,
-        'ankan_count': ankan_count,
-        'hand_ankan': hand_ankan,
-        'open_melds': open_melds,
-        'has_open_meld': has_open_meld,
-        'is_terminal': is_terminal,
-    }
-
-
-def _try_decompose_to_melds(hand: list[str]) -> list[list[str]]:
-    """
-    将手牌分解为 雀头+面子（顺/刻）的所有可能组合。
-    返回面子列表的列表，每个面子是3张牌的列表。
-    """
-    if len(hand) % 3 != 2:
-        return []
-
-    results = []
-    counts = Counter(hand)
-
-    def _search(cnt: Counter, melds: list[list[str]]) -> None:
-        tiles = [t for t, c in cnt.items() if c > 0]
-        if not tiles:
-            results.append(melds[:])
-            return
-
-        tile = min(tiles, key=tile_sort_key)
-        suit = tile[0]
-        num = int(tile[1:])
-
-        # 顺子
-        if suit in NUMBER_SUITS and num <= 7:
-            t2, t3 = f'{suit}{num+1}', f'{suit}{num+2}'
-            if cnt.get(t2, 0) >= 1 and cnt.get(t3, 0) >= 1:
-                cnt[tile] -= 1; cnt[t2] -= 1; cnt[t3] -= 1
-                melds.append([tile, t2, t3])
-                _search(cnt, melds)
-                melds.pop()
-                cnt[tile] += 1; cnt[t2] += 1; cnt[t3] += 1
-
-        # 刻子
-        if cnt[tile] >= 3:
-            cnt[tile] -= 3
-            melds.append([tile, tile, tile])
-            _search(cnt, melds)
-            melds.pop()
-            cnt[tile] += 3
-
-        # 无法继续 → 此路不通
-        # 不需要跳过，因为外层会枚举雀头
-
-    # 枚举雀头
-    for pair_tile in list(counts.keys()):
-        if counts[pair_tile] >= 2:
-            counts[pair_tile] -= 2
-            _search(counts, [])
-            counts[pair_tile] += 2
-
-    return results
+# 风牌 / 三元牌 ID
+_WIND_IDS: dict[str, int] = {'东': TILE_IDS['z1'], '南': TILE_IDS['z2'], '西': TILE_IDS['z3'], '北': TILE_IDS['z4']}
+_DRAGON_IDS: tuple[tuple[int, str], ...] = (
+    (TILE_IDS['z5'], '中'), (TILE_IDS['z6'], '发'), (TILE_IDS['z7'], '白'),
+)
 
 
 # ── 番种检测函数 ──────────────────────────────────────────────────
 
-def _check_tanyao(info: dict, hand: list[str], melds: list[dict]) -> Optional[Yaku]:
+def _check_tanyao(info: WinAnalysis) -> Optional[Yaku]:
     """断幺九：不含幺九牌（1/9/字牌），且没有明副露含幺九"""
     # 手牌不能有幺九
-    if info['has_terminal_in_hand']:
+    if info.has_terminal_in_hand:
         return None
     # 明副露不能有幺九
-    for m in melds:
-        if m['type'] != 'angang':
-            for t in m['tiles']:
-                if info['is_terminal'](t):
-                    return None
+    if info.has_terminal_in_open:
+        return None
     return Yaku('断幺九', 1)
 
 
-def _check_zimo(info: dict, hu_type: str) -> Optional[Yaku]:
+def _check_zimo(info: WinAnalysis, hu_type: str) -> Optional[Yaku]:
     """自摸"""
     if hu_type == 'zimo':
         return Yaku('自摸', 1)
     return None
 
 
-def _check_menzen_zimo(info: dict, hu_type: str) -> Optional[Yaku]:
+def _check_menzen_zimo(info: WinAnalysis, hu_type: str) -> Optional[Yaku]:
     """门前清自摸：门清状态下自摸"""
-    if hu_type == 'zimo' and info['is_menzen']:
+    if hu_type == 'zimo' and info.is_menzen:
         return Yaku('门前清自摸', 1)
     return None
 
@@ -262,67 +145,63 @@ def _check_tianhu(hu_type: str, from_label: str) -> Optional[Yaku]:
     return None
 
 
-def _check_yakuhai(info: dict, hand: list[str], seat_wind: str, round_wind: str) -> list[Yaku]:
+def _check_yakuhai(info: WinAnalysis, seat_wind: str, round_wind: str) -> list[Yaku]:
     """役牌：自风、场风、三元牌的刻子/杠子"""
     result = []
-    wind_map = {'东': 'z1', '南': 'z2', '西': 'z3', '北': 'z4'}
+    all_counts = info.all_counts
 
     # 三元牌刻子
-    for z, name in [('z5', '中'), ('z6', '发'), ('z7', '白')]:
-        if info['all_counts'].get(z, 0) >= 3:
+    for tid, name in _DRAGON_IDS:
+        if all_counts[tid] >= 3:
             result.append(Yaku(f'役牌·{name}', 1))
 
     # 自风刻子
-    seat_tile = wind_map.get(seat_wind)
-    if seat_tile and info['all_counts'].get(seat_tile, 0) >= 3:
+    seat_tile = _WIND_IDS.get(seat_wind)
+    if seat_tile is not None and all_counts[seat_tile] >= 3:
         result.append(Yaku(f'役牌·自风{seat_wind}', 1))
 
     # 场风刻子
-    round_tile = wind_map.get(round_wind)
-    if round_tile and info['all_counts'].get(round_tile, 0) >= 3:
+    round_tile = _WIND_IDS.get(round_wind)
+    if round_tile is not None and all_counts[round_tile] >= 3:
         result.append(Yaku(f'役牌·场风{round_wind}', 1))
 
     return result
 
 
-def _check_chiitoitsu(hand: list[str]) -> Optional[Yaku]:
+def _check_chiitoitsu(info: WinAnalysis) -> Optional[Yaku]:
     """七对子"""
-    if len(hand) != 14:
-        return None
-    counts = Counter(hand)
-    if sum(1 for c in counts.values() if c >= 2) == 7:
+    if info.is_chiitoitsu:
         return Yaku('七对子', 2)
     return None
 
 
-def _check_honitsu(info: dict) -> Optional[Yaku]:
+def _check_honitsu(info: WinAnalysis) -> Optional[Yaku]:
     """混一色：一种数牌 + 字牌"""
-    if len(info['suits_in_all']) == 1 and info['has_honor_in_all']:
+    if len(info.suits_in_all) == 1 and info.has_honor_in_all:
         return Yaku('混一色', 3)
     return None
 
 
-def _check_chinitsu(info: dict) -> Optional[Yaku]:
+def _check_chinitsu(info: WinAnalysis) -> Optional[Yaku]:
     """清一色：只有一种数牌，无字牌"""
-    if len(info['suits_in_all']) == 1 and not info['has_honor_in_all']:
+    if len(info.suits_in_all) == 1 and not info.has_honor_in_all:
         return Yaku('清一色', 6)
     return None
 
 
-def _check_toitoi(info: dict, hand: list[str], melds: list[dict]) -> Optional[Yaku]:
+def _check_toitoi(info: WinAnalysis) -> Optional[Yaku]:
     """碰碰胡（对对和）：全部面子都是刻子，无顺子"""
     # 检查副露是否全是刻子类型
-    for m in melds:
+    for m in info.melds:
         if m['type'] == 'peng' or m['type'] in ('gang', 'bugang', 'angang'):
             continue
         # 如果有不明类型的副露，跳过
         return None
 
-    # 检查手牌中是否全是刻子（不含顺子）
-    decompositions = _try_decompose_to_melds(hand)
-    for decomp in decompositions:
+    # 检查手牌中是否全是刻子（不含顺子），使用 analyze_win 已求出的拆法
+    for _, decomp in info.decompositions:
         all_triplets = all(
-            len(set(meld)) == 1  # 刻子：3张相同的牌
+            meld[0] == meld[2]  # 刻子：3张相同的牌
             for meld in decomp
         )
         if all_triplets:
@@ -330,138 +209,338 @@ def _check_toitoi(info: dict, hand: list[str], melds: list[dict]) -> Optional[Ya
     return None
 
 
-def _check_san_ankan(info: dict) -> Optional[Yaku]:
+def _check_san_ankan(info: WinAnalysis) -> Optional[Yaku]:
     """三暗刻"""
-    total = info['ankan_count'] + info['hand_ankan']
+    total = info.ankan_count + info.hand_ankan
     if total >= 3:
         return Yaku('三暗刻', 2)
     return None
 
 
-def _check_suu_ankan(info: dict) -> Optional[Yaku]:
+def _check_suu_ankan(info: WinAnalysis) -> Optional[Yaku]:
     """四暗刻（役满）"""
-    total = info['ankan_count'] + info['hand_ankan']
+    total = info.ankan_count + info.hand_ankan
     if total >= 4:
         return Yaku('四暗刻', 13, yakuman=True)
     return None
 
 
-def _check_chanta(info: dict, hand: list[str], melds: list[dict]) -> Optional[Yaku]:
+def _check_chanta(info: WinAnalysis) -> Optional[Yaku]:
     """混全带幺：每个面子都带幺九"""
-    if not info['has_honor_in_all']:
+    if not info.has_honor_in_all:
         return None
-    if len(info['suits_in_all']) == 1 and not info['has_honor_in_all']:
+    if len(info.suits_in_all) == 1 and not info.has_honor_in_all:
         return None  # 清一色，不是混全带幺
 
-    # 简化检查：所有牌都含幺九
-    for t in info['all_tiles']:
-        if not info['is_terminal'](t) and t[0] != 'z':
-            # 不是幺九也不是字牌 → 不满足
-            return None
-
-    # 字牌本身算幺九，所以只需要检查数牌
-    for t in info['all_tiles']:
-        if t[0] in NUMBER_SUITS:
-            n = int(t[1:])
-            if n != 1 and n != 9:
-                return None
+    # 简化检查：所有牌都是幺九或字牌
+    if not info.all_terminal_honor:
+        return None
 
     return Yaku('混全带幺', 2)
 
 
-def _check_junchan(info: dict) -> Optional[Yaku]:
+def _check_junchan(info: WinAnalysis) -> Optional[Yaku]:
     """纯全带幺：每个面子都带幺九，但没有字牌"""
-    if info['has_honor_in_all']:
+    if info.has_honor_in_all:
         return None
 
-    for t in info['all_tiles']:
-        if t[0] in NUMBER_SUITS:
-            n = int(t[1:])
-            if n != 1 and n != 9:
-                return None
+    # 数牌只能是 1/9
+    if not info.all_terminal_honor:
+        return None
 
     return Yaku('纯全带幺', 3)
 
 
-def _check_tsuiso(info: dict) -> Optional[Yaku]:
+def _check_tsuiso(info: WinAnalysis) -> Optional[Yaku]:
     """字一色（役满）"""
-    if info['all_honor']:
+    if info.all_honor:
         return Yaku('字一色', 13, yakuman=True)
     return None
 
 
-def _check_chinroto(info: dict) -> Optional[Yaku]:
+def _check_chinroto(info: WinAnalysis) -> Optional[Yaku]:
     """清老头（役满）：只有数牌的幺九，无字"""
-    if info['has_honor_in_all']:
+    if info.has_honor_in_all:
+        return None
+    if not info.all_number:
         return None
-    if not info['all_number']:
+    if not info.all_terminal_honor:
         return None
-    for t in info['all_tiles']:
-        if t[0] in NUMBER_SUITS:
-            n = int(t[1:])
-            if n != 1 and n != 9:
-                return None
     return Yaku('清老头', 13, yakuman=True)
 
 
-def _check_ryuiso(info: dict) -> Optional[Yaku]:
+def _check_ryuiso(info: WinAnalysis) -> Optional[Yaku]:
     """绿一色（役满）：只有 2/3/4/6/8 条 + 发"""
-    green_tiles = {'s2', 's3', 's4', 's6', 's8', 'z6'}
-    for t in info['all_tiles']:
-        if t not in green_tiles:
-            return None
+    if not info.all_green:
+        return None
     return Yaku('绿一色', 13, yakuman=True)
 
 
-def _check_sanshoku_doko(info: dict, hand: list[str], melds: list[dict]) -> Optional[Yaku]:
+def _check_sanshoku_doko(info: WinAnalysis) -> Optional[Yaku]:
     """三色同刻：三种花色有相同数字的刻子"""
-    triplets = set()
-    for t, c in info['all_counts'].items():
-        if c >= 3 and t[0] in NUMBER_SUITS:
-            triplets.add(int(t[1:]))
+    all_counts = info.all_counts
 
     # 检查是否有某个数字在三种花色都有刻子
-    for num in triplets:
-        suits_with = set()
-        for suit in NUMBER_SUITS:
-            if info['all_counts'].get(f'{suit}{num}', 0) >= 3:
-                suits_with.add(suit)
-        if len(suits_with) >= 3:
+    for num in range(9):
+        if all_counts[num] >= 3 and all_counts[9 + num] >= 3 and all_counts[18 + num] >= 3:
             return Yaku('三色同刻', 2)
     return None
 
 
+# ── 编译版番种判定 ──────────────────────────────────────────────
+# 每个番种对应一个位；_yaku_bits 用 WinAnalysis 的位掩码一次算出全部命中位，
+# 结果（番种列表 / 番数 / 得分）按命中位组合缓存。番种常量全局唯一，不再逐次构造。
+# 位的顺序即输出顺序，与上面逐项检查版（_evaluate_hand_reference）完全一致。
+
+_YAKU_TABLE: tuple[Yaku, ...] = (
+    Yaku('断幺九', 1),
+    Yaku('自摸', 1),
+    Yaku('门前清自摸', 1),
+    Yaku('岭上开花', 1),
+    Yaku('抢杠胡', 1),
+    Yaku('天胡', 13, yakuman=True),
+    *(Yaku(f'役牌·{name}', 1) for _, name in _DRAGON_IDS),
+    *(Yaku(f'役牌·自风{w}', 1) for w in _WIND_IDS),
+    *(Yaku(f'役牌·场风{w}', 1) for w in _WIND_IDS),
+    Yaku('一杯口', 1),
+    Yaku('七对子', 2),
+    Yaku('三暗刻', 2),
+    Yaku('三色同刻', 2),
+    Yaku('混全带幺', 2),
+    Yaku('混一色', 3),
+    Yaku('碰碰胡', 3),
+    Yaku('纯全带幺', 3),
+    Yaku('二杯口', 3),
+    Yaku('清一色', 6),
+    Yaku('字一色', 13, yakuman=True),
+    Yaku('清老头', 13, yakuman=True),
+    Yaku('绿一色', 13, yakuman=True),
+    Yaku('四暗刻', 13, yakuman=True),
+)
+_YAKU_BIT: dict[str, int] = {y.name: 1 << i for i, y in enumerate(_YAKU_TABLE)}
+_YAKUMAN_BITS = sum(_YAKU_BIT[y.name] for y in _YAKU_TABLE if y.yakuman)
+_NO_YAKU = Yaku('胡牌', 1)
+_B_TANYAO = _YAKU_BIT['断幺九']
+_B_ZIMO = _YAKU_BIT['自摸']
+_B_MENZEN_ZIMO = _YAKU_BIT['门前清自摸']
+_B_LINGSHANG = _YAKU_BIT['岭上开花']
+_B_QIANGGANG = _YAKU_BIT['抢杠胡']
+_B_TIANHU = _YAKU_BIT['天胡']
+_B_CHIITOITSU = _YAKU_BIT['七对子']
+_B_SAN_ANKAN = _YAKU_BIT['三暗刻']
+_B_SANSHOKU_DOKO = _YAKU_BIT['三色同刻']
+_B_CHANTA = _YAKU_BIT['混全带幺']
+_B_HONITSU = _YAKU_BIT['混一色']
+_B_TOITOI = _YAKU_BIT['碰碰胡']
+_B_JUNCHAN = _YAKU_BIT['纯全带幺']
+_B_CHINITSU = _YAKU_BIT['清一色']
+_B_TSUISO = _YAKU_BIT['字一色']
+_B_CHINROTO = _YAKU_BIT['清老头']
+_B_RYUISO = _YAKU_BIT['绿一色']
+_B_SUU_ANKAN = _YAKU_BIT['四暗刻']
+_B_IIPEIKOU = _YAKU_BIT['一杯口']
+_B_RYANPEIKOU = _YAKU_BIT['二杯口']
+
+# 役牌：牌 ID -> 命中位
+_DRAGON_BITS: tuple[tuple[int, int], ...] = tuple((1 << tid, _YAKU_BIT[f'役牌·{name}']) for tid, name in _DRAGON_IDS)
+_SEAT_BITS: dict[str, tuple[int, int]] = {w: (1 << tid, _YAKU_BIT[f'役牌·自风{w}']) for w, tid in _WIND_IDS.items()}
+_ROUND_BITS: dict[str, tuple[int, int]] = {w: (1 << tid, _YAKU_BIT[f'役牌·场风{w}']) for w, tid in _WIND_IDS.items()}
+
+# 牌种位掩码
+_SUIT_MASKS: tuple[int, ...] = tuple(((1 << 9) - 1) << (9 * s) for s in range(3))
+_NUMBER_MASK = (1 << HONOR_START) - 1
+_HONOR_MASK = ((1 << NUM_TILE_KINDS) - 1) ^ _NUMBER_MASK
+_TH_MASK = sum(1 << i for i in TERMINAL_HONOR_IDS)
+_GREEN_MASK = sum(1 << i for i in GREEN_IDS)
+_TRIPLET_MELD_TYPES = frozenset(('peng', 'gang', 'bugang', 'angang'))
+
+# 命中位组合 -> (番种列表, 番数, 基础点数)
+_RESULT_CACHE: dict[int, tuple[tuple[Yaku, ...], int, int]] = {}
+
+
+def _yaku_bits(info: WinAnalysis, hu_type: str, from_label: str, seat_wind: str, round_wind: str) -> int:
+    """一次算出全部番种的命中位"""
+    tiles = info.tile_mask
+    triplets = info.triplet_mask
+    has_honor = bool(tiles & _HONOR_MASK)
+    all_terminal_honor = not tiles & ~_TH_MASK
+    suit_count = (bool(tiles & _SUIT_MASKS[0]) + bool(tiles & _SUIT_MASKS[1]) + bool(tiles & _SUIT_MASKS[2]))
+    ankan = info.ankan_count + info.hand_ankan
+    bits = 0
+
+    if not info.hand_mask & _TH_MASK and not info.has_terminal_in_open:
+        bits |= _B_TANYAO
+    if hu_type == 'zimo':
+        bits |= _B_ZIMO
+        if info.is_menzen:
+            bits |= _B_MENZEN_ZIMO
+    if from_label:
+        if '岭上' in from_label:
+            bits |= _B_LINGSHANG
+        if '抢杠' in from_label or 'qianggang' in from_label:
+            bits |= _B_QIANGGANG
+        if '天胡' in from_label:
+            bits |= _B_TIANHU
+
+    if triplets & _HONOR_MASK:
+        for tile_bit, yaku_bit in _DRAGON_BITS:
+            if triplets & tile_bit:
+                bits |= yaku_bit
+        for table, wind in ((_SEAT_BITS, seat_wind), (_ROUND_BITS, round_wind)):
+            entry = table.get(wind)
+            if entry is not None and triplets & entry[0]:
+                bits |= entry[1]
+
+    if info.is_chiitoitsu:
+        bits |= _B_CHIITOITSU
+    if ankan >= 3:
+        bits |= _B_SAN_ANKAN
+        if ankan >= 4:
+            bits |= _B_SUU_ANKAN
+    if triplets & (triplets >> 9) & (triplets >> 18) & 0x1FF:
+        bits |= _B_SANSHOKU_DOKO
+    if all_terminal_honor:
+        bits |= _B_CHANTA if has_honor else _B_JUNCHAN
+        if not has_honor:
+            bits |= _B_CHINROTO
+    if suit_count == 1:
+        bits |= _B_HONITSU if has_honor else _B_CHINITSU
+    if not tiles & _NUMBER_MASK:
+        bits |= _B_TSUISO
+    if not tiles & ~_GREEN_MASK:
+        bits |= _B_RYUISO
+    if info.decompositions and all(m['type'] in _TRIPLET_MELD_TYPES for m in info.melds):
+        for _, decomp in info.decompositions:
+            if all(meld[0] == meld[2] for meld in decomp):
+                bits |= _B_TOITOI
+                break
+    return bits
+
+
+def _compile_result(bits: int) -> tuple[tuple[Yaku, ...], int, int]:
+    """命中位 -> (番种列表, 番数, 基础点数)，规则同 _evaluate_hand_reference"""
+    if bits & _YAKUMAN_BITS:
+        # 有役满时，只保留役满番种（不叠加低番）
+        bits &= _YAKUMAN_BITS
+    yakus = tuple(y for i, y in enumerate(_YAKU_TABLE) if bits >> i & 1) or (_NO_YAKU,)
+    has_yakuman = bool(bits & _YAKUMAN_BITS)
+    if has_yakuman:
+        total_fan = 13 * len(yakus)
+    else:
+        total_fan = sum(y.fan for y in yakus)
+    return yakus, total_fan, _score_for_fan(total_fan, has_yakuman)
+
+
+# ── 最高分拆法搜索 ──────────────────────────────────────────────
+# 碰碰胡、三暗刻/四暗刻、一杯口/二杯口取决于手牌怎样拆，其余番种只看整手牌。
+# best 模式下，整手番种算一次；拆法直接取 WinAnalysis.decompositions（判和时已算好，
+# 实战和牌多为一两种拆法），逐个算拆法番种后取 (得分, 番数) 最高者。
+# 七对子作为另一种拆法参与比较。
+
+_DECOMP_BITS = _B_TOITOI | _B_SAN_ANKAN | _B_SUU_ANKAN | _B_CHIITOITSU | _B_IIPEIKOU | _B_RYANPEIKOU
+
+
+def _result_key(bits: int) -> tuple[int, int]:
+    """比较用：(得分, 番数)"""
+    compiled = _RESULT_CACHE.get(bits)
+    if compiled is None:
+        compiled = _RESULT_CACHE[bits] = _compile_result(bits)
+    return compiled[2], compiled[1]
+
+
+def _decomposition_bits(info: WinAnalysis, melds: tuple[tuple[int, int, int], ...], triplet_melds_only: bool) -> int:
+    """某一拆法下的 碰碰胡 / 三暗刻 / 四暗刻 / 一杯口 / 二杯口"""
+    sequences = [m for m in melds if m[0] != m[2]]
+    bits = 0
+    if not sequences and triplet_melds_only:
+        bits |= _B_TOITOI
+    ankou = info.ankan_count + len(melds) - len(sequences)
+    if ankou >= 3:
+        bits |= _B_SAN_ANKAN
+        if ankou >= 4:
+            bits |= _B_SUU_ANKAN
+    if info.is_menzen and len(sequences) >= 2:
+        same = sum(sequences.count(m) // 2 for m in set(sequences))
+        if same >= 2:
+            bits |= _B_RYANPEIKOU
+        elif same == 1:
+            bits |= _B_IIPEIKOU
+    return bits
+
+
+def _best_bits(info: WinAnalysis, base_bits: int) -> int | None:
+    """所有拆法中得分最高者的命中位；手牌无法拆解时返回 None"""
+    triplet_melds_only = all(m['type'] in _TRIPLET_MELD_TYPES for m in info.melds)
+    candidates = [
+        base_bits | _decomposition_bits(info, melds, triplet_melds_only)
+        for _, melds in info.decompositions
+    ]
+    if info.is_chiitoitsu:
+        candidates.append(base_bits | _B_CHIITOITSU)
+    if not candidates:
+        return None
+    return max(candidates, key=_result_key)
+
+
 # ── 主入口 ────────────────────────────────────────────────────────
 
 def evaluate_hand(
-    hand: list[str],
-    melds: list[dict],
-    win_tile: str,
+    hand: WinAnalysis | list[str],
+    melds: list[dict] | None = None,
+    win_tile: str = '',
     hu_type: str = 'rong',       # 'rong' | 'zimo'
     from_label: str = '',         # '天胡' / '岭上开花' / '抢杠' / ''
     seat_wind: str = '东',
     round_wind: str = '东',
+    best: bool = False,
 ) -> HandResult:
     """
     评估一手胡牌，返回番种、番数、得分。
 
     参数：
-      hand:       手牌列表（不含副露取走的牌）
-      melds:      副露列表
+      hand:       logic.analyze_win 的结果（WinAnalysis，已含副露）；
+                  也可传手牌列表（不含副露取走的牌），此时按 melds 现场分析
+      melds:      副露列表（hand 为 WinAnalysis 时忽略）
       win_tile:   胡的那张牌
       hu_type:    'rong'（荣和）或 'zimo'（自摸）
       from_label: 来源标签（天胡/岭上开花/抢杠等）
       seat_wind:  自风
       round_wind: 场风
+      best:       True 时在所有拆法中取得分最高者（含一杯口/二杯口，暗刻按拆法计数）；
+                  手牌无法拆解时退回整手判定
     """
+    if isinstance(hand, WinAnalysis):
+        info = hand
+    else:
+        info = analyze_win(counts_of(hand), melds or [], win_tile or None)
+
+    bits = _yaku_bits(info, hu_type, from_label, seat_wind, round_wind)
+    if best:
+        best_bits = _best_bits(info, bits & ~_DECOMP_BITS)
+        if best_bits is not None:
+            bits = best_bits
+    compiled = _RESULT_CACHE.get(bits)
+    if compiled is None:
+        compiled = _RESULT_CACHE[bits] = _compile_result(bits)
+    yakus, total_fan, base_points = compiled
+    return HandResult(fan=total_fan, score=base_points, yaku_list=list(yakus), base_points=base_points)
+
+
+def _evaluate_hand_reference(
+    info: WinAnalysis,
+    hu_type: str = 'rong',
+    from_label: str = '',
+    seat_wind: str = '东',
+    round_wind: str = '东',
+) -> HandResult:
+    """逐项调用 _check_* 的评估（编译版 evaluate_hand 的对照实现）"""
     result = HandResult()
-    info = _decompose_hand(hand, melds)
 
     # ── 逐项检查番种 ──
     checks = []
 
     # 1番
-    c = _check_tanyao(info, hand, melds)
+    c = _check_tanyao(info)
     if c: checks.append(c)
 
     c = _check_zimo(info, hu_type)
@@ -480,27 +559,27 @@ def evaluate_hand(
     if c: checks.append(c)
 
     # 役牌（可叠加）
-    yakuhai_list = _check_yakuhai(info, hand, seat_wind, round_wind)
+    yakuhai_list = _check_yakuhai(info, seat_wind, round_wind)
     checks.extend(yakuhai_list)
 
     # 2番
-    c = _check_chiitoitsu(hand)
+    c = _check_chiitoitsu(info)
     if c: checks.append(c)
 
     c = _check_san_ankan(info)
     if c: checks.append(c)
 
-    c = _check_sanshoku_doko(info, hand, melds)
+    c = _check_sanshoku_doko(info)
     if c: checks.append(c)
 
-    c = _check_chanta(info, hand, melds)
+    c = _check_chanta(info)
     if c: checks.append(c)
 
     # 3番
     c = _check_honitsu(info)
     if c: checks.append(c)
 
-    c = _check_toitoi(info, hand, melds)
+    c = _check_toitoi(info)
     if c: checks.append(c)
 
     c = _check_junchan(info)
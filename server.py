@@ -3,7 +3,8 @@ server.py — 应用入口
 
 职责（仅此而已）：
   - 创建 Flask app 与 SocketIO 实例
-  - 注册 HTTP 路由（只有 /）
+  - 注册 HTTP 路由（/、回放、/metrics 运行指标）
+  - 创建 AI 托管决策的计算池与所有房间共用的时间轮
   - 调用 events.register_events() 绑定 SocketIO 事件
   - 启动服务器
 """
@@ -20,12 +21,21 @@ from flask import Flask, render_template, jsonify, send_file, request
 from flask_socketio import SocketIO
 
 from events import register_events
+from room_manager import room_manager
+from ai_pool import AIPool
+from transport import TimerWheel
+import logic
 
 # ── Flask & SocketIO ────────────────────────────────────────────
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'mahjong-lan-secret-v2'
 socketio = SocketIO(app, async_mode='eventlet', cors_allowed_origins='*')
 
+# AI 托管的出牌计算放到进程池，不占用 eventlet 主循环
+room_manager.ai_pool = AIPool()
+# 所有房间的超时 / 托管定时器共用一个时间轮（一个驱动 greenlet）
+room_manager.timers = TimerWheel()
+
 # ── 路由 ────────────────────────────────────────────────────────
 
 @app.route('/')
@@ -85,6 +95,18 @@ def download_replay(game_id: str):
         return jsonify({'error': '回放不存在'}), 404
     return send_file(filepath, as_attachment=True, download_name=f'{safe_id}.json')
 
+# ── 运行指标 ──────────────────────────────────────────────
+
+@app.route('/metrics')
+def metrics():
+    """运行指标（JSON）：手牌分析缓存的命中/未命中/淘汰计数，发件箱每动作帧数/字节数，AI 计算池队列与延迟，各房间存活定时器数"""
+    return jsonify({
+        'hand_cache': logic.cache_stats(),
+        'outbox': room_manager.outbox_stats(),
+        'ai_pool': room_manager.ai_pool.as_dict() if room_manager.ai_pool else None,
+        'timers': room_manager.timer_stats(),
+    })
+
 # ── 事件注册 ────────────────────────────────────────────────────
 register_events(socketio)
 
@@ -102,6 +124,7 @@ def _get_local_ip() -> str:
 
 
 if __name__ == '__main__':
+    room_manager.ai_pool.warm_up()
     ip = _get_local_ip()
     port = 5000
     print('=' * 50)
@@ -0,0 +1,277 @@
+"""
+simulate.py — 多进程自对局模拟器 / 策略对战（离线工具，不参与服务运行）
+
+职责：
+  - 把 N 局分块交给 multiprocessing 进程池，每个任务用自己的 HeadlessTable（独立的 MahjongGame）
+  - 汇总和牌率、放铳率、平均得分、荒牌率、番种出现频率
+  - 两个 AI 策略变体（ai_player.STRATEGIES）对战：A / B 隔座就坐，每局轮换座位以抵消座位差异
+  - 输出局/秒与各阶段 CPU 时间（AI 决策 / 计分 / 其余状态机）
+  - 每局牌山种子只由 --seed 与局序号决定，结果摘要与进程数、分块无关：
+    对 logic / scorer 的优化前后摘要应完全一致，可直接当回归基准
+
+用法：
+  python simulate.py [-n 1000] [--seed 1] [--workers 4] [-a default] [-b menzen] [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from dataclasses import dataclass, field, replace
+
+import game as game_module
+from ai_player import STRATEGIES, AIStrategy
+from headless import HeadlessTable, HandResult
+
+# 每个任务的局数
+DEFAULT_CHUNK = 50
+
+
+# ─── 统计 ─────────────────────────────────────────────────────────
+
+@dataclass
+class StrategyStats:
+    """一个策略在所有座位上的累计（seats 为该策略就坐的座位局数）"""
+    seats: int = 0
+    wins: int = 0
+    tsumo: int = 0
+    deal_ins: int = 0
+    score: int = 0
+
+    def merge(self, other: 'StrategyStats') -> None:
+        self.seats += other.seats
+        self.wins += other.wins
+        self.tsumo += other.tsumo
+        self.deal_ins += other.deal_ins
+        self.score += other.score
+
+    def as_dict(self) -> dict:
+        per = max(self.seats, 1)
+        return {
+            'seats': self.seats,
+            'win_rate': self.wins / per,
+            'tsumo_rate': self.tsumo / per,
+            'deal_in_rate': self.deal_ins / per,
+            'avg_score': self.score / per,
+        }
+
+
+@dataclass
+class ArenaStats:
+    """一批对局的汇总（可跨进程合并）"""
+    games: int = 0
+    draws: int = 0
+    timers: int = 0                                   # 执行的定时器回调数（≈ 状态机动作数）
+    strategies: dict[str, StrategyStats] = field(default_factory=dict)
+    yaku: dict[str, int] = field(default_factory=dict)   # 番种 -> 出现的和牌局数
+    cpu: dict[str, float] = field(default_factory=dict)  # 阶段 -> CPU 秒
+    records: list[tuple] = field(default_factory=list)   # (局序号, 和牌座位, 类型, 各座位得分)，用于摘要
+
+    def merge(self, other: 'ArenaStats') -> None:
+        self.games += other.games
+        self.draws += other.draws
+        self.timers += other.timers
+        for name, stats in other.strategies.items():
+            self.strategies.setdefault(name, StrategyStats()).merge(stats)
+        for name, n in other.yaku.items():
+            self.yaku[name] = self.yaku.get(name, 0) + n
+        for phase, seconds in other.cpu.items():
+            self.cpu[phase] = self.cpu.get(phase, 0.0) + seconds
+        self.records.extend(other.records)
+
+    def digest(self) -> str:
+        """逐局结果的摘要（与进程数、分块、完成顺序无关）"""
+        blob = json.dumps(sorted(self.records), separators=(',', ':')).encode()
+        return hashlib.sha1(blob).hexdigest()[:16]
+
+    def as_dict(self) -> dict:
+        wins = self.games - self.draws
+        return {
+            'games': self.games,
+            'draw_rate': self.draws / max(self.games, 1),
+            'timers': self.timers,
+            'strategies': {name: s.as_dict() for name, s in self.strategies.items()},
+            'yaku': {name: n / max(wins, 1) for name, n in sorted(self.yaku.items(), key=lambda kv: -kv[1])},
+            'cpu': dict(self.cpu),
+            'digest': self.digest(),
+        }
+
+
+# ─── 阶段计时 ─────────────────────────────────────────────────────
+
+class PhaseTimer:
+    """按阶段累计 CPU 时间；wrap 的函数自身耗时记入该阶段（不可嵌套）"""
+
+    def __init__(self) -> None:
+        self.seconds: dict[str, float] = {}
+
+    def reset(self) -> None:
+        self.seconds = dict.fromkeys(self.seconds, 0.0)
+
+    def wrap(self, phase: str, fn):
+        self.seconds.setdefault(phase, 0.0)
+        clock = time.process_time
+
+        def timed(*args, **kwargs):
+            t0 = clock()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.seconds[phase] += clock() - t0
+        return timed
+
+
+_TIMER = PhaseTimer()
+_ORIGINAL_EVALUATE = game_module.evaluate_hand
+
+
+def _instrument() -> None:
+    """进程内启用计分计时（只替换本进程中 game 模块引用的 evaluate_hand）"""
+    if game_module.evaluate_hand is _ORIGINAL_EVALUATE:
+        game_module.evaluate_hand = _TIMER.wrap('score', _ORIGINAL_EVALUATE)
+
+
+def _timed_strategy(strategy: AIStrategy) -> AIStrategy:
+    wrap = _TIMER.wrap
+    return replace(
+        strategy,
+        choose_discard=wrap('ai', strategy.choose_discard),
+        should_action=wrap('ai', strategy.should_action),
+        choose_angang=wrap('ai', strategy.choose_angang),
+        choose_bugang=wrap('ai', strategy.choose_bugang),
+    )
+
+
+# ─── 对局 ─────────────────────────────────────────────────────────
+
+def game_seed(seed: int, index: int) -> int:
+    """第 index 局的牌山种子"""
+    return random.Random(seed * 1_000_003 + index).getrandbits(63)
+
+
+def seat_strategies(index: int, names: tuple[str, str]) -> list[str]:
+    """第 index 局各座位的策略名：A / B 隔座，每局轮换一位"""
+    return [names[(seat + index) % 2] for seat in range(4)]
+
+
+def _record(stats: ArenaStats, index: int, result: HandResult, seats: list[int], names: list[str]) -> None:
+    stats.games += 1
+    stats.timers += result.timers
+    for pid, name in zip(seats, names):
+        s = stats.strategies.setdefault(name, StrategyStats())
+        s.seats += 1
+        s.score += result.score_delta.get(pid, 0)
+        if pid == result.winner:
+            s.wins += 1
+            s.tsumo += result.hu_type == 'zimo'
+        elif result.hu_type == 'rong' and pid == result.from_pid:
+            s.deal_ins += 1
+    if result.winner is None:
+        stats.draws += 1
+    for name in set(result.yaku):
+        stats.yaku[name] = stats.yaku.get(name, 0) + 1
+    winner_seat = seats.index(result.winner) if result.winner is not None else -1
+    stats.records.append((index, winner_seat, result.hu_type, [result.score_delta.get(p, 0) for p in seats]))
+
+
+def run_chunk(task: tuple[int, int, int, tuple[str, str]]) -> ArenaStats:
+    """进程池任务：打 [start, start+count) 这些局，返回该块的汇总"""
+    seed, start, count, names = task
+    _instrument()
+    timed = {name: _timed_strategy(STRATEGIES[name]) for name in set(names)}
+    table = HeadlessTable(room_id=f'sim{start}')
+    game = table.game
+    seats = list(game.player_ids)
+
+    _TIMER.reset()
+    cpu0 = time.process_time()
+    stats = ArenaStats()
+    for index in range(start, start + count):
+        seat_names = seat_strategies(index, names)
+        game.ai_strategies = {pid: timed[name] for pid, name in zip(seats, seat_names)}
+        game.dealer_idx = index % 4
+        result = table.play_hand(game_seed(seed, index))
+        _record(stats, index, result, seats, seat_names)
+    total = time.process_time() - cpu0
+
+    stats.cpu = dict(_TIMER.seconds)
+    stats.cpu['engine'] = total - sum(stats.cpu.values())
+    return stats
+
+
+def simulate(
+    games: int,
+    seed: int = 1,
+    workers: int | None = None,
+    names: tuple[str, str] = ('default', 'default'),
+    chunk: int = DEFAULT_CHUNK,
+) -> ArenaStats:
+    """打 games 局并汇总；workers=0 时在当前进程内运行（便于 profile）"""
+    for name in names:
+        if name not in STRATEGIES:
+            raise ValueError(f'未知策略 {name!r}，可选：{", ".join(STRATEGIES)}')
+    tasks = [(seed, start, min(chunk, games - start), names) for start in range(0, games, chunk)]
+    total = ArenaStats()
+    if workers == 0:
+        for task in tasks:
+            total.merge(run_chunk(task))
+        return total
+    with multiprocessing.Pool(processes=workers) as pool:
+        for part in pool.imap_unordered(run_chunk, tasks):
+            total.merge(part)
+    return total
+
+
+# ─── 命令行 ───────────────────────────────────────────────────────
+
+def _print_report(stats: ArenaStats, elapsed: float, workers: int) -> None:
+    summary = stats.as_dict()
+    procs = f'{workers} 进程' if workers else '当前进程'
+    print(f'[simulate] {stats.games} 局  {procs}  {elapsed:.2f}s  {stats.games / elapsed:,.1f} 局/秒')
+    print(f'  荒牌率 {summary["draw_rate"]:.1%}  状态机回调 {stats.timers:,}')
+    print(f'  {"策略":<8}{"座位局":>7}{"和牌率":>8}{"自摸率":>8}{"放铳率":>8}{"平均得分":>8}')
+    for name, s in summary['strategies'].items():
+        print(
+            f'  {name:<10}{s["seats"]:>10}{s["win_rate"]:>11.1%}{s["tsumo_rate"]:>11.1%}'
+            f'{s["deal_in_rate"]:>11.1%}{s["avg_score"]:>12.1f}'
+        )
+    print('  番种（占和牌局）: ' + '  '.join(f'{name} {rate:.1%}' for name, rate in summary['yaku'].items()))
+    cpu_total = sum(stats.cpu.values()) or 1.0
+    print('  CPU: ' + '  '.join(
+        f'{phase} {seconds:.2f}s ({seconds / cpu_total:.0%})'
+        for phase, seconds in sorted(stats.cpu.items(), key=lambda kv: -kv[1])
+    ))
+    print(f'  摘要 {summary["digest"]}')
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description='多进程自对局模拟 / 策略对战')
+    parser.add_argument('-n', type=int, default=1000, help='局数')
+    parser.add_argument('--seed', type=int, default=1, help='随机种子（决定每局牌山）')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='进程数（0 = 当前进程内运行）')
+    parser.add_argument('--chunk', type=int, default=DEFAULT_CHUNK, help='每个任务的局数')
+    parser.add_argument('-a', '--strategy-a', default='default', choices=sorted(STRATEGIES), help='策略 A')
+    parser.add_argument('-b', '--strategy-b', default=None, choices=sorted(STRATEGIES), help='策略 B（默认同 A）')
+    parser.add_argument('--json', action='store_true', help='以 JSON 输出汇总')
+    args = parser.parse_args(argv)
+
+    names = (args.strategy_a, args.strategy_b or args.strategy_a)
+    t0 = time.perf_counter()
+    stats = simulate(args.n, args.seed, args.workers, names, args.chunk)
+    elapsed = time.perf_counter() - t0
+    if args.json:
+        print(json.dumps(dict(stats.as_dict(), seconds=elapsed, games_per_second=stats.games / elapsed),
+                         ensure_ascii=False, indent=2))
+    else:
+        _print_report(stats, elapsed, args.workers)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,10 +4,18 @@ tiles.py — 牌面定义、排序规则、Unicode 映射
 职责：
   - 定义所有合法牌的编码（m1~m9, p1~p9, s1~s9, z1~z7）
   - 提供牌面排序键
-  - 提供内部编码 <-> Unicode 显示字符的转换
-  - 生成并洗牌（make_wall）
+  - 提供内部编码 <-> Unicode 显示字符的转换（TileList 缓存转换结果，修改前重复读取不再转换）
+  - 提供内部编码 <-> 整数牌 ID（0~33）及 34 格计数向量的转换
+  - 牌山（Wall：按种子洗牌、前后双游标、岭上区）；make_wall 为旧接口
+
+整数牌 ID：
+  0~8 = m1~m9，9~17 = p1~p9，18~26 = s1~s9，27~33 = z1~z7
+  ID 顺序与 tile_sort_key 的排序一致；算法模块只在 ID / 计数向量上运算，
+  字符串编码只在本模块（以及 socket 收发处）转换。
 """
 
+from __future__ import annotations
+
 import random
 
 # ── Unicode 显示映射 ─────────────────────────────────────────────
@@ -34,6 +42,23 @@ ALL_TILES: list[str] = list(UNICODE_MAP.keys())
 # 数牌花色
 NUMBER_SUITS: tuple[str, ...] = ('m', 'p', 's')
 
+# ── 整数牌 ID ────────────────────────────────────────────────────
+NUM_TILE_KINDS = 34   # 牌种数
+HONOR_START = 27      # 字牌起始 ID
+
+# 内部编码 <-> 整数 ID
+TILE_IDS: dict[str, int] = {t: i for i, t in enumerate(ALL_TILES)}
+ID_TILES: tuple[str, ...] = tuple(ALL_TILES)
+
+# 牌 ID -> Unicode（与 UNICODE_MAP 相同，按 ID 下标查表）
+ID_UNICODE: tuple[str, ...] = tuple(UNICODE_MAP[t] for t in ID_TILES)
+
+# 幺九牌（1/9/字牌）的 ID
+TERMINAL_HONOR_IDS: tuple[int, ...] = (0, 8, 9, 17, 18, 26, 27, 28, 29, 30, 31, 32, 33)
+
+# 绿牌（绿一色可用：2/3/4/6/8 条 + 发）的 ID
+GREEN_IDS: tuple[int, ...] = (19, 20, 21, 23, 25, 32)
+
 
 def tile_sort_key(tile: str) -> tuple[int, int]:
     """
@@ -45,12 +70,13 @@ def tile_sort_key(tile: str) -> tuple[int, int]:
 
 def sort_tiles(tiles: list[str]) -> list[str]:
     """返回按万→筒→条→字排序后的新列表（不修改原列表）"""
-    return sorted(tiles, key=tile_sort_key)
+    # 牌 ID 即排序名次，与 tile_sort_key 的顺序一致
+    return sorted(tiles, key=TILE_IDS.__getitem__)
 
 
 def to_unicode(tiles: list[str]) -> list[str]:
     """内部编码列表 -> Unicode 字符列表"""
-    return [UNICODE_MAP.get(t, t) for t in tiles]
+    return list(map(UNICODE_MAP.get, tiles, tiles))
 
 
 def to_display(tiles: list[str]) -> list[str]:
@@ -63,17 +89,208 @@ def tile_to_unicode(tile: str) -> str:
     return UNICODE_MAP.get(tile, tile)
 
 
+def tile_id(tile: str) -> int:
+    """单张牌 -> 整数 ID"""
+    return TILE_IDS[tile]
+
+
+def to_ids(tiles: list[str]) -> list[int]:
+    """内部编码列表 -> 整数 ID 列表"""
+    return [TILE_IDS[t] for t in tiles]
+
+
+def to_codes(ids) -> list[str]:
+    """整数 ID 序列 -> 内部编码列表"""
+    return [ID_TILES[i] for i in ids]
+
+
+def counts_of(tiles: list[str]) -> bytearray:
+    """内部编码列表 -> 34 格计数向量（bytearray，下标为牌 ID）"""
+    counts = bytearray(NUM_TILE_KINDS)
+    for t in tiles:
+        counts[TILE_IDS[t]] += 1
+    return counts
+
+
+def counts_to_tiles(counts: bytearray) -> list[str]:
+    """34 格计数向量 -> 排好序的内部编码列表"""
+    return [ID_TILES[i] for i, c in enumerate(counts) for _ in range(c)]
+
+
+# ── 带转换缓存的牌列表 ───────────────────────────────────────────
+class TileList(list):
+    """
+    牌编码列表（手牌 / 弃牌河 / 副露），缓存 unicode() / sorted_codes() / display() 的结果。
+
+    任何修改列表的操作都会清空缓存；未修改的弃牌河在每次广播中只转换一次。
+    返回的列表在多次调用（多个接收者）之间共享，调用方不得修改。
+    """
+
+    __slots__ = ('_views',)
+
+    def __init__(self, tiles=()) -> None:
+        super().__init__(tiles)
+        self._views: dict[str, list[str]] = {}
+
+    def __reduce__(self):
+        # pickle / copy 时按普通构造重建（缓存不随之复制）
+        return (TileList, (list(self),))
+
+    def unicode(self) -> list[str]:
+        """同 to_unicode(self)，结果缓存"""
+        out = self._views.get('unicode')
+        if out is None:
+            out = self._views['unicode'] = to_unicode(self)
+        return out
+
+    def sorted_codes(self) -> list[str]:
+        """同 sort_tiles(self)，结果缓存"""
+        out = self._views.get('sorted')
+        if out is None:
+            out = self._views['sorted'] = sort_tiles(self)
+        return out
+
+    def display(self) -> list[str]:
+        """同 to_display(self)，与 sorted_codes 共享一次排序"""
+        out = self._views.get('display')
+        if out is None:
+            out = self._views['display'] = to_unicode(self.sorted_codes())
+        return out
+
+
+def _invalidating(name: str):
+    """包装 list 的修改方法：先清空转换缓存再执行"""
+    method = getattr(list, name)
+
+    def wrapper(self, *args, **kwargs):
+        self._views.clear()
+        return method(self, *args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = method.__doc__
+    return wrapper
+
+
+for _name in ('append', 'extend', 'insert', 'remove', 'pop', 'clear', 'sort', 'reverse',
+              '__setitem__', '__delitem__', '__iadd__', '__imul__'):
+    setattr(TileList, _name, _invalidating(_name))
+del _name
+
+
+# ── 牌山 ─────────────────────────────────────────────────────────
+WALL_SIZE = NUM_TILE_KINDS * 4   # 136 张
+
+# 未洗牌的完整牌山（牌 ID 升序，每种 4 张）
+_FULL_WALL = bytes(i for i in range(NUM_TILE_KINDS) for _ in range(4))
+
+
+class Wall:
+    """
+    牌山：136 张牌 ID 存于一个 bytearray，洗牌后只移动游标，不再分配内存。
+
+    布局（下标）：
+      [0, front)          已摸走
+      [front, back)       活牌山：draw() 从 front 端摸
+      [back, dead_end)    岭上区（dead_size 张）：draw_rinshan() 从 dead_end 端摸，
+                          摸后活牌山尾部一张补入岭上区，岭上区张数保持不变
+      [dead_end, 136)     已作为岭上牌摸走
+
+    dead_size=0 时 draw_rinshan() 即从活牌山尾部摸牌（与旧的 list.pop(-1) 相同）。
+    每局使用独立的 random.Random(seed)，同一种子总是得到同一牌山；
+    构造后为空牌山，调用 shuffle(seed) 开始新一局。
+    """
+
+    __slots__ = ('seed', 'dead_size', '_tiles', '_rng', '_front', '_back', '_dead_end')
+
+    def __init__(self, seed: int | None = None, dead_size: int = 0) -> None:
+        if not 0 <= dead_size < WALL_SIZE:
+            raise ValueError(f'岭上区张数不合法: {dead_size}')
+        self.seed: int | None = None
+        self.dead_size = dead_size
+        self._tiles = bytearray(_FULL_WALL)
+        self._rng = random.Random()
+        self._front = self._back = self._dead_end = 0
+        if seed is not None:
+            self.shuffle(seed)
+
+    def shuffle(self, seed: int | None = None) -> int:
+        """
+        用给定种子重新洗牌（原地复用缓冲区）。
+
+        seed 为 None 时从全局 random 取一个新种子（全局 random 已设种子时仍可复现）。
+        返回本局种子，供回放记录。
+        """
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self._rng.seed(seed)
+        # 标准库洗牌（无偏）：对按 ID 排好的 136 张列表调用 random.Random(seed).shuffle，
+        # 再整段写回缓冲区（列表上交换元素比 bytearray 快）
+        order = list(_FULL_WALL)
+        self._rng.shuffle(order)
+        self._tiles[:] = bytes(order)
+        self._front = 0
+        self._dead_end = WALL_SIZE
+        self._back = WALL_SIZE - self.dead_size
+        return seed
+
+    def __len__(self) -> int:
+        """活牌山剩余张数（不含岭上区）"""
+        return self._back - self._front
+
+    @property
+    def dead_count(self) -> int:
+        """岭上区剩余张数"""
+        return self._dead_end - self._back
+
+    def draw_id(self) -> int:
+        """从活牌山前端摸一张，返回牌 ID；活牌山为空时抛出 IndexError"""
+        front = self._front
+        if front >= self._back:
+            raise IndexError('牌山已空')
+        self._front = front + 1
+        return self._tiles[front]
+
+    def draw_rinshan_id(self) -> int:
+        """杠后从岭上区摸一张（活牌山尾部补入一张），返回牌 ID；活牌山为空时抛出 IndexError"""
+        if self._front >= self._back:
+            raise IndexError('牌山已空')
+        self._back -= 1
+        self._dead_end -= 1
+        return self._tiles[self._dead_end]
+
+    def draw(self) -> str:
+        """从活牌山前端摸一张，返回牌编码"""
+        front = self._front
+        if front >= self._back:
+            raise IndexError('牌山已空')
+        self._front = front + 1
+        return ID_TILES[self._tiles[front]]
+
+    def draw_rinshan(self) -> str:
+        """杠后从岭上区摸一张，返回牌编码"""
+        return ID_TILES[self.draw_rinshan_id()]
+
+    def draw_many(self, n: int) -> list[str]:
+        """从活牌山前端连续摸 n 张（发牌用）"""
+        if n > len(self):
+            raise IndexError('牌山已空')
+        start = self._front
+        self._front += n
+        return [ID_TILES[i] for i in self._tiles[start:self._front]]
+
+    def remaining(self) -> list[str]:
+        """活牌山 + 岭上区的剩余牌编码，按摸牌顺序（前端在前，岭上牌在尾）"""
+        return [ID_TILES[i] for i in self._tiles[self._front:self._dead_end]]
+
+
 def make_wall() -> list[str]:
     """
-    生成完整牌山（136张）并随机洗牌。
+    生成完整牌山（136张）并随机洗牌（使用全局 random）。
     万/筒/条各 9×4 = 108 张，字牌 7×4 = 28 张。
+    新代码请使用 Wall。
     """
-    tiles: list[str] = []
-    for suit in NUMBER_SUITS:
-        for n in range(1, 10):
-            tiles += [f'{suit}{n}'] * 4
-    for n in range(1, 8):
-        tiles += [f'z{n}'] * 4
+    tiles = [ID_TILES[i] for i in _FULL_WALL]
     random.shuffle(tiles)
     return tiles
 
@@ -0,0 +1,320 @@
+"""
+transport.py — 传输层与调度器（MahjongGame 的两个外部依赖）
+
+职责：
+  - 传输层：MahjongGame 只调用 emit(event, data, room=..., skip_sid=...)，
+    服务器中即 flask_socketio.SocketIO 实例；无界面运行时用这里的实现
+  - 调度器：MahjongGame 只调用 spawn_after(seconds, fn)，返回带 cancel() 的定时器，
+    服务器中为 eventlet；无界面运行时用虚拟时钟，按时间顺序同步执行回调
+
+提供：
+  - NullTransport       丢弃所有事件（只计数）
+  - MemoryTransport     按发送顺序记录所有事件
+  - EventletScheduler   eventlet.spawn_after（eventlet 在第一次调度时才导入）
+  - VirtualClock        虚拟时钟：advance / run 立即推进时间并执行到期回调
+  - TimerWheel          哈希时间轮：所有房间共用，一个驱动定时器代替每个房间各自的 greenlet
+  - TimerGroup          一个房间的定时器：按局（generation）作废过期回调，统计存活定时器数
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import time
+import traceback
+from typing import Any, Callable, Protocol
+
+
+class Transport(Protocol):
+    def emit(self, event: str, data: Any, room: str | None = None, skip_sid: Any = None) -> None: ...
+
+
+class Timer(Protocol):
+    def cancel(self) -> None: ...
+
+
+class Scheduler(Protocol):
+    def spawn_after(self, seconds: float, fn: Callable[..., Any], *args: Any) -> Timer: ...
+
+
+# ─── 传输层 ───────────────────────────────────────────────────────
+
+class NullTransport:
+    """丢弃所有事件，只累计发送次数"""
+
+    def __init__(self) -> None:
+        self.count: int = 0
+
+    def emit(self, event: str, data: Any, room: str | None = None, skip_sid: Any = None) -> None:
+        self.count += 1
+
+
+class MemoryTransport:
+    """按发送顺序记录 (事件名, 房间/sid, 负载)"""
+
+    def __init__(self) -> None:
+        self.events: list[tuple[str, str | None, Any]] = []
+
+    def emit(self, event: str, data: Any, room: str | None = None, skip_sid: Any = None) -> None:
+        self.events.append((event, room, data))
+
+    def of(self, event: str, room: str | None = None) -> list[Any]:
+        """某事件（可限定接收者）的全部负载"""
+        return [d for e, r, d in self.events if e == event and (room is None or r == room)]
+
+    def clear(self) -> None:
+        self.events.clear()
+
+
+# ─── 调度器 ───────────────────────────────────────────────────────
+
+class EventletScheduler:
+    """服务器使用的调度器：直接转给 eventlet.spawn_after"""
+
+    def spawn_after(self, seconds: float, fn: Callable[..., Any], *args: Any) -> Timer:
+        import eventlet   # 仅服务器需要，无界面运行时不导入
+        return eventlet.spawn_after(seconds, fn, *args)
+
+
+class VirtualTimer:
+    """VirtualClock 的定时器（取消后留在队列中，到期时跳过）"""
+
+    __slots__ = ('due', 'fn', 'args', 'cancelled')
+
+    def __init__(self, due: float, fn: Callable[..., Any], args: tuple) -> None:
+        self.due = due
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class VirtualClock:
+    """
+    虚拟时钟调度器：时间只在 advance / run 时推进，回调在调用方线程中同步执行。
+    到期时间相同的定时器按调度顺序执行（与 eventlet 一致）。
+    """
+
+    def __init__(self) -> None:
+        self.now: float = 0.0
+        self.fired: int = 0                 # 已执行的回调数
+        self._queue: list[tuple[float, int, VirtualTimer]] = []
+        self._seq = itertools.count()
+
+    def spawn_after(self, seconds: float, fn: Callable[..., Any], *args: Any) -> VirtualTimer:
+        timer = VirtualTimer(self.now + seconds, fn, args)
+        heapq.heappush(self._queue, (timer.due, next(self._seq), timer))
+        return timer
+
+    @property
+    def pending(self) -> int:
+        """未取消的定时器数"""
+        return sum(1 for _, _, t in self._queue if not t.cancelled)
+
+    def _fire_next(self, deadline: float) -> bool:
+        queue = self._queue
+        while queue:
+            due, _, timer = queue[0]
+            if due > deadline:
+                return False
+            heapq.heappop(queue)
+            if timer.cancelled:
+                continue
+            self.now = max(self.now, due)
+            self.fired += 1
+            timer.fn(*timer.args)
+            return True
+        return False
+
+    def advance(self, seconds: float) -> int:
+        """推进 seconds 秒，执行期间到期的回调（含回调中新调度且在期限内的），返回执行数"""
+        deadline = self.now + seconds
+        n = 0
+        while self._fire_next(deadline):
+            n += 1
+        self.now = deadline
+        return n
+
+    def run(self, until: Callable[[], bool] | None = None, limit: int = 100_000) -> int:
+        """
+        依次执行所有待执行的回调（时间直接跳到下一个到期点），返回执行数。
+        until() 为真或执行 limit 个回调后停止。
+        """
+        n = 0
+        while n < limit and not (until and until()):
+            if not self._fire_next(float('inf')):
+                break
+            n += 1
+        return n
+
+
+# ─── 时间轮 ───────────────────────────────────────────────────────
+
+class WheelTimer:
+    """TimerWheel 的定时器（取消时直接从所在槽中移除）"""
+
+    __slots__ = ('wheel', 'key', 'slot', 'rounds', 'fn', 'args')
+
+    def __init__(self, wheel: 'TimerWheel', key: int, slot: int, rounds: int, fn: Callable[..., Any], args: tuple) -> None:
+        self.wheel = wheel
+        self.key = key
+        self.slot = slot
+        self.rounds = rounds      # 还需转过的整圈数
+        self.fn = fn
+        self.args = args
+
+    def cancel(self) -> None:
+        self.wheel._cancel(self)
+
+
+class TimerWheel:
+    """
+    哈希时间轮调度器（服务器中所有房间共用一个）。
+
+    tick:    槽的时间粒度（秒）；定时器在到期后的第一个 tick 执行，最多晚 tick 秒，
+             0 秒的定时器在下一个 tick 执行
+    slots:   槽数；超过 tick * slots 秒的定时器按整圈数在槽中等待
+    driver:  驱动 tick 的底层调度器（默认 eventlet）；只在有定时器时才挂一个驱动定时器
+    clock:   读取当前时间的函数（tick 延迟时按实际经过的时间补转）
+
+    调度与取消都是 O(1)：每个槽是按调度顺序排列的字典，同一 tick 到期的回调按调度顺序执行。
+    """
+
+    def __init__(
+        self,
+        tick: float = 0.05,
+        slots: int = 512,
+        driver: Scheduler | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.tick = tick
+        self._slots: list[dict[int, WheelTimer]] = [{} for _ in range(slots)]
+        self._cursor: int = 0           # 下一个要处理的槽
+        self._driver = driver or EventletScheduler()
+        self._clock = clock
+        self._armed: Timer | None = None
+        self._next_due: float = 0.0     # 下一个槽的处理时间
+        self._seq = itertools.count()
+        self.live: int = 0
+        self.scheduled: int = 0
+        self.fired: int = 0
+        self.cancelled: int = 0
+
+    def spawn_after(self, seconds: float, fn: Callable[..., Any], *args: Any) -> WheelTimer:
+        if self._armed is None:
+            # 空闲后重新开始计时：当前槽即下一个 tick
+            self._next_due = self._clock() + self.tick
+        ticks = max(0, math.ceil((seconds - (self._next_due - self._clock())) / self.tick - 1e-9))
+        n = len(self._slots)
+        timer = WheelTimer(self, next(self._seq), (self._cursor + ticks) % n, ticks // n, fn, args)
+        self._slots[timer.slot][timer.key] = timer
+        self.live += 1
+        self.scheduled += 1
+        if self._armed is None:
+            self._armed = self._driver.spawn_after(self.tick, self._on_tick)
+        return timer
+
+    def _cancel(self, timer: WheelTimer) -> None:
+        if self._slots[timer.slot].pop(timer.key, None) is not None:
+            self.live -= 1
+            self.cancelled += 1
+
+    def _on_tick(self) -> None:
+        # 处理期间 _armed 仍指向本次驱动定时器：回调中新调度的定时器不会重复挂驱动
+        # 驱动定时器迟到时补转经过的槽（每次最多一圈）
+        behind = int((self._clock() - self._next_due) / self.tick)
+        for _ in range(1 + min(max(behind, 0), len(self._slots) - 1)):
+            self._advance()
+            if not self.live:
+                break
+        self._armed = None
+        if self.live:
+            self._armed = self._driver.spawn_after(max(self._next_due - self._clock(), 0.0), self._on_tick)
+
+    def _advance(self) -> None:
+        """处理当前槽并前进一格"""
+        slot = self._slots[self._cursor]
+        self._cursor = (self._cursor + 1) % len(self._slots)
+        self._next_due += self.tick
+        due = [t for t in slot.values() if t.rounds == 0]
+        for t in slot.values():
+            t.rounds -= 1
+        for timer in due:
+            if slot.pop(timer.key, None) is None:
+                continue            # 被同槽先执行的回调取消
+            self.live -= 1
+            self.fired += 1
+            try:
+                timer.fn(*timer.args)
+            except Exception:
+                traceback.print_exc()   # 与 eventlet 相同：打印后继续，不影响其他回调
+
+    def as_dict(self) -> dict:
+        return {
+            'live': self.live,
+            'scheduled': self.scheduled,
+            'fired': self.fired,
+            'cancelled': self.cancelled,
+            'tick': self.tick,
+            'slots': len(self._slots),
+        }
+
+
+class GroupTimer:
+    """TimerGroup 的定时器"""
+
+    __slots__ = ('group', 'key')
+
+    def __init__(self, group: 'TimerGroup', key: int) -> None:
+        self.group = group
+        self.key = key
+
+    def cancel(self) -> None:
+        timer = self.group._live.pop(self.key, None)
+        if timer is not None:
+            timer.cancel()
+
+
+class TimerGroup:
+    """
+    一个房间的定时器（包装任意调度器：服务器中为共用的 TimerWheel，无界面运行时为 VirtualClock）。
+
+    每个定时器记下调度时的 generation；new_generation() 取消本组所有定时器并使 generation 加一，
+    即使底层定时器未能取消，回调执行时发现 generation 已变化也直接丢弃。
+    """
+
+    def __init__(self, scheduler: Scheduler) -> None:
+        self._scheduler = scheduler
+        self.generation: int = 0
+        self._live: dict[int, Timer] = {}
+        self._seq = itertools.count()
+        self.stale: int = 0             # 因 generation 变化被丢弃的回调数
+
+    @property
+    def live(self) -> int:
+        """未执行、未取消的定时器数"""
+        return len(self._live)
+
+    def spawn_after(self, seconds: float, fn: Callable[..., Any], *args: Any) -> GroupTimer:
+        key = next(self._seq)
+        generation = self.generation
+
+        def fire() -> None:
+            if generation != self.generation:
+                self.stale += 1
+                return
+            if self._live.pop(key, None) is not None:
+                fn(*args)
+
+        self._live[key] = self._scheduler.spawn_after(seconds, fire)
+        return GroupTimer(self, key)
+
+    def new_generation(self) -> None:
+        """作废本组所有定时器（新一局开始、房间移除时调用）"""
+        self.generation += 1
+        live, self._live = self._live, {}
+        for timer in live.values():
+            timer.cancel()
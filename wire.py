@@ -0,0 +1,137 @@
+"""
+wire.py — 紧凑二进制线路编码（可选，连接时以 enc=compact 协商）
+
+职责：
+  - 把发给单个连接的事件编码为 msgpack：牌（Unicode 或编码）以 0~33 的字节 ID 传输
+  - 玩家表（用户名、座位）每局对每个连接只发一次，状态中的玩家信息按 pid 引用
+  - unpack 为前端解码逻辑的 Python 版本，用于校验编码无损
+
+编码规则（无损：前端解码后与 JSON 版本的结构完全相同）：
+  ext 1  单张牌 Unicode        1 字节 ID（34 = 暗杠牌背 🀫）
+  ext 2  牌 Unicode 列表       每张 1 字节
+  ext 3  单张牌编码（m1…z7）   1 字节 ID
+  ext 4  牌编码列表            每张 1 字节
+  game_state / game_state_patch 中 others 的玩家去掉 username / seat，
+  玩家表变化时随状态附带 player_table: {pid: [username, seat]}
+  batch 帧：[[事件名, 单个事件的编码字节], ...]
+
+依赖 msgpack（未安装时 AVAILABLE 为 False，服务器对所有连接使用 JSON）。
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from tiles import ID_TILES, ID_UNICODE
+
+try:
+    import msgpack
+except ImportError:   # 可选依赖
+    msgpack = None
+
+AVAILABLE = msgpack is not None
+
+_HIDDEN_TILE = '🀫'
+_GLYPHS: tuple[str, ...] = ID_UNICODE + (_HIDDEN_TILE,)
+
+# ext 类型号
+_EXT_GLYPH, _EXT_GLYPH_LIST, _EXT_CODE, _EXT_CODE_LIST = 1, 2, 3, 4
+
+_GLYPH_IDS: dict[str, int] = {g: i for i, g in enumerate(_GLYPHS)}
+_CODE_IDS: dict[str, int] = {c: i for i, c in enumerate(ID_TILES)}
+
+# 从 others 中剥离、改由玩家表补回的字段
+_TABLE_FIELDS = ('username', 'seat')
+
+
+def _single_exts(kind: int, ids: dict[str, int]) -> dict[str, Any]:
+    if msgpack is None:
+        return {}
+    return {s: msgpack.ExtType(kind, bytes((i,))) for s, i in ids.items()}
+
+
+# 单张牌的 ExtType 预先构造好，编码时直接查表
+_GLYPH_EXT = _single_exts(_EXT_GLYPH, _GLYPH_IDS)
+_CODE_EXT = _single_exts(_EXT_CODE, _CODE_IDS)
+
+
+# ─── 编码 ─────────────────────────────────────────────────────────
+
+def _compact(obj: Any) -> Any:
+    """递归替换：牌字符串 -> 单字节 ext，全由牌组成的列表 -> 字节串 ext"""
+    if isinstance(obj, str):
+        ext = _GLYPH_EXT.get(obj)
+        if ext is None:
+            ext = _CODE_EXT.get(obj, obj)
+        return ext
+    if isinstance(obj, dict):
+        return {k: _compact(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        if obj and isinstance(obj[0], str):
+            for kind, ids in ((_EXT_GLYPH_LIST, _GLYPH_IDS), (_EXT_CODE_LIST, _CODE_IDS)):
+                if obj[0] in ids and all(isinstance(t, str) and t in ids for t in obj):
+                    return msgpack.ExtType(kind, bytes(ids[t] for t in obj))
+        return [_compact(v) for v in obj]
+    return obj
+
+
+def _strip_players(players: list[dict]) -> tuple[list[dict], dict[str, list[str]]]:
+    """others 列表 -> (去掉 username/seat 的列表, 玩家表)"""
+    table = {str(p['pid']): [p.get('username'), p.get('seat')] for p in players}
+    stripped = [{k: v for k, v in p.items() if k not in _TABLE_FIELDS} for p in players]
+    return stripped, table
+
+
+def pack(event: str, data: dict, tables: dict[str, dict], sid: str) -> bytes:
+    """
+    编码发给 sid 的一个事件。
+
+    tables: sid -> 该连接已持有的玩家表（调用方按局保存，新一局清空即重发）
+    """
+    if event in ('game_state', 'game_state_patch'):
+        container = data if event == 'game_state' else data.get('set', {})
+        players = container.get('others')
+        if players:
+            stripped, table = _strip_players(players)
+            known = tables.setdefault(sid, {})
+            fresh = {pid: row for pid, row in table.items() if known.get(pid) != row}
+            container = dict(container, others=stripped)
+            if fresh:
+                known.update(fresh)
+                container['player_table'] = fresh
+            data = container if event == 'game_state' else dict(data, set=container)
+    return msgpack.packb(_compact(data), use_bin_type=True)
+
+
+def pack_batch(items: list[tuple[str, bytes]]) -> bytes:
+    """一帧 batch：[[事件名, pack 的结果], ...]（各事件仍可单独解码）"""
+    return msgpack.packb([[event, payload] for event, payload in items], use_bin_type=True)
+
+
+# ─── 解码（与前端 decodeWire 相同，用于校验） ──────────────────────
+
+def _ext_hook(code: int, payload: bytes) -> Any:
+    if code == _EXT_GLYPH:
+        return _GLYPHS[payload[0]]
+    if code == _EXT_GLYPH_LIST:
+        return [_GLYPHS[i] for i in payload]
+    if code == _EXT_CODE:
+        return ID_TILES[payload[0]]
+    if code == _EXT_CODE_LIST:
+        return [ID_TILES[i] for i in payload]
+    return msgpack.ExtType(code, payload)
+
+
+def _expand_players(players: list[dict], table: dict[str, list[str]]) -> list[dict]:
+    return [dict(p, **dict(zip(_TABLE_FIELDS, table[str(p['pid'])]))) for p in players]
+
+
+def unpack(event: str, payload: bytes, table: dict[str, list[str]]) -> dict:
+    """解码 pack 的结果；table 为该连接累积的玩家表（原地更新）"""
+    data = msgpack.unpackb(payload, ext_hook=_ext_hook, raw=False, strict_map_key=False)
+    if event in ('game_state', 'game_state_patch'):
+        container = data if event == 'game_state' else data.get('set', {})
+        table.update(container.pop('player_table', {}))
+        if container.get('others'):
+            container['others'] = _expand_players(container['others'], table)
+    return data